@@ -0,0 +1,124 @@
+import sys
+import os
+import argparse
+import tempfile
+import tracemalloc
+
+import csep
+from csep.core import evaluations
+from csep.core.mfd import MagnitudeFrequencyDistribution
+from csep.utils import plotting
+
+from benchmarks.synthetic import write_ucerf3_binary
+
+"""
+Measures the peak memory of catalog pipelines with tracemalloc.
+
+tracemalloc traces the allocations of numpy arrays and python objects, so peaks are reproducible and do not depend on
+the allocator or on pages of memory-mapped files, unlike the resident set size of the process. The pipelines stream
+catalogs from disk, so their peak memory should not grow with the number of events in the stochastic event set.
+tests/test_memory.py asserts budgets on small event sets; larger event sets can be checked with
+
+    python -m benchmarks.memory --num-catalogs 10000 --num-events 10000000
+"""
+
+
+def measure_peak_memory(func, *args, **kwargs):
+    """
+    Calls func and measures the peak of memory allocated while it runs, relative to the memory allocated before.
+
+    Args:
+        func (callable): function to measure
+        *args: positional arguments of func
+        **kwargs: keyword arguments of func
+
+    Returns:
+        result: return value of func
+        peak (int): peak of allocated memory in bytes
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+    return result, peak - baseline
+
+
+def load_and_filter(filename, statement='magnitude >= 3.95'):
+    """
+    Streams catalogs from a merged UCERF3 binary file, converts them to the CSEP format and filters them.
+
+    Returns:
+        (int): number of events kept
+    """
+    num_events = 0
+    for catalog in csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filename):
+        catalog.filter(statement)
+        num_events += catalog.get_number_of_events()
+    return num_events
+
+
+def cumulative_events_versus_time(filename, observation):
+    """
+    Prepares the data of :func:`~csep.utils.plotting.plot_cumulative_events_versus_time` from streamed catalogs.
+    """
+    catalogs = csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filename)
+    return plotting.get_cumulative_events_versus_time(catalogs, observation)
+
+
+def magnitude_frequency_distribution(filename, observation, min_mw=2.5, max_mw=9.0):
+    """
+    Computes the MFD envelope of streamed catalogs and the Gutenberg-Richter fit of the observation.
+    """
+    catalogs = csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filename)
+    mfd = MagnitudeFrequencyDistribution.from_catalogs(catalogs, min_mw=min_mw, max_mw=max_mw)
+    return mfd.get_envelope(), observation.get_mfd()
+
+
+def number_test(filename, observation):
+    """
+    Evaluates the N-test on streamed catalogs.
+    """
+    catalogs = csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filename)
+    return evaluations.number_test(catalogs, observation)
+
+
+# pipelines called with the filename of a merged UCERF3 binary file and an observed catalog
+PIPELINES = {
+    'load_and_filter': lambda filename, observation: load_and_filter(filename),
+    'cumulative_events_versus_time': cumulative_events_versus_time,
+    'magnitude_frequency_distribution': magnitude_frequency_distribution,
+    'number_test': number_test,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measures peak memory of catalog pipelines on synthetic event sets.')
+    parser.add_argument('--num-catalogs', type=int, default=1000, help='number of catalogs')
+    parser.add_argument('--num-events', type=int, default=1000000, help='total number of events')
+    parser.add_argument('--work-dir', help='directory for the synthetic binary file')
+    args = parser.parse_args(argv)
+
+    # dependencies imported on first use would be counted in the peaks otherwise
+    import pandas
+    import scipy.stats
+
+    peaks = {}
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp_dir:
+        filename = os.path.join(tmp_dir, 'results_complete.bin')
+        write_ucerf3_binary(filename, args.num_catalogs, args.num_events)
+        observation = next(csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filename))
+        for name, pipeline in PIPELINES.items():
+            _, peaks[name] = measure_peak_memory(pipeline, filename, observation)
+            print('{:<45s}{:>12.1f} MB'.format(name, peaks[name] / 1024 ** 2))
+    return peaks
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+
+import numpy
+
+from csep.core.catalogs import UCERF3Catalog
+from csep.core.evaluations import number_test
+from csep.core.mfd import MagnitudeFrequencyDistribution
+from csep.utils.plotting import get_cumulative_events_versus_time, get_magnitude_versus_time_raster
+
+from benchmarks.synthetic import write_ucerf3_binary
+
+"""
+Benchmarks of the catalog and evaluation code paths on synthetic UCERF3 stochastic event sets.
+
+Example usage would be:
+    python -m benchmarks.run_benchmarks --preset medium --output results.json
+    python -m benchmarks.run_benchmarks --preset medium --compare results.json
+
+Every benchmark is run --repeat times and the fastest time is recorded. Results are written to JSON together with the
+commit and the versions of the dependencies, so results of different commits can be compared.
+"""
+
+# (number of catalogs, total number of events)
+PRESETS = {
+    'tiny': (10, 1000),
+    'small': (100, 100000),
+    'medium': (1000, 1000000),
+    'large': (10000, 10000000),
+    'xlarge': (100000, 10000000),
+}
+
+FILTER_STATEMENT = 'magnitude >= 3.95'
+
+
+def get_commit():
+    """
+    Returns:
+        (str): hash of the checked out commit, None if the repository is not available
+    """
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('utf-8').strip()
+
+
+def timeit(func, repeat):
+    """
+    Runs func repeat times.
+
+    Returns:
+        (list): wall time of each run in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def load_catalogs(filename):
+    return list(UCERF3Catalog.load_catalogs(filename=filename))
+
+
+def load_csep_catalogs(filename):
+    """
+    Returns catalogs in CSEP format and the largest catalog, which serves as observation.
+    """
+    catalogs = [catalog._get_csep_format() for catalog in UCERF3Catalog.load_catalogs(filename=filename)]
+    return catalogs, max(catalogs, key=lambda catalog: catalog.get_number_of_events())
+
+
+def load_event_set(filename):
+    """
+    Returns stochastic event set in CSEP format and the largest catalog, which serves as observation.
+    """
+    event_set = UCERF3Catalog.load_event_set(filename)._get_csep_format()
+    return event_set, event_set[int(numpy.argmax(event_set.get_number_of_events()))]
+
+
+# name, setup and benchmark. setup is called with the filename of the merged binary file and its result is passed to
+# the benchmark, so inputs are only created for benchmarks that run and are released afterwards.
+BENCHMARKS = [
+    ('load_catalogs', lambda filename: filename, load_catalogs),
+    ('load_catalogs_memmap', lambda filename: filename,
+     lambda filename: list(UCERF3Catalog.load_catalogs(filename=filename, use_memmap=True))),
+    ('load_catalogs_filtered', lambda filename: filename,
+     lambda filename: list(UCERF3Catalog.load_catalogs(filename=filename, filters=FILTER_STATEMENT))),
+    ('load_event_set', lambda filename: filename,
+     lambda filename: UCERF3Catalog.load_event_set(filename)),
+    ('filter', load_catalogs,
+     lambda catalogs: [catalog.filter(FILTER_STATEMENT, in_place=False) for catalog in catalogs]),
+    ('filter_event_set', load_event_set,
+     lambda inputs: inputs[0].filter(FILTER_STATEMENT)),
+    ('csep_format', load_catalogs,
+     lambda catalogs: [catalog._get_csep_format() for catalog in catalogs]),
+    ('get_dataframe', load_catalogs,
+     lambda catalogs: [catalog.get_dataframe() for catalog in catalogs]),
+    ('get_mfd', load_csep_catalogs,
+     lambda inputs: inputs[1].get_mfd()),
+    ('mfd_event_set', load_event_set,
+     lambda inputs: MagnitudeFrequencyDistribution.from_catalogs(inputs[0]).fit_gutenberg_richter()),
+    ('number_test', load_csep_catalogs,
+     lambda inputs: number_test(*inputs)),
+    ('number_test_event_set', load_event_set,
+     lambda inputs: number_test(*inputs)),
+    ('cumulative_events_versus_time', load_csep_catalogs,
+     lambda inputs: get_cumulative_events_versus_time(*inputs)),
+    ('cumulative_events_versus_time_event_set', load_event_set,
+     lambda inputs: get_cumulative_events_versus_time(*inputs)),
+    ('magnitude_versus_time_raster', load_event_set,
+     lambda inputs: get_magnitude_versus_time_raster(inputs[0].get_epoch_times(), inputs[0].get_magnitudes())),
+]
+
+
+def run_benchmarks(num_catalogs, num_events, repeat=3, work_dir=None, seed=0, names=None):
+    """
+    Generates a synthetic event set and runs the benchmarks on it.
+
+    Args:
+        num_catalogs (int): number of catalogs in the event set
+        num_events (int): total number of events in the event set
+        repeat (int): number of runs of each benchmark
+        work_dir (str): directory of the synthetic binary file, defaults to a temporary directory
+        seed (int): seed of the random number generator
+        names (list): names of the benchmarks to run, defaults to all benchmarks
+
+    Returns:
+        (dict): results that can be serialized to JSON
+    """
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        filename = os.path.join(tmp_dir, 'results_complete.bin')
+        t0 = time.perf_counter()
+        write_ucerf3_binary(filename, num_catalogs, num_events, seed=seed)
+        print('Generated {} catalogs with {} events in {:.2f} seconds.'.format(num_catalogs, num_events,
+                                                                              time.perf_counter() - t0))
+
+        results = {}
+        for name, setup, func in BENCHMARKS:
+            if names is not None and name not in names:
+                continue
+            inputs = setup(filename)
+            times = timeit(lambda: func(inputs), repeat)
+            del inputs
+            results[name] = {'seconds': min(times), 'times': times}
+            print('{:<45s}{:>12.4f} s'.format(name, min(times)))
+
+    return {
+        'commit': get_commit(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'config': {'num_catalogs': num_catalogs, 'num_events': num_events, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+def compare_results(results, reference):
+    """
+    Prints the speedup of results relative to reference for benchmarks in both results.
+    """
+    if results['config'] != reference['config']:
+        print('Warning: benchmarks were run with different configurations.')
+    print('{:<45s}{:>12s}{:>12s}{:>10s}'.format('benchmark', 'reference', 'current', 'speedup'))
+    for name, result in results['results'].items():
+        if name not in reference['results']:
+            continue
+        before, after = reference['results'][name]['seconds'], result['seconds']
+        print('{:<45s}{:>12.4f}{:>12.4f}{:>9.2f}x'.format(name, before, after, before / after))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks csep on synthetic UCERF3 stochastic event sets.')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small', help='size of the event set')
+    parser.add_argument('--num-catalogs', type=int, help='number of catalogs, overrides preset')
+    parser.add_argument('--num-events', type=int, help='total number of events, overrides preset')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--benchmarks', nargs='+', help='names of benchmarks to run')
+    parser.add_argument('--work-dir', help='directory for the synthetic binary file')
+    parser.add_argument('--output', help='JSON file to write results to')
+    parser.add_argument('--compare', help='JSON file with reference results')
+    args = parser.parse_args(argv)
+
+    num_catalogs, num_events = PRESETS[args.preset]
+    if args.num_catalogs is not None:
+        num_catalogs = args.num_catalogs
+    if args.num_events is not None:
+        num_events = args.num_events
+
+    results = run_benchmarks(num_catalogs, num_events, repeat=args.repeat, work_dir=args.work_dir, seed=args.seed,
+                             names=args.benchmarks)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare_results(results, json.load(f))
+
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,139 @@
+import numpy
+
+from csep.core.catalogs import UCERF3Catalog
+
+"""
+Generates synthetic stochastic event sets in the merged binary format of UCERF3.
+
+Events are written with UCERF3Catalog.header_dtype and UCERF3Catalog.event_dtype, so the files can be read by every
+loader of UCERF3Catalog. Events are generated in chunks, so files with millions of events can be written without
+holding the whole event set in memory.
+"""
+
+# 1992-06-28, start of the synthetic forecast period
+START_EPOCH = 709732655000
+DURATION = 365 * 24 * 60 * 60 * 1000
+
+# bounding box of the California testing region
+MIN_LONGITUDE, MAX_LONGITUDE = -125.4, -113.1
+MIN_LATITUDE, MAX_LATITUDE = 31.5, 43.0
+
+
+def get_catalog_sizes(num_catalogs, num_events, seed=0):
+    """
+    Distributes num_events randomly over num_catalogs catalogs.
+
+    Args:
+        num_catalogs (int): number of catalogs
+        num_events (int): total number of events
+        seed (int): seed of the random number generator
+
+    Returns:
+        (numpy.array): number of events in each catalog, sums to num_events
+    """
+    rng = numpy.random.RandomState(seed)
+    # catalog sizes of stochastic event sets are overdispersed, weight catalogs by a gamma distribution
+    weights = rng.gamma(0.5, size=num_catalogs)
+    return rng.multinomial(num_events, weights / weights.sum())
+
+
+def generate_events(size, rng, min_mw=2.5, b_value=1.0):
+    """
+    Generates events with uniform locations and Gutenberg-Richter magnitudes.
+
+    Args:
+        size (int): number of events
+        rng (numpy.random.RandomState): random number generator
+        min_mw (float): minimum magnitude
+        b_value (float): b-value of the magnitudes
+
+    Returns:
+        (numpy.ndarray): events with dtype UCERF3Catalog.event_dtype
+    """
+    events = numpy.zeros(size, dtype=UCERF3Catalog.event_dtype)
+    events['rupture_id'] = numpy.arange(size)
+    events['parent_id'] = -1
+    events['origin_time'] = START_EPOCH + rng.randint(0, DURATION, size, dtype=numpy.int64)
+    events['latitude'] = rng.uniform(MIN_LATITUDE, MAX_LATITUDE, size)
+    events['longitude'] = rng.uniform(MIN_LONGITUDE, MAX_LONGITUDE, size)
+    events['depth'] = rng.uniform(0, 30, size)
+    events['magnitude'] = numpy.round(min_mw + rng.exponential(1 / (b_value * numpy.log(10)), size), 2)
+    events['erf_index'] = -1
+    events['fss_index'] = -1
+    events['grid_node_index'] = rng.randint(0, 7636, size)
+    return events
+
+
+def generate_catalogs(catalog_sizes, seed=0, chunk_size=1000000, min_mw=2.5, b_value=1.0):
+    """
+    Generates the events of each catalog. Events of several catalogs are generated at once, in chunks of about
+    chunk_size events.
+
+    Args:
+        catalog_sizes (list): number of events in each catalog
+        seed (int): seed of the random number generator
+        chunk_size (int): approximate number of events generated at once
+        min_mw (float): minimum magnitude
+        b_value (float): b-value of the magnitudes
+
+    Yields:
+        (numpy.ndarray): events of a catalog with dtype UCERF3Catalog.event_dtype, sorted by origin time
+    """
+    catalog_sizes = numpy.asarray(catalog_sizes, dtype=numpy.int64)
+    num_catalogs = len(catalog_sizes)
+    offsets = numpy.zeros(num_catalogs + 1, dtype=numpy.int64)
+    numpy.cumsum(catalog_sizes, out=offsets[1:])
+    rng = numpy.random.RandomState(seed)
+
+    start = 0
+    while start < num_catalogs:
+        # catalogs of this chunk, at least one catalog per chunk
+        stop = max(numpy.searchsorted(offsets, offsets[start] + chunk_size, side='right') - 1, start + 1)
+        stop = min(stop, num_catalogs)
+        events = generate_events(offsets[stop] - offsets[start], rng, min_mw=min_mw, b_value=b_value)
+        # sort events of all catalogs in the chunk by catalog and origin time at once
+        catalog_idx = numpy.repeat(numpy.arange(start, stop), catalog_sizes[start:stop])
+        events = events[numpy.lexsort((events['origin_time'], catalog_idx))]
+        events['rupture_id'] = numpy.arange(len(events)) + offsets[start] - offsets[catalog_idx]
+        for i in range(start, stop):
+            yield events[offsets[i] - offsets[start]:offsets[i+1] - offsets[start]]
+        start = stop
+
+
+def write_catalogs(filename, catalog_sizes, **kwargs):
+    """
+    Writes a merged UCERF3 binary file with catalogs of the given sizes, see :func:`generate_catalogs`.
+
+    The file contains a big-endian int32 with the number of catalogs, followed by the header and the events of each
+    catalog.
+
+    Args:
+        filename (str): filename of the merged binary file
+        catalog_sizes (list): number of events in each catalog
+        **kwargs: seed, chunk_size, min_mw and b_value of :func:`generate_catalogs`
+    """
+    with open(filename, 'wb') as f:
+        numpy.array([len(catalog_sizes)], dtype='>i4').tofile(f)
+        for events in generate_catalogs(catalog_sizes, **kwargs):
+            numpy.array([(1, len(events))], dtype=UCERF3Catalog.header_dtype).tofile(f)
+            events.tofile(f)
+
+
+def write_ucerf3_binary(filename, num_catalogs, num_events, seed=0, chunk_size=1000000):
+    """
+    Writes a synthetic merged UCERF3 binary file with num_events events distributed randomly over num_catalogs
+    catalogs, see :func:`write_catalogs`.
+
+    Args:
+        filename (str): filename of the merged binary file
+        num_catalogs (int): number of catalogs
+        num_events (int): total number of events in the file
+        seed (int): seed of the random number generator
+        chunk_size (int): approximate number of events generated at once
+
+    Returns:
+        (numpy.array): number of events in each catalog
+    """
+    catalog_sizes = get_catalog_sizes(num_catalogs, num_events, seed=seed)
+    write_catalogs(filename, catalog_sizes, seed=seed + 1, chunk_size=chunk_size)
+    return catalog_sizes
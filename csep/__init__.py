@@ -1,4 +1,23 @@
-from csep.core.catalogs import *
+"""
+Catalog classes are available from the top level, e.g., csep.CSEPCatalog, but are loaded on first access so that
+importing csep does not import numpy and the catalog modules. Heavy dependencies such as pandas, scipy and
+matplotlib are imported by the functions that use them.
+"""
+
+# catalog classes provided lazily by __getattr__
+_LAZY_CATALOGS = ('BaseCatalog', 'CSEPCatalog', 'UCERF3Catalog', 'ComcatCatalog', 'StochasticEventSet')
+
+__all__ = ['load_stochastic_event_set', 'load_catalog'] + list(_LAZY_CATALOGS)
+
+def __getattr__(name):
+    # called only for names that are not defined in this module
+    if name not in _LAZY_CATALOGS:
+        raise AttributeError("module 'csep' has no attribute '{}'".format(name))
+    from csep.core import catalogs
+    return getattr(catalogs, name)
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 def load_stochastic_event_set(type=None, format='native', **kwargs):
     """
@@ -14,6 +33,8 @@ def load_stochastic_event_set(type=None, format='native', **kwargs):
         (generator): :class:`~csep.core.catalogs.BaseCatalog`
 
     """
+    from csep.core.catalogs import UCERF3Catalog, CSEPCatalog
+
     if type not in ('ucerf3', 'csep'):
         raise ValueError("type must be one of the following: (ucerf3, csep)")
 
@@ -46,6 +67,7 @@ def load_catalog(type=None, format='native', **kwargs):
     Returns:
         (:class:`~csep.core.catalogs.CSEPCatalog`)
     """
+    from csep.core.catalogs import UCERF3Catalog, ComcatCatalog, CSEPCatalog
 
     if type not in ('ucerf3', 'comcat', 'csep'):
         raise ValueError("type must be one of the following: ('ucerf3', 'comcat', 'csep')")
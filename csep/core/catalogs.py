@@ -1,13 +1,45 @@
 import os
+import copy
 import numpy
-import scipy
-import pandas
 import datetime
-import operator
 import time
+import zipfile
+import tempfile
 
 # CSEP Imports
-from csep.utils.time import epoch_time_to_utc_datetime, timedelta_from_years, datetime_to_utc_epoch
+from csep.core.filters import compile_filter
+from csep.core.mfd import MagnitudeFrequencyDistribution
+from csep.core.comcat import search_libcomcat, search_tiled, eventlist_to_ndarray
+from csep.utils.time import epoch_time_to_utc_datetime, timedelta_from_years, \
+    epoch_time_to_zmap_time, epoch_time_to_datetime64, datetime64_to_utc_datetime, zmap_time_to_epoch_time
+
+
+def _catalog_stat(name):
+    """
+    Creates property for a catalog statistic. Statistics are computed from the catalog on first access after the
+    catalog changes, and fall back to the value assigned to the property if the catalog is None or empty.
+    """
+    def getter(self):
+        if self._stats_stale:
+            self._update_catalog_stats()
+        return self._stats[name]
+
+    def setter(self, value):
+        self._stats[name] = value
+
+    return property(getter, setter)
+
+
+def _get_time_bin_counts(epoch_times, catalog_idx, num_catalogs, bin_edges):
+    """
+    Returns (catalogs, bins) counts of events in time bins using integer binning on epoch times.
+    """
+    bin_edges = numpy.asarray(bin_edges, dtype=numpy.int64)
+    num_bins = len(bin_edges) - 1
+    bin_idx = numpy.searchsorted(bin_edges, numpy.asarray(epoch_times, dtype=numpy.int64), side='right') - 1
+    valid = (bin_idx >= 0) & (bin_idx < num_bins)
+    flat = catalog_idx[valid] * num_bins + bin_idx[valid]
+    return numpy.bincount(flat, minlength=num_catalogs * num_bins).reshape(num_catalogs, num_bins)
 
 
 class BaseCatalog:
@@ -29,6 +61,10 @@ class BaseCatalog:
         self.format = format
         self.name = name
 
+        # catalog statistics are computed lazily, see _update_catalog_stats()
+        self._stats = {}
+        self._stats_stale = False
+
         # cleans the catalog to set as ndarray, see setter.
         self.catalog = catalog
 
@@ -46,12 +82,19 @@ class BaseCatalog:
         self.max_longitude = max_longitude
         self.start_time = start_time
         self.end_time = end_time
-        try:
-            if catalog is not None:
-                self._update_catalog_stats()
-        except (AttributeError, NotImplementedError):
-            print('Warning: could not parse catalog statistics by reading catalog! get_magnitudes(), get_latitudes() and get_longitudes() ' +
-                  'must be implemented and bound to calling class! Reverting to old values.')
+
+        # values reported by the statistics if the catalog is empty
+        self._stats_defaults = dict(self._stats)
+
+    # statistics of the catalog, computed on first access and cached until the catalog changes
+    min_magnitude = _catalog_stat('min_magnitude')
+    max_magnitude = _catalog_stat('max_magnitude')
+    min_latitude = _catalog_stat('min_latitude')
+    max_latitude = _catalog_stat('max_latitude')
+    min_longitude = _catalog_stat('min_longitude')
+    max_longitude = _catalog_stat('max_longitude')
+    start_time = _catalog_stat('start_time')
+    end_time = _catalog_stat('end_time')
 
     def __str__(self):
         s='''
@@ -74,6 +117,16 @@ class BaseCatalog:
 
     @property
     def catalog(self):
+        """
+        Returns the events of the catalog as numpy.ndarray.
+
+        Note:
+            For catalogs that are views created by filter(in_place=False), this returns a copy of the selected
+            events. Use the getters to access columns without copying the whole catalog, or compact() to store the
+            copy.
+        """
+        if self._mask is not None:
+            return self._catalog[self._mask]
         return self._catalog
 
     @catalog.setter
@@ -85,8 +138,11 @@ class BaseCatalog:
             This requires that catalog classes implement the self._get_catalog_as_ndarray() function.
             This function should return structured numpy.ndarray.
             Catalog will remain None, if assigned that way in constructor.
+            Assigning a catalog invalidates the catalog statistics. Modifying the array in-place does not.
         """
         self._catalog = val
+        self._mask = None
+        self._stats_stale = val is not None
         if self._catalog is not None:
             if not isinstance(self._catalog, numpy.ndarray):
                 self._catalog = self._get_catalog_as_ndarray()
@@ -132,10 +188,12 @@ class BaseCatalog:
         Returns:
             (pandas.DataFrame): This function must return a pandas DataFrame
         """
+        import pandas
+
         df = pandas.DataFrame(self.catalog)
 
         if 'catalog_id' not in df.keys():
-            df['catalog_id'] = [self.catalog_id for _ in range(len(self.catalog))]
+            df['catalog_id'] = self.catalog_id
         return df
 
     def get_number_of_events(self):
@@ -144,6 +202,8 @@ class BaseCatalog:
 
         :returns: number of events in catalog, zero if catalog is None
         """
+        if self._mask is not None:
+            return numpy.count_nonzero(self._mask)
         if self.catalog is not None:
             return len(self.catalog)
         else:
@@ -176,11 +236,15 @@ class BaseCatalog:
 
     def get_datetimes(self):
         """
-        Returns datetime object from timestamp representation in catalog
+        Returns datetime object from timestamp representation in catalog. Requires that get_epoch_times() is
+        implemented.
 
-        :returns: list of timestamps from events in catalog.
+        Note:
+            This creates one python object per event. Use get_epoch_times() for computations.
+
+        :returns: list of timezone aware (utc) timestamps from events in catalog.
         """
-        raise NotImplementedError('get_datetimes not implemented!')
+        return datetime64_to_utc_datetime(epoch_time_to_datetime64(self.get_epoch_times()))
 
     def get_latitudes(self):
         """
@@ -196,12 +260,40 @@ class BaseCatalog:
         """
         raise NotImplementedError('get_longitudes not implemented!')
 
+    def get_time_bin_counts(self, bin_edges):
+        """
+        Counts the events in time bins.
+
+        Args:
+            bin_edges (numpy.array): edges of the time bins in milliseconds, see
+                                     :func:`~csep.utils.time.get_time_bin_edges`
+
+        Returns:
+            (numpy.array): number of events in each bin, events outside of the bins are not counted
+        """
+        epoch_times = self.get_epoch_times()
+        return _get_time_bin_counts(epoch_times, numpy.zeros(len(epoch_times), dtype=numpy.int64), 1, bin_edges)[0]
+
+    def get_spatial_idx(self, region):
+        """
+        Returns the index of the cells of the region that contain the events.
+
+        Args:
+            region (:class:`~csep.core.regions.Region`): gridded region
+
+        Returns:
+            (numpy.array): index of the cells, -1 for events outside the region
+        """
+        return region.get_index_of(self.get_longitudes(), self.get_latitudes())
+
     def get_mfd(self, delta_mw=0.3, p_value=0.05):
         """
         Computes magnitude frequency distribution for catalog. MFD is computed by creating magnitude bins
         discretized by delta_mw.
 
-        Requires that self.get_dataframe() is implemented in order to compute MFD.
+        Note:
+            To compute the MFDs of many catalogs at once, use
+            :class:`~csep.core.mfd.MagnitudeFrequencyDistribution` directly.
 
         Args:
             delta_mw (float): Magnitude spacing for magnitude binning
@@ -210,121 +302,89 @@ class BaseCatalog:
         Returns:
             (pandas.DataFrame): Magnitude Freq Distribution. Counts and regression statistics attached for plotting.
         """
-        # getting comcat catalog as dataframe
-        dm = delta_mw
-        p_value = p_value
-        min_mw, max_mw = self.min_magnitude, self.max_magnitude
-        event_count = self.get_number_of_events()
-
+        import pandas
 
-        # pandas treats intervals as inclusive on top
-        mw_inter = numpy.arange(min_mw-dm/2, max_mw+dm, dm)
-
-        # switching into dataframe for easy manipulations
-        df = self.get_dataframe()
-
-        # get the counts in each magnitude bin
-        self.mfd = pandas.DataFrame(df['counts'].groupby(pandas.cut(df['magnitude'], mw_inter)).sum())
+        mfd = MagnitudeFrequencyDistribution.from_catalogs([self], delta_mw=delta_mw,
+                                                          min_mw=self.min_magnitude, max_mw=self.max_magnitude)
+        fit = mfd.fit_gutenberg_richter(p_value=p_value)
 
         # cumulative counts contain the number of events greater than or equal to the magnitude
-        self.mfd['counts'] = self.mfd.loc[::-1, 'counts'].cumsum()
-
-        # get values from dataframe, might contain zeros
-        vals = numpy.squeeze(self.mfd.values)
-        x = numpy.array(self.mfd.index.categories.mid)
-
-        # this is some what lenient
-        if len(x) < 3:
-            self.mfd['N'] = numpy.nan
-            self.mfd['N_est'] = numpy.nan
-            self.mfd['lower_ci'] = numpy.nan
-            self.mfd['upper_ci'] = numpy.nan
-            self.mfd['t_stat'] = numpy.nan
-            self.mfd['a'] = numpy.nan
-            self.mfd['b'] = numpy.nan
-            self.mfd['ci_b'] = numpy.nan
-            return self.mfd
-
-        # this could evaluate as false if there are zeros
-        N = numpy.log10(vals)
-        G = numpy.vstack([numpy.ones(len(x)), x]).T
-
-        # perform least-squares to get b-value
-        # log(N) = a-bM or N = 10^a / 10^bM
-        a, b = numpy.linalg.lstsq(G, N, rcond=None)[0]
-
-        # generate line to plot
-        N_est = a + b*x
-
-        # setup vars for plotting ci
-        err = N - numpy.squeeze(N_est)
-
-        n = len(x)
-        t_stat = scipy.stats.t.ppf(1-p_value/2, n-2)
-        mean_x = numpy.mean(x)
-        se_line = numpy.sqrt(numpy.sum(numpy.power(err,2))/(n-2))
-        se_xk = numpy.sqrt(1/n+numpy.power(x-mean_x,2)/numpy.sum(numpy.power(x-mean_x,2)))
-        confs = se_line * se_xk
-        lower = N_est-t_stat*confs
-        upper = N_est+t_stat*confs
-
-        # confidence interval of b-value
-        rms = numpy.sqrt(numpy.mean(numpy.power(err,2)))
-        denom = numpy.sum(numpy.power(x-mean_x,2))
-        ci_b = t_stat*rms/denom
-
-        # wish this were functional
-        self.mfd['N'] = 0.0
-        self.mfd['N_est'] = 0.0
-        self.mfd['lower_ci'] = 0.0
-        self.mfd['upper_ci'] = 0.0
-        self.mfd['t_stat'] = 0.0
-        self.mfd['a'] = 0.0
-        self.mfd['b'] = 0.0
-        self.mfd['ci_b'] = 0.0
-
-        # add additional state to dataframe. use .loc() indexing to ensure the data is bound to dataframe
-        self.mfd.loc[self.mfd['counts'] != 0, 'N'] = N
-        self.mfd.loc[self.mfd['counts'] != 0, 'N_est'] = N_est
-        self.mfd.loc[self.mfd['counts'] != 0, 'lower_ci'] = lower
-        self.mfd.loc[self.mfd['counts'] != 0, 'upper_ci'] = upper
-        self.mfd.loc[self.mfd['counts'] != 0, 't_stat'] = t_stat
-        self.mfd.loc[self.mfd['counts'] != 0, 'a'] = a
-        self.mfd.loc[self.mfd['counts'] != 0, 'b'] = b
-        self.mfd.loc[self.mfd['counts'] != 0, 'ci_b'] = ci_b
-
-        # return mfd
+        index = pandas.CategoricalIndex(pandas.IntervalIndex.from_breaks(mfd.bin_edges), name='magnitude')
+        self.mfd = pandas.DataFrame({'counts': mfd.get_cumulative_counts()[0]}, index=index)
+        for key in ('N', 'N_est', 'lower_ci', 'upper_ci', 't_stat', 'a', 'b', 'ci_b'):
+            self.mfd[key] = fit[key][0]
         return self.mfd
 
-    def filter(self, statement):
+    def filter(self, statement, in_place=True):
         """
         Filters the catalog based on value.
 
-        Notes: only support lowpass, highpass style filters. Bandpass or notch not implemented yet.
+        Statements are compiled into :class:`~csep.core.filters.FilterExpression` objects and can combine
+        comparisons using and, or, not, between and in, e.g., 'magnitude > 3.95 and depth between 0 and 20'. The
+        compiled expression is evaluated in a single pass and the catalog is copied once. Statements are cached
+        after compiling, and compiled expressions can be passed directly to re-use them across catalogs.
+
+        If in_place is False, the catalog is not modified. Instead, a view is returned that stores a boolean mask over
+        the events of this catalog, so no events are copied. Views can be filtered further and are copied only when
+        compact() is called or the catalog property is accessed. This allows evaluating the same catalog at several
+        magnitude thresholds without duplicating the events:
+
+        >>> counts = [catalog.filter('magnitude >= {}'.format(mw), in_place=False).get_number_of_events()
+        ...           for mw in (3.95, 4.95, 5.95)]
 
         Args:
-            statement (str): logical statement to evaluate, e.g., 'magnitude > 4.0'
+            statement (str or FilterExpression): logical statement to evaluate, e.g., 'magnitude > 4.0'
+            in_place (bool): modify this catalog or return a view
 
         Returns:
-            self: instance of BaseCatalog, so that this function can be chained.
+            self: instance of BaseCatalog, so that this function can be chained. A new view if in_place is False.
 
         """
-        operators = {'>': operator.gt,
-                     '<': operator.lt,
-                     '>=': operator.ge,
-                     '<=': operator.le,
-                     '==': operator.eq}
-        name, type, value = statement.split(' ')
-        idx = numpy.where(operators[type](self.catalog[name], float(value)))
-        filtered = self.catalog[idx]
-        self.catalog = filtered
-
-        # update instance state before returning
-        self._update_catalog_stats()
+        # the expression is evaluated on the shared events, so views never copy the events
+        mask = compile_filter(statement).mask(self._catalog)
+        if self._mask is not None:
+            mask &= self._mask
+
+        if not in_place:
+            view = copy.copy(self)
+            # statistics are computed from the mask of the view on first access
+            view._stats = dict(self._stats_defaults)
+            view._stats_stale = True
+            view._mask = mask
+            view.mfd = None
+            return view
+
+        if self._mask is not None:
+            self._mask = mask
+            self._stats_stale = True
+        else:
+            # assigning the catalog invalidates the catalog statistics
+            self.catalog = self._catalog[mask]
 
         # return self
         return self
 
+    def compact(self):
+        """
+        Copies the events selected by a view into a new array that is owned by this catalog. Catalogs that are not
+        views are not modified.
+
+        Returns:
+            self: instance of BaseCatalog, so that this function can be chained.
+        """
+        if self._mask is not None:
+            self.catalog = self._catalog[self._mask]
+        return self
+
+    def _get_column(self, name):
+        """
+        Returns column of the catalog. For views, only the selected values of this column are copied.
+        """
+        column = self._catalog[name]
+        if self._mask is not None:
+            column = column[self._mask]
+        return column
+
     def _get_csep_format(self):
         """
         This method should be overwritten for catalog formats that do not adhere to the CSEP ZMAP catalog format. For
@@ -333,16 +393,71 @@ class BaseCatalog:
         """
         raise NotImplementedError('_get_csep_format() not implemented.')
 
-    def _update_catalog_stats(self):
+    def _convert_to_csep_format(self):
+        """
+        Converts catalogs with times stored as epoch times into the CSEP format using whole-array operations. Requires
+        that the catalog contains longitude, latitude, magnitude and depth columns.
+
+        Note:
+            Assigning a column casts it into the byte order of the CSEP format, so each column is converted once.
+
+        Returns:
+            (:class:`~csep.core.catalogs.CSEPCatalog`)
+        """
+        n = self.get_number_of_events()
+        csep_catalog = numpy.zeros(n, dtype=CSEPCatalog.csep_dtype)
+        csep_catalog['longitude'] = self.get_longitudes()
+        csep_catalog['latitude'] = self.get_latitudes()
+        csep_catalog['magnitude'] = self.get_magnitudes()
+        csep_catalog['depth'] = self._get_column('depth')
+
+        year, month, day, hour, minute, second = epoch_time_to_zmap_time(self.get_epoch_times())
+        csep_catalog['year'] = year
+        csep_catalog['month'] = month
+        csep_catalog['day'] = day
+        csep_catalog['hour'] = hour
+        csep_catalog['minute'] = minute
+        csep_catalog['second'] = second
+
+        return CSEPCatalog(catalog=csep_catalog, catalog_id=self.catalog_id, filename=self.filename)
+
+    def _update_catalog_stats(self, chunk_size=65536):
+        """
+        Computes min and max values of the magnitudes, latitudes, longitudes and epoch times of the catalog.
+
+        The columns are reduced together in chunks of chunk_size events, so each chunk is read from memory once
+        while it is in cache instead of once per reduction. This function is called on first access to one of the
+        statistics after the catalog changes.
+        """
+        self._stats_stale = False
+
+        # empty catalogs, e.g., simulations without any events, have no statistics to compute
+        if self.get_number_of_events() == 0:
+            self._stats = dict(self._stats_defaults)
+            return
+
+        try:
+            columns = (self.get_magnitudes(), self.get_latitudes(), self.get_longitudes(), self.get_epoch_times())
+        except (AttributeError, NotImplementedError):
+            print('Warning: could not parse catalog statistics by reading catalog! get_magnitudes(), get_latitudes() and get_longitudes() ' +
+                  'must be implemented and bound to calling class! Reverting to old values.')
+            return
+
+        minimums = [None] * len(columns)
+        maximums = [None] * len(columns)
+        for start in range(0, len(columns[0]), chunk_size):
+            for i, column in enumerate(columns):
+                chunk = column[start:start+chunk_size]
+                chunk_min, chunk_max = chunk.min(), chunk.max()
+                minimums[i] = chunk_min if minimums[i] is None else min(minimums[i], chunk_min)
+                maximums[i] = chunk_max if maximums[i] is None else max(maximums[i], chunk_max)
+
         # update min and max values
-        self.min_magnitude =  numpy.min(self.get_magnitudes())
-        self.max_magnitude =  numpy.max(self.get_magnitudes())
-        self.min_latitude =  numpy.min(self.get_latitudes())
-        self.max_latitude =  numpy.max(self.get_latitudes())
-        self.min_longitude =  numpy.min(self.get_longitudes())
-        self.max_longitude =  numpy.max(self.get_longitudes())
-        self.start_time = epoch_time_to_utc_datetime(numpy.min(self.get_epoch_times()))
-        self.end_time = epoch_time_to_utc_datetime(numpy.max(self.get_epoch_times()))
+        self._stats['min_magnitude'], self._stats['max_magnitude'] = minimums[0], maximums[0]
+        self._stats['min_latitude'], self._stats['max_latitude'] = minimums[1], maximums[1]
+        self._stats['min_longitude'], self._stats['max_longitude'] = minimums[2], maximums[2]
+        self._stats['start_time'] = epoch_time_to_utc_datetime(minimums[3])
+        self._stats['end_time'] = epoch_time_to_utc_datetime(maximums[3])
 
     def _get_catalog_as_ndarray(self):
         """
@@ -393,20 +508,22 @@ class CSEPCatalog(BaseCatalog):
             ValueError: If self._catalog cannot be passed to pandas.DataFrame constructor, this function
                         must be overridden in the child class.
         """
-        df = pandas.DataFrame(self._catalog)
+        import pandas
+
+        df = pandas.DataFrame(self.catalog)
         if 'catalog_id' not in df.keys():
-            df['catalog_id'] = [self.catalog_id for _ in range(len(self.catalog))]
+            df['catalog_id'] = self.catalog_id
 
         if 'datetime' not in df.keys():
-            df['datetime'] = self.get_datetimes()
+            df['datetime'] = pandas.to_datetime(epoch_time_to_datetime64(self.get_epoch_times()), utc=True)
 
         return df
 
     def get_longitudes(self):
-        return self.catalog['longitude']
+        return self._get_column('longitude')
 
     def get_latitudes(self):
-        return self.catalog['latitude']
+        return self._get_column('latitude')
 
     def get_magnitudes(self):
         """
@@ -415,25 +532,16 @@ class CSEPCatalog(BaseCatalog):
         Returns:
             (numpy.array): magnitudes from catalog
         """
-        return self.catalog['magnitude']
+        return self._get_column('magnitude')
 
-    def get_datetimes(self):
+    def get_epoch_times(self):
         """
-        returns datetime object from timestamp representation in catalog
-
-        :returns: list of timestamps from events in catalog.
+        Returns:
+            (numpy.array): epoch times in milliseconds computed from the time columns of the catalog
         """
-        datetimes = []
-        for event in self.catalog:
-            year = event['year']
-            month = event['month']
-            day = event['day']
-            hour = event['hour']
-            minute = event['minute']
-            second = event['second']
-            dt = datetime.datetime(year, month, day, hour=hour, minute=minute, second=second)
-            datetimes.append(dt)
-        return datetimes
+        return zmap_time_to_epoch_time(self._get_column('year'), self._get_column('month'),
+                                       self._get_column('day'), self._get_column('hour'),
+                                       self._get_column('minute'), self._get_column('second'))
 
     def _get_csep_format(self):
         return self
@@ -445,6 +553,7 @@ class UCERF3Catalog(BaseCatalog):
 
     :var header_dtype: numpy.dtype description of synthetic catalog header.
     :var event_dtype: numpy.dtype description of ucerf3 catalog format
+    :var index_dtype: numpy.dtype description of the offset index stored next to merged binary files
     """
     # binary format of UCERF3 catalog
     header_dtype = numpy.dtype([("file_version", ">i2"), ("catalog_size", ">i4")])
@@ -462,13 +571,16 @@ class UCERF3Catalog(BaseCatalog):
         ("fss_index", ">i4"),
         ("grid_node_index", ">i4")
     ])
+    # byte offset of the first event and number of events for each catalog in a merged binary file
+    index_dtype = numpy.dtype([("offset", "<i8"), ("catalog_size", "<i8")])
 
     def __init__(self, **kwargs):
         # initialize parent constructor
         super().__init__(**kwargs)
 
     @classmethod
-    def load_catalogs(cls, filename=None, **kwargs):
+    def load_catalogs(cls, filename=None, use_memmap=False, catalog_ids=None, magnitude_range=None,
+                      time_window=None, bounding_box=None, depth_range=None, filters=None, **kwargs):
         """
         Loads catalogs based on the merged binary file format of UCERF3. File format is described at
         https://scec.usc.edu/scecpedia/CSEP2_Storing_Stochastic_Event_Sets#Introduction.
@@ -476,11 +588,70 @@ class UCERF3Catalog(BaseCatalog):
         There is also the load_catalog method that will work on the individual binary output of the UCERF3-ETAS
         model.
 
+        If use_memmap is True, the merged file is memory-mapped and each catalog is a read-only view into the mapped
+        file. Pages are only read from disk when the events of a catalog are accessed, so the heap stays small
+        even for multi-GB event sets. Operations that modify the catalog, like filter(), produce in-memory copies.
+
+        If catalog_ids is provided, only those catalogs are loaded. The catalogs are located using the offset index
+        of the file (see :meth:`load_catalog_index`), so reading catalog 9,500 does not require reading the 9,500
+        catalogs before it.
+
+        The predicates magnitude_range, time_window, bounding_box and depth_range are applied to the events read from
+        the file before the catalogs are created, so only events that are kept are stored in the catalogs. Bounds
+        can be None to leave that side of the range open. Ranges include both bounds, except for the end of
+        time_window. Arbitrary filter statements (see :meth:`BaseCatalog.filter`) can be applied the same way using
+        filters; the statement is compiled once and evaluated on every catalog.
+
         :param filename: filename of binary stochastic event set
         :type filename: string
+        :param use_memmap: return views into a memory-mapped file instead of copying each catalog into memory
+        :type use_memmap: bool
+        :param catalog_ids: catalogs to load, either an iterable of catalog ids or a slice
+        :type catalog_ids: iterable or slice
+        :param magnitude_range: (min_magnitude, max_magnitude)
+        :type magnitude_range: tuple
+        :param time_window: (start_epoch, end_epoch) epoch times in milliseconds
+        :type time_window: tuple
+        :param bounding_box: (min_longitude, max_longitude, min_latitude, max_latitude)
+        :type bounding_box: tuple
+        :param depth_range: (min_depth, max_depth) in km
+        :type depth_range: tuple
+        :param filters: filter statement, e.g., 'magnitude > 3.95 and depth < 20'
+        :type filters: str or :class:`~csep.core.filters.FilterExpression`
         :returns: list of catalogs of type UCERF3Catalog
         """
-        catalogs = []
+        expression = compile_filter(filters) if filters is not None else None
+
+        if catalog_ids is not None:
+            chunks = cls._read_catalogs_by_id(filename, catalog_ids, use_memmap=use_memmap)
+        elif use_memmap:
+            chunks = cls._read_catalogs_memmap(filename)
+        else:
+            chunks = cls._read_catalogs(filename)
+
+        for catalog_id, catalog in chunks:
+            # apply predicates to raw events, so that filtered events never reach a catalog object
+            mask = cls._get_event_mask(catalog, magnitude_range=magnitude_range, time_window=time_window,
+                                       bounding_box=bounding_box, depth_range=depth_range)
+            if expression is not None:
+                if mask is None:
+                    mask = expression.mask(catalog)
+                else:
+                    mask &= expression.mask(catalog)
+            if mask is not None:
+                catalog = catalog[mask]
+
+            # generator function
+            yield cls(filename=filename, catalog=catalog, catalog_id=catalog_id, **kwargs)
+
+    @classmethod
+    def _read_catalogs(cls, filename):
+        """
+        Generator function that reads catalogs sequentially from the merged binary file.
+
+        Returns:
+            (tuple): catalog_id and numpy.ndarray of events for each catalog in the file
+        """
         with open(filename, 'rb') as catalog_file:
             # parse 4byte header from merged file
             number_simulations_in_set = numpy.fromfile(catalog_file, dtype='>i4', count=1)[0]
@@ -494,11 +665,210 @@ class UCERF3Catalog(BaseCatalog):
                 # read catalog
                 catalog = numpy.fromfile(catalog_file, dtype=cls.event_dtype, count=catalog_size)
 
-                # add column that stores catalog_id in case we want to store in database
-                u3_catalog = cls(filename=filename, catalog=catalog, catalog_id=catalog_id, **kwargs)
+                yield catalog_id, catalog
+
+    @classmethod
+    def _read_catalogs_memmap(cls, filename):
+        """
+        Generator function that returns catalogs as zero-copy views into the memory-mapped merged binary file.
+
+        Note:
+            The offsets are computed by walking the headers, so only the pages containing headers are touched while
+            iterating. The events of a catalog are faulted in once they are accessed.
+        """
+        mapped = numpy.memmap(filename, dtype=numpy.uint8, mode='r')
+        header_size = cls.header_dtype.itemsize
+        event_size = cls.event_dtype.itemsize
+
+        # parse 4byte header from merged file
+        number_simulations_in_set = int(mapped[:4].view('>i4')[0])
+        offset = 4
+        for catalog_id in range(number_simulations_in_set):
+            header = mapped[offset:offset+header_size].view(cls.header_dtype)
+            catalog_size = int(header['catalog_size'][0])
+            offset += header_size
+
+            # view into mapped file, no data are copied here
+            nbytes = catalog_size * event_size
+            catalog = mapped[offset:offset+nbytes].view(cls.event_dtype)
+            offset += nbytes
+
+            yield catalog_id, catalog
+
+    @classmethod
+    def _read_catalogs_by_id(cls, filename, catalog_ids, use_memmap=False):
+        """
+        Generator function that jumps directly to the requested catalogs using the offset index of the file.
+        """
+        index = cls.load_catalog_index(filename)
+        catalog_ids = cls._get_catalog_ids(index, catalog_ids)
+
+        if use_memmap:
+            mapped = numpy.memmap(filename, dtype=numpy.uint8, mode='r')
+            for catalog_id in catalog_ids:
+                offset = int(index['offset'][catalog_id])
+                nbytes = int(index['catalog_size'][catalog_id]) * cls.event_dtype.itemsize
+                yield catalog_id, mapped[offset:offset+nbytes].view(cls.event_dtype)
+        else:
+            with open(filename, 'rb') as catalog_file:
+                for catalog_id in catalog_ids:
+                    catalog_file.seek(int(index['offset'][catalog_id]))
+                    catalog = numpy.fromfile(catalog_file, dtype=cls.event_dtype,
+                                             count=int(index['catalog_size'][catalog_id]))
+                    yield catalog_id, catalog
+
+    @staticmethod
+    def _get_catalog_ids(index, catalog_ids):
+        """
+        Converts a slice or an iterable of catalog ids into an array of ids and checks that they are in the file.
+
+        Raises:
+            ValueError: if a catalog id is negative or not smaller than the number of catalogs in the file
+        """
+        if isinstance(catalog_ids, slice):
+            catalog_ids = range(*catalog_ids.indices(len(index)))
+        catalog_ids = numpy.asarray(list(catalog_ids), dtype=numpy.int64)
+        invalid = (catalog_ids < 0) | (catalog_ids >= len(index))
+        if numpy.any(invalid):
+            raise ValueError('Error: catalog_ids {} are not in the range [0, {}).'
+                             .format(catalog_ids[invalid].tolist(), len(index)))
+        return catalog_ids
+
+    @classmethod
+    def _get_event_mask(cls, events, magnitude_range=None, time_window=None, bounding_box=None, depth_range=None):
+        """
+        Computes boolean mask of events that satisfy all predicates. The mask is updated in-place, so only one
+        boolean array is allocated regardless of the number of predicates.
+
+        Returns:
+            (numpy.array): boolean mask or None if no predicates are given
+        """
+        bounds = []
+        if magnitude_range is not None:
+            bounds.append(('magnitude', magnitude_range[0], numpy.greater_equal))
+            bounds.append(('magnitude', magnitude_range[1], numpy.less_equal))
+        if time_window is not None:
+            bounds.append(('origin_time', time_window[0], numpy.greater_equal))
+            bounds.append(('origin_time', time_window[1], numpy.less))
+        if bounding_box is not None:
+            bounds.append(('longitude', bounding_box[0], numpy.greater_equal))
+            bounds.append(('longitude', bounding_box[1], numpy.less_equal))
+            bounds.append(('latitude', bounding_box[2], numpy.greater_equal))
+            bounds.append(('latitude', bounding_box[3], numpy.less_equal))
+        if depth_range is not None:
+            bounds.append(('depth', depth_range[0], numpy.greater_equal))
+            bounds.append(('depth', depth_range[1], numpy.less_equal))
+
+        # open bounds are ignored
+        bounds = [(name, value, op) for name, value, op in bounds if value is not None]
+        if not bounds:
+            return None
+
+        mask = numpy.ones(len(events), dtype=bool)
+        scratch = numpy.empty(len(events), dtype=bool)
+        for name, value, op in bounds:
+            op(events[name], value, out=scratch)
+            mask &= scratch
+        return mask
+
+    @classmethod
+    def load_catalog_index(cls, filename, index_filename=None, rebuild=False):
+        """
+        Returns the offset index of a merged binary file. The index stores the byte offset of the first event and the
+        catalog_size of each catalog, and is indexed by catalog_id.
+
+        The index is persisted next to the binary file and reused as long as the size and modification time of the
+        binary file match the values stored in the index. Otherwise, the index is rebuilt by seeking over the catalog
+        headers, which does not read any events. Indexes that cannot be read are rebuilt, and new indexes are moved
+        into place atomically, so processes sharing a file never read a partially written index.
+
+        Args:
+            filename (str): filename of merged binary file
+            index_filename (str): filename of the sidecar index, defaults to filename + '.index.npz'
+            rebuild (bool): force rebuilding the index
+
+        Returns:
+            (numpy.ndarray): structured array with dtype index_dtype, one entry per catalog
+        """
+        index_filename = index_filename or filename + '.index.npz'
+        stat = os.stat(filename)
+
+        if not rebuild and os.path.isfile(index_filename):
+            try:
+                with numpy.load(index_filename) as stored:
+                    if stored['file_size'] == stat.st_size and stored['mtime_ns'] == stat.st_mtime_ns:
+                        return stored['index']
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+                # truncated or corrupt indexes are replaced below
+                print('Warning: could not read catalog index from {}. Rebuilding index.'.format(index_filename))
+
+        index = cls._build_catalog_index(filename)
+        tmp_filename = None
+        try:
+            # write to temporary file first, so concurrent readers never see partial files
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(index_filename)), suffix='.tmp',
+                                             delete=False) as index_file:
+                tmp_filename = index_file.name
+                numpy.savez(index_file, index=index, file_size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            os.replace(tmp_filename, index_filename)
+        except OSError:
+            # the index is cheap to rebuild, so read-only locations should not prevent loading
+            print('Warning: could not write catalog index to {}.'.format(index_filename))
+            if tmp_filename is not None and os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+        return index
+
+    @classmethod
+    def _build_catalog_index(cls, filename):
+        """
+        Computes offset index by reading the catalog headers and seeking over the events.
+        """
+        header_size = cls.header_dtype.itemsize
+        event_size = cls.event_dtype.itemsize
+        with open(filename, 'rb') as catalog_file:
+            number_simulations_in_set = int(numpy.fromfile(catalog_file, dtype='>i4', count=1)[0])
+            index = numpy.zeros(number_simulations_in_set, dtype=cls.index_dtype)
+            offset = 4
+            for catalog_id in range(number_simulations_in_set):
+                catalog_file.seek(offset)
+                header = numpy.fromfile(catalog_file, dtype=cls.header_dtype, count=1)
+                catalog_size = int(header['catalog_size'][0])
+                offset += header_size
+                index[catalog_id] = (offset, catalog_size)
+                offset += catalog_size * event_size
+        return index
+
+    @classmethod
+    def load_event_set(cls, filename, catalog_ids=None, **kwargs):
+        """
+        Loads catalogs from a merged binary file into a :class:`~csep.core.catalogs.StochasticEventSet`. Events are
+        copied from the memory-mapped file directly into one contiguous array, so every event is copied exactly once.
+
+        Args:
+            filename (str): filename of merged binary file
+            catalog_ids (iterable or slice): catalogs to load, defaults to all catalogs in the file
+            **kwargs: passed to the :class:`~csep.core.catalogs.StochasticEventSet` constructor
+
+        Returns:
+            (:class:`~csep.core.catalogs.StochasticEventSet`)
+        """
+        index = cls.load_catalog_index(filename)
+        if catalog_ids is None:
+            catalog_ids = slice(None)
+        catalog_ids = cls._get_catalog_ids(index, catalog_ids)
+
+        offsets = numpy.zeros(len(catalog_ids)+1, dtype=numpy.int64)
+        numpy.cumsum(index['catalog_size'][catalog_ids], out=offsets[1:])
+        events = numpy.empty(offsets[-1], dtype=cls.event_dtype)
+
+        mapped = numpy.memmap(filename, dtype=numpy.uint8, mode='r')
+        for i, catalog_id in enumerate(catalog_ids):
+            offset = int(index['offset'][catalog_id])
+            nbytes = int(index['catalog_size'][catalog_id]) * cls.event_dtype.itemsize
+            events[offsets[i]:offsets[i+1]] = mapped[offset:offset+nbytes].view(cls.event_dtype)
 
-                # generator function
-                yield(u3_catalog)
+        return StochasticEventSet(events=events, offsets=offsets, catalog_ids=catalog_ids, catalog_type=cls,
+                                  filename=filename, **kwargs)
 
     def get_dataframe(self):
         """
@@ -515,36 +885,21 @@ class UCERF3Catalog(BaseCatalog):
             ValueError: If self._catalog cannot be passed to pandas.DataFrame constructor, this function
                         must be overridden in the child class.
         """
+        import pandas
+
         df = pandas.DataFrame(self.catalog)
         # this is used for aggregrating counts
         df['counts'] = 1
         if 'catalog_id' not in df.keys():
             df['catalog_id'] = self.catalog_id
         if 'datetime' not in df.keys():
-            df['datetime'] = df['origin_time'].map(epoch_time_to_utc_datetime)
+            df['datetime'] = pandas.to_datetime(epoch_time_to_datetime64(self.get_epoch_times()), utc=True)
         # set index as datetime
         df.index = df['datetime']
         return df
 
-    def get_datetimes(self):
-        """
-        Gets python datetime objects from time representation in catalog.
-
-        Note:
-            All times should be considered UTC time. If you are extending or working with this class make sure to
-            ensure that datetime objects are not converted back to the local platform time.
-
-        Returns:
-            list: list of python datetime objects in the UTC timezone. one for each event in the catalog
-        """
-        datetimes = []
-        for event in self.catalog:
-            dt = epoch_time_to_utc_datetime(event['origin_time'])
-            datetimes.append(dt)
-        return datetimes
-
     def get_epoch_times(self):
-        return self.catalog['origin_time']
+        return self._get_column('origin_time')
 
     def get_magnitudes(self):
         """
@@ -553,48 +908,31 @@ class UCERF3Catalog(BaseCatalog):
         Returns:
             numpy.array: magnitudes of observed events in the catalog
         """
-        return self.catalog['magnitude']
+        return self._get_column('magnitude')
 
     def get_longitudes(self):
-        return self.catalog['longitude']
+        return self._get_column('longitude')
 
     def get_latitudes(self):
-        return self.catalog['latitude']
+        return self._get_column('latitude')
 
     def _get_csep_format(self):
-        # TODO: possibly modify this routine to happen faster. the byteswapping is expensive.
-        n = len(self.catalog)
-        # allocate array for csep catalog
-        csep_catalog = numpy.zeros(n, dtype=CSEPCatalog.csep_dtype)
-
-        for i, event in enumerate(self.catalog):
-            dt = epoch_time_to_utc_datetime(event['origin_time'])
-            year = dt.year
-            month = dt.month
-            day = dt.day
-            hour = dt.hour
-            minute = dt.minute
-            second = dt.second
-            csep_catalog[i] = (event['longitude'].byteswap(),
-                               event['latitude'].byteswap(),
-                               year,
-                               month,
-                               day,
-                               event['magnitude'].byteswap(),
-                               event['depth'].byteswap(),
-                               hour,
-                               minute,
-                               second)
-
-        return CSEPCatalog(catalog=csep_catalog, catalog_id=self.catalog_id, filename=self.filename)
+        return self._convert_to_csep_format()
 
 
 class ComcatCatalog(BaseCatalog):
     """
     Class handling retrieval of Comcat Catalogs.
+
+    Events are retrieved by the fetcher, which defaults to querying ComCat using libcomcat. If a
+    :class:`~csep.core.comcat.ComcatCache` is provided, results are stored on disk and repeated queries only fetch
+    the parts of the time window that have not been retrieved before.
+
+    The time window is split into tiles that are retrieved concurrently by max_workers threads. Tiles that reach the
+    limit of events returned by one search are split again, so long time windows are not truncated.
     """
     comcat_dtype = numpy.dtype([('id', 'S256'),
-                                ('origin_time', '<f4'),
+                                ('origin_time', '<i8'),
                                 ('latitude', '<f4'),
                                 ('longitude','<f4'),
                                 ('depth', '<f4'),
@@ -602,12 +940,17 @@ class ComcatCatalog(BaseCatalog):
 
     def __init__(self, catalog_id='Comcat', format='Comcat',
                  start_epoch=None, duration_in_years=None,
-                 limit=20000, date_accessed=None, extra_comcat_params={}, **kwargs):
+                 limit=20000, date_accessed=None, extra_comcat_params={}, fetcher=None, cache=None,
+                 max_workers=8, **kwargs):
 
         # parent class constructor
         super().__init__(**kwargs)
 
         self.date_accessed = date_accessed
+        self.fetcher = fetcher or search_libcomcat
+        self.cache = cache
+        self.limit = limit
+        self.max_workers = max_workers
 
         if self.start_time is None and start_epoch is None:
                 raise ValueError('Error: start_time or start_epoch must not be None.')
@@ -642,23 +985,28 @@ class ComcatCatalog(BaseCatalog):
 
         This requires an internet connection and will fail if the script has no access to the server.
 
+        If a cache is bound to the catalog, only the parts of the time window that are not stored in the cache are
+        retrieved from ComCat.
+
         Args:
             extra_comcat_params (dict): pass additional parameters to libcomcat
         """
-        from libcomcat.search import search
+        query = {'min_magnitude': self.min_magnitude,
+                 'min_latitude': self.min_latitude, 'max_latitude': self.max_latitude,
+                 'min_longitude': self.min_longitude, 'max_longitude': self.max_longitude}
 
-        # get eventlist from Comcat
-        eventlist = search(minmagnitude=self.min_magnitude,
-            minlatitude=self.min_latitude, maxlatitude=self.max_latitude,
-            minlongitude=self.min_longitude, maxlongitude=self.max_longitude,
-            starttime=self.start_time, endtime=self.end_time, **extra_comcat_params)
+        def fetch(start_time, end_time):
+            return search_tiled(self.fetcher, start_time, end_time, self.comcat_dtype, limit=self.limit,
+                                max_workers=self.max_workers, **query, **extra_comcat_params)
 
-        # eventlist is converted to ndarray in _get_catalog_as_ndarray called from setter
-        self.catalog = eventlist
+        if self.cache is None:
+            self.catalog = fetch(self.start_time, self.end_time)
+        else:
+            self.catalog = self.cache.load(fetch, self.start_time, self.end_time,
+                                           dict(query, **extra_comcat_params))
 
-        # update state because we just loaded a new catalog
+        # update state because we just loaded a new catalog, statistics are invalidated by the setter
         self.date_accessed = datetime.datetime.utcnow()
-        self._update_catalog_stats()
 
         return self
 
@@ -669,7 +1017,7 @@ class ComcatCatalog(BaseCatalog):
         Returns:
             numpy.array: of magnitudes
         """
-        return self.catalog['magnitude']
+        return self._get_column('magnitude')
 
     def get_dataframe(self):
         """
@@ -687,36 +1035,26 @@ class ComcatCatalog(BaseCatalog):
             ValueError: If self._catalog cannot be passed to pandas.DataFrame constructor, this function
                         must be overridden in the child class.
         """
+        import pandas
+
         df = pandas.DataFrame(self.catalog)
         df['counts'] = 1
         if 'catalog_id' not in df.keys():
-            df['catalog_id'] = [self.catalog_id for _ in range(len(self.catalog))]
+            df['catalog_id'] = self.catalog_id
         if 'datetime' not in df.keys():
-            df['datetime'] = df['origin_time'].map(epoch_time_to_utc_datetime)
+            df['datetime'] = pandas.to_datetime(epoch_time_to_datetime64(self.get_epoch_times()), utc=True)
         # set index as datetime
         df.index = df['datetime']
         return df
 
-    def get_datetimes(self):
-        """
-        Returns datetime objects from catalog.
-
-        Returns:
-            (list): datetime.datetime objects
-        """
-        datetimes = []
-        for event in self.catalog:
-            datetimes.append(epoch_time_to_utc_datetime(event['origin_time']))
-        return datetimes
-
     def get_longitudes(self):
-        return self.catalog['longitude']
+        return self._get_column('longitude')
 
     def get_latitudes(self):
-        return self.catalog['latitude']
+        return self._get_column('latitude')
 
     def get_epoch_times(self):
-        return self.catalog['origin_time']
+        return self._get_column('origin_time')
 
     def _get_catalog_as_ndarray(self):
         """
@@ -726,39 +1064,270 @@ class ComcatCatalog(BaseCatalog):
             Be careful calling this function. Failure state exists if self.catalog is not bound
             to instance explicity.
         """
-        events = []
-        catalog_length = len(self.catalog)
-        catalog = numpy.zeros(catalog_length, dtype=self.comcat_dtype)
-
         # pre-cleaned catalog is bound to self._catalog by the setter before calling this function.
         # will cause failure state if this function is called manually without binding self._catalog
-        for i, event in enumerate(self.catalog):
-            catalog[i] = (event.id, datetime_to_utc_epoch(event.time),
-                            event.latitude, event.longitude, event.depth, event.magnitude)
-
-        return catalog
+        return eventlist_to_ndarray(self.catalog, self.comcat_dtype)
 
     def _get_csep_format(self):
-        n = len(self.catalog)
-        csep_catalog = numpy.zeros(n, dtype=CSEPCatalog.csep_dtype)
+        return self._convert_to_csep_format()
 
-        for i, event in enumerate(self.catalog):
-            dt = epoch_time_to_utc_datetime(event['origin_time'])
-            year = dt.year
-            month = dt.month
-            day = dt.day
-            hour = dt.hour
-            minute = dt.minute
-            second = dt.second
-            csep_catalog[i] = (event['longitude'],
-                               event['latitude'],
-                               year,
-                               month,
-                               day,
-                               event['magnitude'],
-                               event['depth'],
-                               hour,
-                               minute,
-                               second)
 
-        return CSEPCatalog(catalog=csep_catalog, catalog_id=self.catalog_id, filename=self.filename)
+class StochasticEventSet:
+    """
+    Stochastic event set stored in one contiguous array of events and an array of offsets, similar to the compressed
+    sparse row format. The events of the i-th catalog are events[offsets[i]:offsets[i+1]].
+
+    Per-catalog statistics are computed for all catalogs at once using reductions over the flat event array. Individual
+    catalogs are available as instances of catalog_type, which are views into the shared event array. This allows the
+    event set to be used anywhere a list of :class:`~csep.core.catalogs.BaseCatalog` objects is expected.
+
+    Example usage would be:
+    >>> event_set = StochasticEventSet.from_catalogs(load_stochastic_event_set(type='ucerf3', filename=filename))
+    >>> counts = event_set.get_number_of_events()
+    """
+    def __init__(self, events=None, offsets=None, catalog_ids=None, catalog_type=CSEPCatalog, name=None, filename=None):
+        self.events = events
+        self.offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        self.catalog_type = catalog_type
+        self.name = name
+        self.filename = filename
+
+        if len(self.events) != self.offsets[-1]:
+            raise ValueError('Error: offsets must end with the number of events in the event set.')
+
+        if catalog_ids is None:
+            catalog_ids = numpy.arange(len(self.offsets)-1)
+        self.catalog_ids = numpy.asarray(catalog_ids)
+
+        # wraps all events in one catalog so the getters of catalog_type can be used on the flat array
+        self._flat_catalog = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        """
+        Returns the i-th catalog as an instance of catalog_type. The catalog is a view into the event set.
+        """
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('catalog index out of range.')
+        events = self.events[self.offsets[i]:self.offsets[i+1]]
+        return self.catalog_type(catalog=events, catalog_id=self.catalog_ids[i], name=self.name,
+                                 filename=self.filename)
+
+    @classmethod
+    def from_catalogs(cls, catalogs, name=None):
+        """
+        Creates stochastic event set from an iterable of catalogs, e.g., the generator returned by
+        :func:`csep.load_stochastic_event_set`. All catalogs must have the same type.
+
+        Args:
+            catalogs (iterable): :class:`~csep.core.catalogs.BaseCatalog` objects
+            name (str): name of the event set, defaults to the name of the first catalog
+
+        Returns:
+            (:class:`~csep.core.catalogs.StochasticEventSet`)
+        """
+        arrays = []
+        catalog_ids = []
+        catalog_type = None
+        filename = None
+        for catalog in catalogs:
+            if catalog_type is None:
+                catalog_type = type(catalog)
+                name = name or catalog.name
+                filename = catalog.filename
+            elif type(catalog) is not catalog_type:
+                raise ValueError('Error: all catalogs in a stochastic event set must have the same type.')
+            arrays.append(catalog.catalog)
+            catalog_ids.append(catalog.catalog_id)
+
+        if catalog_type is None:
+            raise ValueError('Error: stochastic event set must contain at least one catalog.')
+
+        offsets = numpy.zeros(len(arrays)+1, dtype=numpy.int64)
+        numpy.cumsum([len(array) for array in arrays], out=offsets[1:])
+        events = numpy.concatenate(arrays)
+        return cls(events=events, offsets=offsets, catalog_ids=catalog_ids, catalog_type=catalog_type,
+                   name=name, filename=filename)
+
+    def get_number_of_events(self):
+        """
+        Returns:
+            (numpy.array): number of events in each catalog
+        """
+        return numpy.diff(self.offsets)
+
+    def get_total_number_of_events(self):
+        return len(self.events)
+
+    def get_number_of_events_above(self, magnitudes):
+        """
+        Counts the events with magnitude greater than or equal to each threshold in every catalog.
+
+        Thresholds are compared in the precision of the magnitudes, as in :meth:`filter`, so events with magnitude
+        equal to a threshold are counted.
+
+        Args:
+            magnitudes (numpy.array): magnitude thresholds
+
+        Returns:
+            (numpy.ndarray): (catalogs, thresholds) number of events
+        """
+        event_magnitudes = self.get_magnitudes()
+        magnitudes = numpy.asarray(magnitudes).astype(event_magnitudes.dtype)
+        order = numpy.argsort(magnitudes)
+        num_thresholds = len(magnitudes)
+        # number of thresholds below each event, events are counted for every threshold they exceed
+        num_below = numpy.searchsorted(magnitudes[order], event_magnitudes, side='right')
+        catalog_idx = numpy.repeat(numpy.arange(len(self)), self.get_number_of_events())
+        hist = numpy.bincount(catalog_idx * (num_thresholds + 1) + num_below,
+                              minlength=len(self) * (num_thresholds + 1)).reshape(len(self), num_thresholds + 1)
+        counts = numpy.cumsum(hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        result = numpy.empty_like(counts)
+        result[:, order] = counts
+        return result
+
+    def get_time_bin_counts(self, bin_edges):
+        """
+        Counts the events of every catalog in time bins, see :meth:`BaseCatalog.get_time_bin_counts`.
+
+        Returns:
+            (numpy.ndarray): (catalogs, bins) number of events
+        """
+        catalog_idx = numpy.repeat(numpy.arange(len(self)), self.get_number_of_events())
+        return _get_time_bin_counts(self.get_epoch_times(), catalog_idx, len(self), bin_edges)
+
+    def get_number_of_events_in(self, time_windows):
+        """
+        Counts the events in each time window in every catalog.
+
+        Args:
+            time_windows (list): (start, end) epoch times in milliseconds, start is inclusive and end is exclusive
+
+        Returns:
+            (numpy.ndarray): (catalogs, windows) number of events
+        """
+        epoch_times = self.get_epoch_times()
+        counts = numpy.empty((len(self), len(time_windows)), dtype=numpy.int64)
+        for j, (start, end) in enumerate(time_windows):
+            mask = (epoch_times >= start) & (epoch_times < end)
+            counts[:, j] = self._reduceat(numpy.add, mask.astype(numpy.int64), empty_value=0)
+        return counts
+
+    def get_magnitudes(self):
+        """
+        Returns:
+            (numpy.array): magnitudes of all events in the event set
+        """
+        return self._get_flat_catalog().get_magnitudes()
+
+    def get_epoch_times(self):
+        """
+        Returns:
+            (numpy.array): epoch times in milliseconds of all events in the event set
+        """
+        return self._get_flat_catalog().get_epoch_times()
+
+    def get_latitudes(self):
+        return self._get_flat_catalog().get_latitudes()
+
+    def get_longitudes(self):
+        return self._get_flat_catalog().get_longitudes()
+
+    def get_spatial_idx(self, region):
+        """
+        Bins all events of the event set at once, see :meth:`BaseCatalog.get_spatial_idx`.
+
+        Returns:
+            (numpy.array): index of the cells, -1 for events outside the region
+        """
+        return self._get_flat_catalog().get_spatial_idx(region)
+
+    def get_max_magnitudes(self):
+        """
+        Returns:
+            (numpy.array): largest magnitude in each catalog, nan if the catalog is empty
+        """
+        return self._reduceat(numpy.maximum, self.get_magnitudes())
+
+    def get_min_magnitudes(self):
+        """
+        Returns:
+            (numpy.array): smallest magnitude in each catalog, nan if the catalog is empty
+        """
+        return self._reduceat(numpy.minimum, self.get_magnitudes())
+
+    def get_min_epoch_times(self):
+        """
+        Returns:
+            (numpy.array): epoch time of the first event in each catalog, nan if the catalog is empty
+        """
+        return self._reduceat(numpy.minimum, self.get_epoch_times())
+
+    def get_max_epoch_times(self):
+        """
+        Returns:
+            (numpy.array): epoch time of the last event in each catalog, nan if the catalog is empty
+        """
+        return self._reduceat(numpy.maximum, self.get_epoch_times())
+
+    def _reduceat(self, ufunc, values, empty_value=numpy.nan):
+        """
+        Applies ufunc.reduceat to each catalog of values. numpy.ufunc.reduceat returns values[offsets[i]] for empty
+        segments, so empty catalogs are set to empty_value instead.
+
+        Args:
+            ufunc (numpy.ufunc): binary ufunc, e.g., numpy.add or numpy.maximum
+            values (numpy.array): per-event values with the same length as the event set
+
+        Returns:
+            (numpy.array): reduced values, one per catalog
+        """
+        counts = self.get_number_of_events()
+        nonempty = counts > 0
+        result = numpy.full(len(counts), empty_value, dtype=numpy.result_type(values.dtype, empty_value))
+        if numpy.any(nonempty):
+            # segments of non-empty catalogs end where the next non-empty catalog starts
+            result[nonempty] = ufunc.reduceat(values, self.offsets[:-1][nonempty])
+        return result
+
+    def _get_flat_catalog(self):
+        if self._flat_catalog is None:
+            self._flat_catalog = self.catalog_type(catalog=self.events, name=self.name, filename=self.filename)
+        return self._flat_catalog
+
+    def filter(self, statement):
+        """
+        Filters all catalogs of the event set at once. The filter expression is evaluated in a single pass over the
+        flat event array and the offsets are recomputed from the number of events kept in each catalog.
+
+        Args:
+            statement (str or FilterExpression): logical statement to evaluate, see :meth:`BaseCatalog.filter`
+
+        Returns:
+            (:class:`~csep.core.catalogs.StochasticEventSet`): new event set containing the filtered events
+        """
+        mask = compile_filter(statement).mask(self.events)
+        offsets = numpy.zeros_like(self.offsets)
+        numpy.cumsum(self._reduceat(numpy.add, mask.astype(numpy.int64), empty_value=0), out=offsets[1:])
+        return StochasticEventSet(events=self.events[mask], offsets=offsets, catalog_ids=self.catalog_ids,
+                                  catalog_type=self.catalog_type, name=self.name, filename=self.filename)
+
+    def _get_csep_format(self):
+        """
+        Converts all events at once into the CSEP format.
+
+        Returns:
+            (:class:`~csep.core.catalogs.StochasticEventSet`): event set with catalogs of type CSEPCatalog
+        """
+        csep_events = self._get_flat_catalog()._get_csep_format().catalog
+        return StochasticEventSet(events=csep_events, offsets=self.offsets, catalog_ids=self.catalog_ids,
+                                  catalog_type=CSEPCatalog, name=self.name, filename=self.filename)
@@ -0,0 +1,281 @@
+import os
+import json
+import time
+import datetime
+import hashlib
+import tempfile
+import zipfile
+import concurrent.futures
+
+import numpy
+
+from csep.utils.time import datetime_to_utc_epoch, epoch_time_to_utc_datetime
+
+"""
+This module contains the functions used to retrieve events from ComCat.
+
+Events are retrieved by fetchers. A fetcher is a callable with the signature
+
+    fetcher(start_time=None, end_time=None, min_magnitude=None, min_latitude=None, max_latitude=None,
+            min_longitude=None, max_longitude=None, **extra_comcat_params)
+
+that returns a list of events with the attributes id, time, latitude, longitude, depth and magnitude, like the
+SummaryEvent objects returned by libcomcat. The default fetcher queries ComCat using libcomcat; tests can provide a
+local stand-in.
+
+ComCat limits the number of events returned by a single search. search_tiled splits time windows that reach the limit
+into tiles that are fetched concurrently, and splits tiles again if they reach the limit, so large queries are not
+truncated.
+"""
+
+
+def search_libcomcat(start_time=None, end_time=None, min_magnitude=None, min_latitude=None, max_latitude=None,
+                     min_longitude=None, max_longitude=None, limit=20000, **extra_comcat_params):
+    """
+    Default fetcher that queries ComCat using the libcomcat api (https://github.com/usgs/libcomcat). This requires
+    an internet connection.
+
+    Returns:
+        (list): libcomcat SummaryEvent objects
+    """
+    from libcomcat.search import search
+
+    return search(minmagnitude=min_magnitude,
+                  minlatitude=min_latitude, maxlatitude=max_latitude,
+                  minlongitude=min_longitude, maxlongitude=max_longitude,
+                  starttime=start_time, endtime=end_time, limit=limit, **extra_comcat_params)
+
+
+def search_tiled(fetcher, start_time, end_time, dtype, limit=20000, num_tiles=None, max_workers=8,
+                 min_tile_duration=datetime.timedelta(minutes=1), **query):
+    """
+    Retrieves events in [start_time, end_time] by splitting the time window into tiles that are fetched concurrently.
+
+    By default, the time window is fetched with a single request. Tiles that return limit or more events might be
+    truncated by ComCat. These tiles are split in half and fetched again, until tiles are shorter than
+    min_tile_duration. Events on the boundary of two tiles are only kept once.
+
+    Args:
+        fetcher (callable): fetcher, see module documentation
+        start_time (datetime.datetime): start of the time window
+        end_time (datetime.datetime): end of the time window
+        dtype (numpy.dtype): dtype of the structured array, see ComcatCatalog.comcat_dtype
+        limit (int): maximum number of events returned by one call of the fetcher
+        num_tiles (int): number of tiles the time window is initially split into, defaults to 1
+        max_workers (int): number of concurrent requests
+        min_tile_duration (datetime.timedelta): tiles shorter than this are not split again
+        **query: other query bounds passed to the fetcher, e.g., min_magnitude
+
+    Returns:
+        (numpy.ndarray): structured array of events sorted by origin_time
+    """
+    num_tiles = num_tiles or 1
+    tile_duration = (end_time - start_time) / num_tiles
+    tiles = [(start_time + i * tile_duration, start_time + (i + 1) * tile_duration) for i in range(num_tiles)]
+    # avoid rounding errors of the last boundary
+    tiles[-1] = (tiles[-1][0], end_time)
+
+    def fetch(tile):
+        eventlist = fetcher(start_time=tile[0], end_time=tile[1], limit=limit, **query)
+        return tile, eventlist_to_ndarray(eventlist, dtype)
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(fetch, tile) for tile in tiles}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                (tile_start, tile_end), events = future.result()
+                if len(events) >= limit and tile_end - tile_start > min_tile_duration:
+                    middle = tile_start + (tile_end - tile_start) / 2
+                    pending.add(executor.submit(fetch, (tile_start, middle)))
+                    pending.add(executor.submit(fetch, (middle, tile_end)))
+                else:
+                    if len(events) >= limit:
+                        print('Warning: {} events between {} and {} reached the limit of ComCat. Catalog might be '
+                              'incomplete.'.format(len(events), tile_start, tile_end))
+                    results.append(events)
+    return merge_events(results, dtype)
+
+
+def merge_events(arrays, dtype):
+    """
+    Merges arrays of events, removing duplicate events that were returned by overlapping queries.
+
+    Args:
+        arrays (list): structured arrays of events with id and origin_time
+        dtype (numpy.dtype): dtype of the structured array, used if arrays is empty
+
+    Returns:
+        (numpy.ndarray): structured array of unique events sorted by origin_time
+    """
+    if not arrays:
+        return numpy.zeros(0, dtype=dtype)
+    events = numpy.concatenate(arrays)
+    _, idx = numpy.unique(events['id'], return_index=True)
+    events = events[idx]
+    return events[numpy.argsort(events['origin_time'], kind='mergesort')]
+
+
+def eventlist_to_ndarray(eventlist, dtype):
+    """
+    Converts list of events returned by a fetcher into structured array. Columns are converted in bulk, instead of
+    assigning one tuple per event.
+
+    Args:
+        eventlist (list): events with attributes id, time, latitude, longitude, depth and magnitude
+        dtype (numpy.dtype): dtype of the structured array, see ComcatCatalog.comcat_dtype
+
+    Returns:
+        (numpy.ndarray): structured array with one row per event
+    """
+    catalog = numpy.zeros(len(eventlist), dtype=dtype)
+    if len(catalog) == 0:
+        return catalog
+    catalog['id'] = [event.id for event in eventlist]
+    # numpy.datetime64 only accepts naive datetimes, naive datetimes are in utc
+    times = [event.time if event.time.tzinfo is None
+             else event.time.astimezone(datetime.timezone.utc).replace(tzinfo=None) for event in eventlist]
+    catalog['origin_time'] = numpy.array(times, dtype='datetime64[ms]').astype(numpy.int64)
+    catalog['latitude'] = [event.latitude for event in eventlist]
+    catalog['longitude'] = [event.longitude for event in eventlist]
+    catalog['depth'] = [event.depth for event in eventlist]
+    catalog['magnitude'] = [event.magnitude for event in eventlist]
+    return catalog
+
+
+class ComcatCache:
+    """
+    Persistent cache of ComCat query results.
+
+    Results are stored in cache_dir, with one file for each combination of query bounds other than time. Each
+    file stores the events and the time window that has been fetched for those bounds. Requests that fall inside the
+    cached window are answered from disk. Requests that extend the cached window only fetch the missing time ranges,
+    which are merged into the cached events.
+
+    Example usage would be:
+    >>> cache = ComcatCache('~/.csep/comcat', ttl=7*86400, max_bytes=2**30)
+    >>> comcat = ComcatCatalog(start_epoch=epoch_time, duration_in_years=1.0, min_magnitude=2.55, cache=cache)
+
+    Args:
+        cache_dir (str): directory storing the cached results, created if it does not exist
+        ttl (float): time in seconds after which cached results are fetched again, None to never expire results
+        max_bytes (int): if the cache grows larger than max_bytes, the least recently used results are evicted
+    """
+    def __init__(self, cache_dir, ttl=None, max_bytes=None):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def load(self, fetch, start_time, end_time, query):
+        """
+        Returns the events in [start_time, end_time] for the query, fetching only the time ranges that are not cached.
+
+        Args:
+            fetch (callable): fetch(start_time, end_time) returns structured array of events with id and origin_time
+            start_time (datetime.datetime): start of the time window
+            end_time (datetime.datetime): end of the time window
+            query (dict): query bounds other than time, used as key of the cached results
+
+        Returns:
+            (numpy.ndarray): structured array of events sorted by origin_time
+        """
+        filename = self._get_filename(query)
+        start_epoch = int(round(datetime_to_utc_epoch(start_time)))
+        end_epoch = int(round(datetime_to_utc_epoch(end_time)))
+
+        entry = self._read(filename)
+        if entry is None:
+            events = fetch(start_time, end_time)
+            entry = {'events': events, 'start_epoch': start_epoch, 'end_epoch': end_epoch, 'fetched_at': time.time()}
+            self._write(filename, entry)
+        else:
+            # only fetch the parts of the window that are not cached
+            missing = []
+            if start_epoch < entry['start_epoch']:
+                missing.append((start_time, epoch_time_to_utc_datetime(entry['start_epoch'])))
+            if end_epoch > entry['end_epoch']:
+                missing.append((epoch_time_to_utc_datetime(entry['end_epoch']), end_time))
+            if missing:
+                events = [entry['events']] + [fetch(start, end) for start, end in missing]
+                entry['events'] = merge_events(events, entry['events'].dtype)
+                entry['start_epoch'] = min(start_epoch, entry['start_epoch'])
+                entry['end_epoch'] = max(end_epoch, entry['end_epoch'])
+                self._write(filename, entry)
+            else:
+                # mark entry as recently used for eviction
+                os.utime(filename)
+
+        events = entry['events']
+        origin_time = events['origin_time']
+        return events[(origin_time >= start_epoch) & (origin_time <= end_epoch)]
+
+    def clear(self):
+        """
+        Removes all cached results.
+        """
+        for filename in self._list_entries():
+            os.remove(filename)
+
+    def _get_filename(self, query):
+        key = json.dumps(query, sort_keys=True, default=str)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.npz')
+
+    def _list_entries(self):
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.npz')]
+
+    def _read(self, filename):
+        """
+        Returns cached entry or None if the entry does not exist, cannot be read or is older than the ttl. Entries that
+        cannot be read are removed, so they are fetched again.
+        """
+        if not os.path.isfile(filename):
+            return None
+        try:
+            with numpy.load(filename) as stored:
+                entry = {'events': stored['events'],
+                         'start_epoch': int(stored['start_epoch']),
+                         'end_epoch': int(stored['end_epoch']),
+                         'fetched_at': float(stored['fetched_at'])}
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            print('Warning: could not read cached results from {}. Fetching results again.'.format(filename))
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                # removed by another process in the meantime
+                pass
+            return None
+        if self.ttl is not None and time.time() - entry['fetched_at'] > self.ttl:
+            return None
+        return entry
+
+    def _write(self, filename, entry):
+        # write to a unique temporary file first, so concurrent readers never see partial files and concurrent
+        # writers of the same entry do not write into the same file
+        f = tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False)
+        try:
+            with f:
+                numpy.savez_compressed(f, **entry)
+            os.replace(f.name, filename)
+        except BaseException:
+            if os.path.exists(f.name):
+                os.remove(f.name)
+            raise
+        self._evict(keep=filename)
+
+    def _evict(self, keep=None):
+        """
+        Removes least recently used entries until the cache is smaller than max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+        entries = sorted(self._list_entries(), key=os.path.getmtime)
+        total = sum(os.path.getsize(filename) for filename in entries)
+        for filename in entries:
+            if total <= self.max_bytes:
+                break
+            if filename == keep:
+                continue
+            total -= os.path.getsize(filename)
+            os.remove(filename)
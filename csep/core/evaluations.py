@@ -1,8 +1,8 @@
-import matplotlib.pyplot as pyplot
+import numpy
 
-from csep.utils.plotting import plot_ecdf
-from csep.utils.stats import less_equal_ecdf, greater_equal_ecdf, ecdf
-from csep.utils.math import func_inverse
+from csep.core.catalogs import StochasticEventSet
+from csep.core.forecasts import get_space_magnitude_idx
+from csep.utils.stats import ecdf, ECDF
 
 
 # IDEA: Use decorators to provide common functionality to different types of evaluations. This would create an object that
@@ -19,26 +19,33 @@ def number_test(stochastic_event_set, observation, plot=False, show=False, plot_
         plot (bool): visualize: yes or no
 
     Note:
-        Catalogs must implement get_number_of_events() method for this function to work.
+        Catalogs must implement get_number_of_events() method for this function to work. For stochastic event sets
+        stored as :class:`~csep.core.catalogs.StochasticEventSet` the counts are computed without iterating over the
+        catalogs. To evaluate many conditions at once, use :func:`number_test_counts`.
 
     Returns:
         (p_value, ax): axes is None if plot=False
     """
     # get number of events for observations and simulations
-    sim_counts = []
-    for catalog in stochastic_event_set:
-        sim_counts.append(catalog.get_number_of_events())
+    if isinstance(stochastic_event_set, StochasticEventSet):
+        sim_counts = stochastic_event_set.get_number_of_events()
+        sim_name = stochastic_event_set.name
+    else:
+        sim_counts = []
+        sim_name = None
+        for catalog in stochastic_event_set:
+            sim_counts.append(catalog.get_number_of_events())
+            sim_name = catalog.name
     observation_count = observation.get_number_of_events()
 
-    # delta 1 prob of observation at least n_obs events given the forecast
-    delta_1 = greater_equal_ecdf(sim_counts, observation_count)
-
-    # delta 2 prob of observing at most n_obs events given the catalog
-    delta_2 = less_equal_ecdf(sim_counts, observation_count)
+    delta_1, delta_2 = number_test_counts(sim_counts, observation_count)
 
     # handle plotting
     ax = None
     if plot:
+        import matplotlib.pyplot as pyplot
+        from csep.utils.plotting import plot_ecdf
+
         # supply fixed arguments to plots
         # might want to add other defaults here
         show = plot_args.pop('show', 'False')
@@ -46,7 +53,7 @@ def number_test(stochastic_event_set, observation, plot=False, show=False, plot_
         fixed_plot_args = {'xlabel': 'Event Count',
                            'ylabel': 'Cumulative Probability',
                            'obs_label': observation.name,
-                           'sim_label': catalog.name}
+                           'sim_label': sim_name}
         plot_args.update(fixed_plot_args)
         ax = plot_ecdf(*ecdf(sim_counts), observation_count, catalog=observation, plot_args=plot_args, filename=filename)
 
@@ -59,3 +66,237 @@ def number_test(stochastic_event_set, observation, plot=False, show=False, plot_
             pyplot.show()
 
     return (delta_1, delta_2), ax
+
+
+def number_test_counts(sim_counts, observed_counts):
+    """
+    Perform N-Tests for many conditions at once from precomputed counts. A condition can be any selection of events
+    such as a magnitude threshold or a time window, see
+    :meth:`~csep.core.catalogs.StochasticEventSet.get_number_of_events_above` and
+    :meth:`~csep.core.catalogs.StochasticEventSet.get_number_of_events_in`.
+
+    Each column of sim_counts is sorted once and both quantiles are found with binary searches.
+
+    Example usage would be:
+    >>> thresholds = numpy.arange(3.0, 6.0, 0.1)
+    >>> sim_counts = event_set.get_number_of_events_above(thresholds)
+    >>> magnitudes = observation.get_magnitudes()
+    >>> observed_counts = numpy.sum(magnitudes[:, None] >= thresholds.astype(magnitudes.dtype), axis=0)
+    >>> delta_1, delta_2 = number_test_counts(sim_counts, observed_counts)
+
+    Args:
+        sim_counts (numpy.ndarray): (catalogs, conditions) number of events in each simulated catalog
+        observed_counts (numpy.array): (conditions,) observed number of events
+
+    Returns:
+        delta_1 (numpy.array): probability of observing at least the observed number of events for each condition
+        delta_2 (numpy.array): probability of observing at most the observed number of events for each condition
+
+        If sim_counts is one-dimensional, delta_1 and delta_2 are floats.
+    """
+    sim_counts = numpy.asarray(sim_counts)
+    observed_counts = numpy.asarray(observed_counts)
+    if len(sim_counts) == 0:
+        raise ValueError('Error: stochastic event set must contain at least one catalog.')
+    scalar = sim_counts.ndim == 1
+    sim_counts = sim_counts.reshape(len(sim_counts), -1)
+    observed_counts = numpy.broadcast_to(observed_counts, sim_counts.shape[1:])
+
+    num_catalogs, num_conditions = sim_counts.shape
+
+    sorted_counts = numpy.sort(sim_counts, axis=0)
+    delta_1 = numpy.empty(num_conditions)
+    delta_2 = numpy.empty(num_conditions)
+    for j in range(num_conditions):
+        dist = ECDF.from_sorted(sorted_counts[:, j])
+        # delta 1 prob of observation at least n_obs events given the forecast
+        delta_1[j] = dist.greater_equal(observed_counts[j])
+        # delta 2 prob of observing at most n_obs events given the forecast
+        delta_2[j] = dist.less_equal(observed_counts[j])
+    if scalar:
+        return delta_1[0], delta_2[0]
+    return delta_1, delta_2
+
+
+def magnitude_test(stochastic_event_set, observation, dmw=0.1):
+    """
+    Perform an M-Test on a stochastic event set and observation. Each catalog is compared to the observation with a
+    two-sample Kolmogorov-Smirnov test on discretized magnitudes, and the p-values are combined with Fisher's method.
+
+    All catalogs are binned once into a shared magnitude histogram matrix, so the KS statistics of all catalogs are
+    computed at the same time, see :func:`ks_test_histograms`.
+
+    Args:
+        stochastic_event_set (list of :class:`~csep.core.catalogs.BaseCatalog` or
+                              :class:`~csep.core.catalogs.StochasticEventSet`)
+        observation (:class:`~csep.core.catalogs.BaseCatalog`)
+        dmw (float): magnitude increment of the discretized empirical distribution functions
+
+    Returns:
+        d (numpy.array): KS statistic of each catalog, nan for empty catalogs
+        p_values (numpy.array): p-value of each catalog, nan for empty catalogs
+        combined_p_value (float): p-value of Fisher's combined test over the non-empty catalogs
+    """
+    obs_magnitudes = numpy.asarray(observation.get_magnitudes(), dtype=numpy.float64)
+    if len(obs_magnitudes) == 0:
+        raise ValueError('Error: observation must contain at least one event.')
+
+    # flatten simulated magnitudes with the index of their catalog
+    if isinstance(stochastic_event_set, StochasticEventSet):
+        sim_magnitudes = stochastic_event_set.get_magnitudes().astype(numpy.float64)
+        num_catalogs = len(stochastic_event_set)
+        catalog_idx = numpy.repeat(numpy.arange(num_catalogs), stochastic_event_set.get_number_of_events())
+    else:
+        magnitudes = [numpy.asarray(catalog.get_magnitudes(), dtype=numpy.float64) for catalog in stochastic_event_set]
+        num_catalogs = len(magnitudes)
+        catalog_idx = numpy.repeat(numpy.arange(num_catalogs), [len(m) for m in magnitudes])
+        sim_magnitudes = numpy.concatenate(magnitudes) if magnitudes else numpy.zeros(0)
+
+    # shared magnitude bins, each bin counts the magnitudes larger than the previous and at most its value. the
+    # tolerance keeps magnitudes stored as float32 in the bin of their nominal value.
+    global_min = min(obs_magnitudes.min(), sim_magnitudes.min(initial=numpy.inf))
+    global_max = max(obs_magnitudes.max(), sim_magnitudes.max(initial=-numpy.inf))
+    mws = numpy.arange(global_min, global_max + 2 * dmw, dmw) + 1e-6
+    num_bins = len(mws)
+
+    sim_bins = numpy.searchsorted(mws, sim_magnitudes, side='left')
+    sim_hist = numpy.bincount(catalog_idx * num_bins + sim_bins,
+                              minlength=num_catalogs * num_bins).reshape(num_catalogs, num_bins)
+    obs_hist = numpy.bincount(numpy.searchsorted(mws, obs_magnitudes, side='left'), minlength=num_bins)
+
+    d, p_values = ks_test_histograms(sim_hist, obs_hist)
+    return d, p_values, fisher_combined_p_value(p_values[~numpy.isnan(p_values)])
+
+
+def ks_test_histograms(sim_hist, obs_hist):
+    """
+    Computes two-sample Kolmogorov-Smirnov tests between every row of sim_hist and obs_hist. The empirical
+    distribution functions are evaluated at the upper edges of the shared bins.
+
+    Note:
+        The p-values use the asymptotic distribution of the KS statistic with the correction from Stephens (1974).
+
+    Args:
+        sim_hist (numpy.ndarray): (catalogs, bins) number of simulated events in each bin
+        obs_hist (numpy.array): (bins,) number of observed events in each bin
+
+    Returns:
+        d (numpy.array): KS statistic of each catalog, nan for empty catalogs
+        p_values (numpy.array): p-value of each catalog, nan for empty catalogs
+    """
+    import scipy.stats
+
+    sim_hist = numpy.atleast_2d(sim_hist)
+    obs_hist = numpy.asarray(obs_hist)
+    n1 = sim_hist.sum(axis=1).astype(numpy.float64)
+    n2 = float(obs_hist.sum())
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        sim_cdf = numpy.cumsum(sim_hist, axis=1) / n1[:, numpy.newaxis]
+        obs_cdf = numpy.cumsum(obs_hist) / n2
+        d = numpy.max(numpy.absolute(sim_cdf - obs_cdf), axis=1)
+        en = numpy.sqrt(n1 * n2 / (n1 + n2))
+        p_values = scipy.stats.kstwobign.sf((en + 0.12 + 0.11 / en) * d)
+    d[n1 == 0] = numpy.nan
+    p_values[n1 == 0] = numpy.nan
+    return d, p_values
+
+
+def fisher_combined_p_value(p_values):
+    """
+    Combines independent p-values using Fisher's method.
+
+    Args:
+        p_values (numpy.array): p-values of the individual tests
+
+    Returns:
+        (float): combined p-value, nan if p_values is empty
+    """
+    import scipy.stats
+
+    p_values = numpy.asarray(p_values, dtype=numpy.float64)
+    if len(p_values) == 0:
+        return numpy.nan
+    with numpy.errstate(divide='ignore'):
+        chi_f = -2 * numpy.sum(numpy.log(p_values))
+    return scipy.stats.chi2.sf(chi_f, 2 * len(p_values))
+
+
+def spatial_test(counts, observation):
+    """
+    Perform an S-Test on a region-binned stochastic event set and observation.
+
+    The spatial rates of the forecast are the mean counts in each cell, normalized to unit sum. The score of a catalog
+    is the mean log of the normalized rates in the cells of its events. The quantile is the fraction of simulated
+    scores that are less than or equal to the observed score.
+
+    Args:
+        counts (:class:`~csep.core.forecasts.SpaceMagnitudeCounts`): binned stochastic event set
+        observation (:class:`~csep.core.catalogs.BaseCatalog`): observed catalog, binned into the region of counts
+
+    Returns:
+        quantile (float): fraction of simulated scores less than or equal to the observed score
+        observed_score (float): score of the observation, -inf if events occurred in cells with zero rate
+        sim_scores (numpy.array): score of each catalog, nan for empty catalogs
+    """
+    rates = counts.get_spatial_rates()
+    with numpy.errstate(divide='ignore'):
+        log_rates = numpy.log(rates / rates.sum())
+
+    num_events = counts.get_number_of_events()
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        sim_scores = counts.get_spatial_scores(log_rates) / num_events
+    sim_scores[num_events == 0] = numpy.nan
+
+    observed_cells = _get_observed_cells(counts, observation)
+    if len(observed_cells) == 0:
+        raise ValueError('Error: observation must contain at least one event in the region.')
+    observed_score = numpy.mean(log_rates[observed_cells])
+
+    return _get_quantile(sim_scores, observed_score), observed_score, sim_scores
+
+
+def pseudo_likelihood_test(counts, observation):
+    """
+    Perform a pseudo-likelihood test on a region-binned stochastic event set and observation.
+
+    The pseudo-likelihood of a catalog is -N + sum of the log rates in the cells of its events, where the rates are the
+    mean counts in each cell and N is the expected number of events of the forecast. The quantile is the fraction of
+    simulated pseudo-likelihoods that are less than or equal to the observed pseudo-likelihood.
+
+    Args:
+        counts (:class:`~csep.core.forecasts.SpaceMagnitudeCounts`): binned stochastic event set
+        observation (:class:`~csep.core.catalogs.BaseCatalog`): observed catalog, binned into the region of counts
+
+    Returns:
+        quantile (float): fraction of simulated pseudo-likelihoods less than or equal to the observed one
+        observed_score (float): pseudo-likelihood of the observation, -inf if events occurred in cells with zero rate
+        sim_scores (numpy.array): pseudo-likelihood of each catalog
+    """
+    rates = counts.get_spatial_rates()
+    with numpy.errstate(divide='ignore'):
+        log_rates = numpy.log(rates)
+    expected_count = rates.sum()
+
+    sim_scores = counts.get_spatial_scores(log_rates) - expected_count
+    observed_score = numpy.sum(log_rates[_get_observed_cells(counts, observation)]) - expected_count
+
+    return _get_quantile(sim_scores, observed_score), observed_score, sim_scores
+
+
+def _get_observed_cells(counts, observation):
+    """
+    Returns the cells of the observed events that fall into the space-magnitude bins of counts.
+    """
+    idx = get_space_magnitude_idx(observation, counts.region)
+    return idx[idx >= 0] // counts.num_magnitude_bins
+
+
+def _get_quantile(sim_scores, observed_score):
+    """
+    Returns the fraction of simulated scores less than or equal to the observed score, ignoring nan scores.
+    """
+    sim_scores = sim_scores[~numpy.isnan(sim_scores)]
+    if len(sim_scores) == 0:
+        return numpy.nan
+    return numpy.count_nonzero(sim_scores <= observed_score) / len(sim_scores)
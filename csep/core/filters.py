@@ -0,0 +1,303 @@
+import re
+import functools
+
+import numpy
+
+from csep.utils.time import zmap_time_to_epoch_time
+
+"""
+This module contains the filter expressions used to select events from catalogs.
+
+Expressions are parsed and compiled once into a tree of vectorized comparisons that can be evaluated on any number of
+catalogs. The grammar supports the following statements, which can be combined with and, or, not and parentheses:
+
+    magnitude > 3.95
+    depth between 0 and 20
+    time >= '2019-07-04 17:33:49'
+    id in ('ci38443183', 'ci38457511')
+
+Names refer to the columns of the catalog. The name 'time' refers to the origin times of the events as epoch times in
+milliseconds, so time windows can be written the same way for every catalog format. Quoted values compared against
+time are parsed as UTC dates.
+"""
+
+_operators = {'>': numpy.greater,
+              '<': numpy.less,
+              '>=': numpy.greater_equal,
+              '<=': numpy.less_equal,
+              '==': numpy.equal,
+              '!=': numpy.not_equal}
+
+_token_pattern = re.compile(r"""\s*(?:
+    (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<string>'[^']*'|"[^"]*")
+    |(?P<op>>=|<=|==|!=|>|<)
+    |(?P<punct>[(),])
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+_keywords = ('and', 'or', 'not', 'in', 'between')
+
+
+def compile_filter(statement):
+    """
+    Compiles filter statement into a :class:`FilterExpression`. Compiled expressions are cached, so the same statement
+    is only parsed once.
+
+    Args:
+        statement (str or FilterExpression): logical statement to evaluate, e.g., 'magnitude > 4.0 and depth < 20'
+
+    Returns:
+        (:class:`FilterExpression`)
+    """
+    if isinstance(statement, FilterExpression):
+        return statement
+    return _compile_filter(statement)
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_filter(statement):
+    return FilterExpression(statement)
+
+
+def get_column(events, name):
+    """
+    Returns column used in filter expressions from a structured array of events.
+
+    Note:
+        'time' returns the epoch times in milliseconds. Catalogs either store the epoch time in the origin_time column
+        or store the time columns of the ZMAP format.
+    """
+    if name == 'time':
+        fields = events.dtype.names
+        if 'origin_time' in fields:
+            return events['origin_time']
+        if 'year' in fields:
+            return zmap_time_to_epoch_time(events['year'], events['month'], events['day'],
+                                           events['hour'], events['minute'], events['second'])
+        raise ValueError('Error: catalog does not contain time information.')
+    try:
+        return events[name]
+    except (ValueError, KeyError):
+        raise ValueError("Error: catalog does not contain column '{}'.".format(name))
+
+
+class FilterExpression:
+    """
+    Filter statement compiled into a vectorized mask evaluator.
+
+    Example usage would be:
+    >>> expression = FilterExpression('magnitude >= 3.95 and depth between 0 and 20')
+    >>> filtered = [catalog.filter(expression) for catalog in catalogs]
+    """
+    def __init__(self, statement):
+        self.statement = statement
+        self._tokens = self._tokenize(statement)
+        self._position = 0
+        self._root = self._parse_or()
+        if self._position != len(self._tokens):
+            raise ValueError("Error: unexpected '{}' in filter statement '{}'."
+                             .format(self._tokens[self._position][1], statement))
+        del self._tokens
+
+    def __str__(self):
+        return self.statement
+
+    def mask(self, events):
+        """
+        Evaluates the expression on a structured array of events.
+
+        Note:
+            Intermediate results are written into preallocated boolean buffers, one per level of nesting in the
+            expression, so evaluating a compound expression does not allocate one array per comparison.
+
+        Args:
+            events (numpy.ndarray): structured array of events
+
+        Returns:
+            (numpy.array): boolean mask, true for events that satisfy the expression
+        """
+        n = len(events)
+        columns = {}
+
+        def lookup(name):
+            # columns are only gathered once per evaluation, even if they appear multiple times
+            if name not in columns:
+                columns[name] = get_column(events, name)
+            return columns[name]
+
+        out = numpy.empty(n, dtype=bool)
+        scratch = [numpy.empty(n, dtype=bool) for _ in range(self._root.depth)]
+        self._root.evaluate(lookup, out, scratch)
+        return out
+
+    # parser, recursive descent over the grammar described in the module docstring
+    @staticmethod
+    def _tokenize(statement):
+        tokens = []
+        position = 0
+        statement = statement.strip()
+        while position < len(statement):
+            match = _token_pattern.match(statement, position)
+            if match is None or match.end() == position:
+                raise ValueError("Error: could not parse filter statement '{}'.".format(statement))
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == 'name' and value.lower() in _keywords:
+                kind, value = 'keyword', value.lower()
+            tokens.append((kind, value))
+            position = match.end()
+        return tokens
+
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return (None, None)
+
+    def _next(self, kind=None, value=None):
+        token = self._peek()
+        if token[0] is None or (kind is not None and token[0] != kind) or (value is not None and token[1] != value):
+            raise ValueError("Error: expected {} in filter statement '{}'.".format(value or kind, self.statement))
+        self._position += 1
+        return token
+
+    def _parse_or(self):
+        children = [self._parse_and()]
+        while self._peek() == ('keyword', 'or'):
+            self._next()
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else _Combine(children, numpy.logical_or)
+
+    def _parse_and(self):
+        children = [self._parse_not()]
+        while self._peek() == ('keyword', 'and'):
+            self._next()
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else _Combine(children, numpy.logical_and)
+
+    def _parse_not(self):
+        if self._peek() == ('keyword', 'not'):
+            self._next()
+            return _Not(self._parse_not())
+        return self._parse_predicate()
+
+    def _parse_predicate(self):
+        if self._peek() == ('punct', '('):
+            self._next()
+            node = self._parse_or()
+            self._next('punct', ')')
+            return node
+
+        _, name = self._next('name')
+        kind, value = self._peek()
+        if kind == 'op':
+            self._next()
+            return _Compare(name, _operators[value], self._parse_value())
+        if (kind, value) == ('keyword', 'between'):
+            self._next()
+            lower = self._parse_value()
+            self._next('keyword', 'and')
+            return _Between(name, lower, self._parse_value())
+        negate = False
+        if (kind, value) == ('keyword', 'not'):
+            self._next()
+            negate = True
+        if self._peek() == ('keyword', 'in'):
+            self._next()
+            self._next('punct', '(')
+            values = [self._parse_value()]
+            while self._peek() == ('punct', ','):
+                self._next()
+                values.append(self._parse_value())
+            self._next('punct', ')')
+            node = _In(name, values)
+            return _Not(node) if negate else node
+        raise ValueError("Error: expected comparison after '{}' in filter statement '{}'."
+                         .format(name, self.statement))
+
+    def _parse_value(self):
+        kind, value = self._peek()
+        if kind == 'number':
+            self._next()
+            return float(value)
+        if kind == 'string':
+            self._next()
+            return value[1:-1]
+        raise ValueError("Error: expected value in filter statement '{}'.".format(self.statement))
+
+
+def _coerce(name, column, value):
+    """
+    Converts literal into the type of the column it is compared against.
+    """
+    if not isinstance(value, str):
+        return value
+    if name == 'time':
+        return numpy.datetime64(value, 'ms').astype(numpy.int64)
+    if column.dtype.kind == 'S':
+        return value.encode()
+    return value
+
+
+class _Compare:
+    depth = 0
+
+    def __init__(self, name, op, value):
+        self.name = name
+        self.op = op
+        self.value = value
+
+    def evaluate(self, lookup, out, scratch):
+        column = lookup(self.name)
+        self.op(column, _coerce(self.name, column, self.value), out=out)
+
+
+class _Between:
+    depth = 1
+
+    def __init__(self, name, lower, upper):
+        self.name = name
+        self.lower = lower
+        self.upper = upper
+
+    def evaluate(self, lookup, out, scratch):
+        column = lookup(self.name)
+        numpy.greater_equal(column, _coerce(self.name, column, self.lower), out=out)
+        numpy.less_equal(column, _coerce(self.name, column, self.upper), out=scratch[0])
+        out &= scratch[0]
+
+
+class _In:
+    depth = 0
+
+    def __init__(self, name, values):
+        self.name = name
+        self.values = values
+
+    def evaluate(self, lookup, out, scratch):
+        column = lookup(self.name)
+        values = [_coerce(self.name, column, value) for value in self.values]
+        out[:] = numpy.isin(column, values)
+
+
+class _Not:
+    def __init__(self, child):
+        self.child = child
+        self.depth = child.depth
+
+    def evaluate(self, lookup, out, scratch):
+        self.child.evaluate(lookup, out, scratch)
+        numpy.logical_not(out, out=out)
+
+
+class _Combine:
+    def __init__(self, children, op):
+        self.children = children
+        self.op = op
+        self.depth = 1 + max(child.depth for child in children)
+
+    def evaluate(self, lookup, out, scratch):
+        self.children[0].evaluate(lookup, out, scratch[1:])
+        for child in self.children[1:]:
+            child.evaluate(lookup, scratch[0], scratch[1:])
+            self.op(out, scratch[0], out=out)
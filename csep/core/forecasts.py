@@ -0,0 +1,338 @@
+import numpy
+
+from csep.core.catalogs import StochasticEventSet
+
+"""
+This module contains the gridded representations of stochastic event sets used by the spatial and magnitude tests.
+
+Events are binned into the cells and magnitude bins of a :class:`~csep.core.regions.Region`. Space-magnitude bins are
+identified by a single integer, cell_idx * num_magnitude_bins + magnitude_idx.
+"""
+
+
+def get_space_magnitude_idx(catalog, region):
+    """
+    Returns the index of the space-magnitude bins of the events in catalog.
+
+    Args:
+        catalog (:class:`~csep.core.catalogs.BaseCatalog`): catalog or stochastic event set
+        region (:class:`~csep.core.regions.Region`): region with magnitude bins
+
+    Returns:
+        (numpy.array): index of the space-magnitude bins, -1 for events outside the region or below the first magnitude
+    """
+    cell_idx = catalog.get_spatial_idx(region)
+    magnitude_idx = region.get_magnitude_index(catalog.get_magnitudes())
+    idx = cell_idx * len(region.magnitudes) + magnitude_idx
+    idx[(cell_idx < 0) | (magnitude_idx < 0)] = -1
+    return idx
+
+
+class SpaceMagnitudeCounts:
+    """
+    Sparse (catalog x cell x magnitude bin) event counts of a stochastic event set.
+
+    Only non-zero counts are stored, in the compressed sparse row format. The bins and counts of the i-th catalog are
+    bins[offsets[i]:offsets[i+1]] and counts[offsets[i]:offsets[i+1]], with bins sorted within each catalog. Memory
+    usage is proportional to the number of occupied bins, not to the number of events.
+
+    Example usage would be:
+    >>> region = Region.from_csep_xml('csep-forecast-template-M5.xml')
+    >>> counts = SpaceMagnitudeCounts.from_catalogs(load_stochastic_event_set(type='ucerf3', filename=filename), region)
+    >>> rates = counts.get_spatial_rates()
+
+    Args:
+        bins (numpy.array): index of the space-magnitude bins with non-zero counts
+        counts (numpy.array): number of events in the bins
+        offsets (numpy.array): start of each catalog in bins and counts, ends with len(bins)
+        region (:class:`~csep.core.regions.Region`): region with magnitude bins
+        catalog_ids (numpy.array): ids of the catalogs, defaults to 0, 1, ..., n-1
+    """
+    def __init__(self, bins, counts, offsets, region, catalog_ids=None):
+        self.bins = numpy.asarray(bins, dtype=numpy.int32)
+        self.counts = numpy.asarray(counts, dtype=numpy.int32)
+        self.offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        self.region = region
+        if catalog_ids is None:
+            catalog_ids = numpy.arange(len(self.offsets) - 1)
+        self.catalog_ids = numpy.asarray(catalog_ids)
+
+        if len(self.bins) != len(self.counts) or self.offsets[-1] != len(self.bins):
+            raise ValueError('Error: bins, counts and offsets must describe the same number of entries.')
+
+    @property
+    def num_catalogs(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_magnitude_bins(self):
+        return len(self.region.magnitudes)
+
+    @property
+    def shape(self):
+        """
+        Returns:
+            (tuple): number of catalogs, cells and magnitude bins
+        """
+        return self.num_catalogs, self.region.num_nodes, self.num_magnitude_bins
+
+    @classmethod
+    def from_catalogs(cls, catalogs, region):
+        """
+        Builds the counts in one pass over the catalogs. Catalogs are binned one at a time and only the non-zero counts
+        are retained, so catalogs can be streamed from the loaders, e.g., :func:`csep.load_stochastic_event_set`.
+
+        Events outside the region or below the first magnitude bin are not counted.
+
+        Args:
+            catalogs (iterable): :class:`~csep.core.catalogs.BaseCatalog` objects or a
+                                 :class:`~csep.core.catalogs.StochasticEventSet`
+            region (:class:`~csep.core.regions.Region`): region with magnitude bins
+
+        Returns:
+            (:class:`SpaceMagnitudeCounts`)
+        """
+        if region.magnitudes is None:
+            raise ValueError('Error: region must define magnitude bins.')
+        if region.num_nodes * len(region.magnitudes) > numpy.iinfo(numpy.int32).max:
+            raise ValueError('Error: region contains too many space-magnitude bins.')
+
+        if isinstance(catalogs, StochasticEventSet):
+            return cls._from_event_set(catalogs, region)
+
+        bins = []
+        counts = []
+        sizes = []
+        catalog_ids = []
+        for catalog in catalogs:
+            idx = get_space_magnitude_idx(catalog, region)
+            catalog_bins, catalog_counts = numpy.unique(idx[idx >= 0], return_counts=True)
+            bins.append(catalog_bins.astype(numpy.int32))
+            counts.append(catalog_counts.astype(numpy.int32))
+            sizes.append(len(catalog_bins))
+            catalog_ids.append(catalog.catalog_id)
+
+        offsets = numpy.zeros(len(sizes) + 1, dtype=numpy.int64)
+        numpy.cumsum(sizes, out=offsets[1:])
+        return cls(numpy.concatenate(bins) if bins else [], numpy.concatenate(counts) if counts else [], offsets,
+                   region, catalog_ids=catalog_ids)
+
+    @classmethod
+    def _from_event_set(cls, event_set, region):
+        """
+        Bins all catalogs of a stochastic event set at once.
+        """
+        num_bins = region.num_nodes * len(region.magnitudes)
+        idx = get_space_magnitude_idx(event_set, region)
+        catalog_idx = numpy.repeat(numpy.arange(len(event_set)), event_set.get_number_of_events())
+        valid = idx >= 0
+        # keys are sorted by catalog and then by bin
+        keys, counts = numpy.unique(catalog_idx[valid] * num_bins + idx[valid], return_counts=True)
+        offsets = numpy.searchsorted(keys, numpy.arange(len(event_set) + 1) * num_bins)
+        return cls(keys % num_bins, counts, offsets, region, catalog_ids=event_set.catalog_ids)
+
+    def _get_catalog_index(self):
+        """
+        Returns the index of the catalog of each stored entry.
+        """
+        return numpy.repeat(numpy.arange(self.num_catalogs), numpy.diff(self.offsets))
+
+    def get_number_of_events(self):
+        """
+        Returns:
+            (numpy.array): number of events in each catalog
+        """
+        return numpy.bincount(self._get_catalog_index(), weights=self.counts,
+                              minlength=self.num_catalogs).astype(numpy.int64)
+
+    def get_spatial_counts(self):
+        """
+        Returns:
+            (numpy.ndarray): (catalogs, cells) dense matrix of counts in each cell
+        """
+        num_cells = self.region.num_nodes
+        flat = self._get_catalog_index() * num_cells + self.bins // self.num_magnitude_bins
+        return numpy.bincount(flat, weights=self.counts,
+                              minlength=self.num_catalogs * num_cells).astype(numpy.int64).reshape(-1, num_cells)
+
+    def get_magnitude_counts(self):
+        """
+        Returns:
+            (numpy.ndarray): (catalogs, magnitude bins) dense matrix of counts in each magnitude bin
+        """
+        num_mags = self.num_magnitude_bins
+        flat = self._get_catalog_index() * num_mags + self.bins % num_mags
+        return numpy.bincount(flat, weights=self.counts,
+                              minlength=self.num_catalogs * num_mags).astype(numpy.int64).reshape(-1, num_mags)
+
+    def get_spatial_scores(self, values):
+        """
+        Sums per-cell values over the events of each catalog, e.g., the log rates of the cells containing the events.
+        Only the stored non-zero counts are visited.
+
+        Args:
+            values (numpy.array): (cells,) value of each cell
+
+        Returns:
+            (numpy.array): sum of the values of the cells of all events in each catalog
+        """
+        values = numpy.asarray(values, dtype=numpy.float64)
+        contributions = self.counts * values[self.bins // self.num_magnitude_bins]
+        return numpy.bincount(self._get_catalog_index(), weights=contributions, minlength=self.num_catalogs)
+
+    def get_spatial_rates(self):
+        """
+        Returns:
+            (numpy.array): mean number of events in each cell over all catalogs
+        """
+        return self.get_rates().sum(axis=1)
+
+    def get_rates(self):
+        """
+        Returns:
+            (numpy.ndarray): (cells, magnitude bins) mean number of events in each bin over all catalogs
+        """
+        num_bins = self.region.num_nodes * self.num_magnitude_bins
+        totals = numpy.bincount(self.bins, weights=self.counts, minlength=num_bins)
+        return (totals / max(self.num_catalogs, 1)).reshape(self.region.num_nodes, self.num_magnitude_bins)
+
+    def get_catalog_counts(self, i):
+        """
+        Returns:
+            (numpy.ndarray): (cells, magnitude bins) dense counts of the i-th catalog
+        """
+        start, end = self.offsets[i], self.offsets[i + 1]
+        dense = numpy.zeros(self.region.num_nodes * self.num_magnitude_bins, dtype=numpy.int64)
+        dense[self.bins[start:end]] = self.counts[start:end]
+        return dense.reshape(self.region.num_nodes, self.num_magnitude_bins)
+
+
+class GriddedForecast:
+    """
+    Gridded forecast of the expected number of events in each cell and magnitude bin of a region.
+
+    Args:
+        data (numpy.ndarray): (cells, magnitude bins) expected number of events
+        region (:class:`~csep.core.regions.Region`): region with magnitude bins
+        name (str): name of the forecast
+    """
+    def __init__(self, data, region, name=None):
+        self.data = numpy.asarray(data, dtype=numpy.float64)
+        self.region = region
+        self.name = name
+
+        if self.data.shape != (region.num_nodes, len(region.magnitudes)):
+            raise ValueError('Error: shape of forecast must be (cells, magnitude bins) of the region.')
+
+    def sum(self):
+        """
+        Returns:
+            (float): expected number of events in the region
+        """
+        return self.data.sum()
+
+    def spatial_counts(self):
+        """
+        Returns:
+            (numpy.array): expected number of events in each cell
+        """
+        return self.data.sum(axis=1)
+
+    def magnitude_counts(self):
+        """
+        Returns:
+            (numpy.array): expected number of events in each magnitude bin
+        """
+        return self.data.sum(axis=0)
+
+
+class ExpectedRatesAccumulator:
+    """
+    Incrementally computes the expected-rate forecast of a stochastic event set.
+
+    The accumulator keeps one running sum per space-magnitude bin and the number of catalogs, so catalogs can be
+    consumed one at a time from the loaders without being retained. Accumulators built from different parts of an
+    event set, e.g., in different processes, can be merged. Accumulators can be pickled.
+
+    Example usage would be:
+    >>> accumulator = ExpectedRatesAccumulator(region)
+    >>> accumulator.add_catalogs(load_stochastic_event_set(type='ucerf3', filename=filename))
+    >>> forecast = accumulator.get_forecast(name='UCERF3-ETAS')
+
+    Args:
+        region (:class:`~csep.core.regions.Region`): region with magnitude bins
+    """
+    def __init__(self, region):
+        if region.magnitudes is None:
+            raise ValueError('Error: region must define magnitude bins.')
+        self.region = region
+        self.num_catalogs = 0
+        self.sums = numpy.zeros(region.num_nodes * len(region.magnitudes), dtype=numpy.int64)
+
+    def add(self, catalog):
+        """
+        Adds the events of one catalog to the running sums.
+
+        Args:
+            catalog (:class:`~csep.core.catalogs.BaseCatalog`): catalog
+
+        Returns:
+            self
+        """
+        self._add_bins(get_space_magnitude_idx(catalog, self.region))
+        self.num_catalogs += 1
+        return self
+
+    def add_catalogs(self, catalogs):
+        """
+        Adds all catalogs. Stochastic event sets are binned at once.
+
+        Args:
+            catalogs (iterable): :class:`~csep.core.catalogs.BaseCatalog` objects or a
+                                 :class:`~csep.core.catalogs.StochasticEventSet`
+
+        Returns:
+            self
+        """
+        if isinstance(catalogs, StochasticEventSet):
+            self._add_bins(get_space_magnitude_idx(catalogs, self.region))
+            self.num_catalogs += len(catalogs)
+            return self
+        for catalog in catalogs:
+            self.add(catalog)
+        return self
+
+    def _add_bins(self, idx):
+        """
+        Adds one event to each space-magnitude bin in idx, events outside of the region have index -1.
+        """
+        self.sums += numpy.bincount(idx[idx >= 0], minlength=len(self.sums))
+
+    def merge(self, other):
+        """
+        Adds the sums of another accumulator over the same region.
+
+        Args:
+            other (:class:`ExpectedRatesAccumulator`): accumulator built from other catalogs of the event set
+
+        Returns:
+            self
+        """
+        if self.sums.shape != other.sums.shape \
+                or not numpy.array_equal(self.region.magnitudes, other.region.magnitudes) \
+                or not numpy.allclose(self.region.origins, other.region.origins):
+            raise ValueError('Error: accumulators must use the same region.')
+        self.sums += other.sums
+        self.num_catalogs += other.num_catalogs
+        return self
+
+    def get_forecast(self, name=None):
+        """
+        Returns:
+            (:class:`GriddedForecast`): mean number of events in each space-magnitude bin over all catalogs
+        """
+        if self.num_catalogs == 0:
+            raise ValueError('Error: no catalogs have been added.')
+        rates = self.sums / self.num_catalogs
+        return GriddedForecast(rates.reshape(self.region.num_nodes, len(self.region.magnitudes)), self.region,
+                               name=name)
@@ -0,0 +1,184 @@
+import numpy
+
+"""
+This module contains the magnitude-frequency distributions (MFD) of catalogs and stochastic event sets.
+
+Magnitudes of all catalogs are binned into one (catalogs x bins) histogram. Cumulative counts, Gutenberg-Richter fits
+and confidence envelopes are computed for all catalogs at once from this histogram.
+"""
+
+
+def get_magnitude_bin_edges(min_mw, max_mw, delta_mw):
+    """
+    Returns edges of magnitude bins of width delta_mw centered on min_mw, min_mw + delta_mw, ..., covering max_mw.
+
+    Args:
+        min_mw (float): center of the first bin
+        max_mw (float): largest magnitude
+        delta_mw (float): width of the bins
+
+    Returns:
+        (numpy.array): bin edges, bins include their upper edge
+    """
+    return numpy.arange(min_mw - delta_mw / 2, max_mw + delta_mw, delta_mw)
+
+
+class MagnitudeFrequencyDistribution:
+    """
+    Incremental and cumulative magnitude-frequency distributions of many catalogs.
+
+    Bins include their upper edge, consistent with pandas.cut. Magnitudes outside of the bins are not counted.
+
+    Example usage would be:
+    >>> mfd = MagnitudeFrequencyDistribution.from_catalogs(event_set, delta_mw=0.1)
+    >>> fit = mfd.fit_gutenberg_richter()
+    >>> lower, median, upper = mfd.get_envelope(percentiles=(5, 50, 95))
+
+    Args:
+        counts (numpy.ndarray): (catalogs, bins) number of events in each magnitude bin
+        bin_edges (numpy.array): edges of the magnitude bins, len(bin_edges) == counts.shape[1] + 1
+    """
+    def __init__(self, counts, bin_edges):
+        self.counts = numpy.atleast_2d(numpy.asarray(counts, dtype=numpy.int64))
+        self.bin_edges = numpy.asarray(bin_edges, dtype=numpy.float64)
+        if self.counts.shape[1] != len(self.bin_edges) - 1:
+            raise ValueError('Error: number of bins must be one less than the number of bin edges.')
+
+    @classmethod
+    def from_catalogs(cls, catalogs, delta_mw=0.1, min_mw=None, max_mw=None):
+        """
+        Bins the magnitudes of all catalogs in a single pass.
+
+        If min_mw and max_mw are given, catalogs are binned as they are read, so only the histogram is kept in memory.
+        Otherwise the magnitudes are retained until the range of magnitudes is known.
+
+        Args:
+            catalogs (iterable): :class:`~csep.core.catalogs.BaseCatalog` objects or a
+                                 :class:`~csep.core.catalogs.StochasticEventSet`
+            delta_mw (float): width of the magnitude bins
+            min_mw (float): center of the first bin, defaults to the smallest magnitude
+            max_mw (float): largest magnitude binned, defaults to the largest magnitude
+
+        Returns:
+            (:class:`MagnitudeFrequencyDistribution`)
+        """
+        from csep.core.catalogs import StochasticEventSet
+
+        if isinstance(catalogs, StochasticEventSet):
+            magnitudes = catalogs.get_magnitudes()
+            catalog_idx = numpy.repeat(numpy.arange(len(catalogs)), catalogs.get_number_of_events())
+            bin_edges = cls._get_bin_edges(magnitudes, delta_mw, min_mw, max_mw)
+            return cls(cls._histogram(magnitudes, catalog_idx, len(catalogs), bin_edges), bin_edges)
+
+        if min_mw is not None and max_mw is not None:
+            bin_edges = get_magnitude_bin_edges(min_mw, max_mw, delta_mw)
+            rows = [cls._histogram(catalog.get_magnitudes(), 0, 1, bin_edges)[0] for catalog in catalogs]
+            return cls(numpy.array(rows).reshape(len(rows), len(bin_edges) - 1), bin_edges)
+
+        magnitudes = [numpy.asarray(catalog.get_magnitudes()) for catalog in catalogs]
+        num_catalogs = len(magnitudes)
+        catalog_idx = numpy.repeat(numpy.arange(num_catalogs), [len(m) for m in magnitudes])
+        magnitudes = numpy.concatenate(magnitudes) if magnitudes else numpy.zeros(0)
+        bin_edges = cls._get_bin_edges(magnitudes, delta_mw, min_mw, max_mw)
+        return cls(cls._histogram(magnitudes, catalog_idx, num_catalogs, bin_edges), bin_edges)
+
+    @staticmethod
+    def _get_bin_edges(magnitudes, delta_mw, min_mw, max_mw):
+        if len(magnitudes) == 0 and (min_mw is None or max_mw is None):
+            raise ValueError('Error: min_mw and max_mw are required if catalogs do not contain events.')
+        min_mw = magnitudes.min() if min_mw is None else min_mw
+        max_mw = magnitudes.max() if max_mw is None else max_mw
+        return get_magnitude_bin_edges(min_mw, max_mw, delta_mw)
+
+    @staticmethod
+    def _histogram(magnitudes, catalog_idx, num_catalogs, bin_edges):
+        """
+        Returns (catalogs, bins) histogram, bins include their upper edge.
+        """
+        num_bins = len(bin_edges) - 1
+        bin_idx = numpy.searchsorted(bin_edges, magnitudes, side='left') - 1
+        valid = (bin_idx >= 0) & (bin_idx < num_bins)
+        flat = numpy.broadcast_to(catalog_idx, bin_idx.shape)[valid] * num_bins + bin_idx[valid]
+        return numpy.bincount(flat, minlength=num_catalogs * num_bins).reshape(num_catalogs, num_bins)
+
+    @property
+    def magnitudes(self):
+        """
+        Returns:
+            (numpy.array): centers of the magnitude bins
+        """
+        return (self.bin_edges[:-1] + self.bin_edges[1:]) / 2
+
+    def get_cumulative_counts(self):
+        """
+        Returns:
+            (numpy.ndarray): (catalogs, bins) number of events with magnitude in or above each bin
+        """
+        return numpy.cumsum(self.counts[:, ::-1], axis=1)[:, ::-1]
+
+    def get_envelope(self, percentiles=(5, 50, 95), cumulative=True):
+        """
+        Returns percentiles of the counts over all catalogs in each magnitude bin.
+
+        Args:
+            percentiles (tuple): percentiles between 0 and 100
+            cumulative (bool): use cumulative counts
+
+        Returns:
+            (numpy.ndarray): (percentiles, bins) counts
+        """
+        counts = self.get_cumulative_counts() if cumulative else self.counts
+        return numpy.percentile(counts, percentiles, axis=0)
+
+    def fit_gutenberg_richter(self, p_value=0.05):
+        """
+        Fits log10(N) = a + b*M to the cumulative counts of every catalog by least squares. Bins without events are
+        excluded from the fits. The fits of all catalogs are computed at once from weighted sums, which is equivalent to
+        solving one least-squares problem per catalog.
+
+        Args:
+            p_value (float): p_value for student's t-distribution used for the confidence intervals
+
+        Returns:
+            (dict): arrays a, b, ci_b and t_stat with one value per catalog and N, N_est, lower_ci and upper_ci with
+                    shape (catalogs, bins). Values are nan for catalogs with fewer than 3 non-empty bins.
+        """
+        import scipy.stats
+
+        x = self.magnitudes
+        cumulative = self.get_cumulative_counts()
+        w = (cumulative > 0).astype(numpy.float64)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            N = numpy.where(w > 0, numpy.log10(cumulative), numpy.nan)
+            y = numpy.where(w > 0, N, 0.0)
+
+            # normal equations of the weighted fits
+            n = w.sum(axis=1)
+            sx = w @ x
+            sy = y.sum(axis=1)
+            sxx = w @ (x * x)
+            sxy = y @ x
+            denom = sxx - sx * sx / n
+            b = (sxy - sx * sy / n) / denom
+            a = (sy - b * sx) / n
+
+            N_est = a[:, numpy.newaxis] + b[:, numpy.newaxis] * x
+            err = (y - N_est) * w
+            sse = numpy.sum(err * err, axis=1)
+
+            t_stat = scipy.stats.t.ppf(1 - p_value / 2, n - 2)
+            mean_x = sx / n
+            se_line = numpy.sqrt(sse / (n - 2))
+            se_xk = numpy.sqrt(1 / n[:, numpy.newaxis] + (x - mean_x[:, numpy.newaxis]) ** 2 / denom[:, numpy.newaxis])
+            confs = (t_stat * se_line)[:, numpy.newaxis] * se_xk
+
+            # confidence interval of b-value
+            rms = numpy.sqrt(sse / n)
+            ci_b = t_stat * rms / denom
+
+        invalid = n < 3
+        result = {'a': a, 'b': b, 'ci_b': ci_b, 't_stat': t_stat,
+                  'N': N, 'N_est': N_est, 'lower_ci': N_est - confs, 'upper_ci': N_est + confs}
+        for key, value in result.items():
+            value[invalid] = numpy.nan
+        return result
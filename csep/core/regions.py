@@ -0,0 +1,172 @@
+import xml.etree.ElementTree as ElementTree
+
+import numpy
+
+"""
+This module contains the spatial regions used to bin catalogs and forecasts.
+
+A region is a collection of rectangular cells of the same size, aligned to a regular grid. Cells are identified by
+their index in the region. Events are binned using a lookup table that covers the bounding box of the region, so
+finding the cells of any number of events is a single vectorized integer computation.
+"""
+
+_csep_namespace = '{http://www.scec.org/xml-ns/csep/forecast/0.1}'
+
+
+def parse_csep_template(xml_filename):
+    """
+    Reads CSEP XML forecast template and returns the cells and magnitude bins of the forecast.
+
+    Note:
+        The lat/lon attributes of cells in CSEP templates are the midpoints of the cells.
+
+    Args:
+        xml_filename (str): filename of the forecast template
+
+    Returns:
+        midpoints (numpy.ndarray): (n, 2) array of (lon, lat) midpoints of the cells
+        dh (float): size of the cells in degrees
+        magnitudes (numpy.array): lower edges of the magnitude bins
+    """
+    tree = ElementTree.parse(xml_filename)
+    root = tree.getroot()
+
+    dimension = root.find('.//' + _csep_namespace + 'defaultCellDimension')
+    if dimension is None:
+        raise ValueError('Error: could not find defaultCellDimension in {}.'.format(xml_filename))
+    dh_lat = float(dimension.attrib['latRange'])
+    dh_lon = float(dimension.attrib['lonRange'])
+    if not numpy.isclose(dh_lat, dh_lon):
+        raise ValueError('Error: only cells with the same latitude and longitude spacing are supported.')
+
+    midpoints = []
+    magnitudes = None
+    for cell in root.iter(_csep_namespace + 'cell'):
+        midpoints.append((float(cell.attrib['lon']), float(cell.attrib['lat'])))
+        # all cells of a template have the same magnitude bins
+        if magnitudes is None:
+            magnitudes = [float(b.attrib['m']) for b in cell.iter(_csep_namespace + 'bin')]
+    return numpy.array(midpoints).reshape(-1, 2), dh_lon, numpy.array(magnitudes or [])
+
+
+class Region:
+    """
+    Gridded spatial region with optional magnitude bins.
+
+    Cells are defined by their origins, the lower left corners of the cells. The region stores a dense lookup table
+    over the bounding box of the cells, which contains the index of each cell and -1 for points outside the region.
+
+    Example usage would be:
+    >>> region = Region.from_csep_xml('csep-forecast-template-M5.xml')
+    >>> idx = region.get_index_of(catalog.get_longitudes(), catalog.get_latitudes())
+
+    Args:
+        origins (numpy.ndarray): (n, 2) array of (lon, lat) lower left corners of the cells
+        dh (float): size of the cells in degrees
+        magnitudes (numpy.array): lower edges of the magnitude bins, the last bin is open ended
+        name (str): name of the region
+    """
+    def __init__(self, origins, dh, magnitudes=None, name=None):
+        self.origins = numpy.asarray(origins, dtype=numpy.float64).reshape(-1, 2)
+        self.dh = float(dh)
+        self.magnitudes = numpy.asarray(magnitudes, dtype=numpy.float64) if magnitudes is not None else None
+        self.name = name
+
+        if len(self.origins) == 0:
+            raise ValueError('Error: region must contain at least one cell.')
+
+        # position of cells in the grid, rounding removes floating point errors of the origins, e.g., origins computed
+        # from the midpoints of templates are -125.39999999999999 instead of -125.4
+        self.xmin, self.ymin = numpy.round(self.origins.min(axis=0), 10)
+        ix = numpy.round((self.origins[:, 0] - self.xmin) / self.dh).astype(numpy.int64)
+        iy = numpy.round((self.origins[:, 1] - self.ymin) / self.dh).astype(numpy.int64)
+        self.nx = ix.max() + 1
+        self.ny = iy.max() + 1
+
+        self._idx_map = numpy.full((self.ny, self.nx), -1, dtype=numpy.int64)
+        if len(numpy.unique(iy * self.nx + ix)) != len(ix):
+            raise ValueError('Error: region contains duplicate cells.')
+        self._idx_map[iy, ix] = numpy.arange(len(self.origins))
+
+    @classmethod
+    def from_csep_xml(cls, xml_filename, name=None):
+        """
+        Creates region from CSEP XML forecast template.
+
+        Args:
+            xml_filename (str): filename of the forecast template
+            name (str): name of the region
+
+        Returns:
+            :class:`Region`
+        """
+        midpoints, dh, magnitudes = parse_csep_template(xml_filename)
+        return cls(midpoints - dh / 2, dh, magnitudes=magnitudes if len(magnitudes) > 0 else None, name=name)
+
+    @property
+    def num_nodes(self):
+        """
+        Returns:
+            (int): number of cells in the region
+        """
+        return len(self.origins)
+
+    def midpoints(self):
+        """
+        Returns:
+            (numpy.ndarray): (n, 2) array of (lon, lat) midpoints of the cells
+        """
+        return self.origins + self.dh / 2
+
+    def get_bbox(self):
+        """
+        Returns:
+            (tuple): min_longitude, max_longitude, min_latitude, max_latitude of the region
+        """
+        return self.xmin, self.xmin + self.nx * self.dh, self.ymin, self.ymin + self.ny * self.dh
+
+    def get_index_of(self, lons, lats):
+        """
+        Returns the index of the cells containing the points. Cells contain their lower and left edges. Points within
+        the precision of their dtype of a grid line are binned into the cell above or to the right of that line.
+
+        Args:
+            lons (numpy.array): longitudes of the points
+            lats (numpy.array): latitudes of the points
+
+        Returns:
+            (numpy.array): index of the cells, -1 for points outside the region
+        """
+        ix = self._get_grid_index(lons, self.xmin)
+        iy = self._get_grid_index(lats, self.ymin)
+        # nan compares false, so invalid coordinates are outside the region
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        idx = numpy.full(ix.shape, -1, dtype=numpy.int64)
+        idx[inside] = self._idx_map[iy[inside].astype(numpy.int64), ix[inside].astype(numpy.int64)]
+        return idx
+
+    def _get_grid_index(self, values, origin):
+        """
+        Returns the column or row of the grid containing the values, as float so that nan values are preserved.
+        """
+        values = numpy.asarray(values)
+        dtype = values.dtype if numpy.issubdtype(values.dtype, numpy.floating) else numpy.float64
+        # coordinates stored as float32 can be below a grid line by their rounding error, e.g., -117.1 in float32
+        tolerance = max(1e-8, 4 * numpy.finfo(dtype).eps * max(abs(origin), 1.0) / self.dh)
+        return numpy.floor((values.astype(numpy.float64) - origin) / self.dh + tolerance)
+
+    def get_magnitude_index(self, magnitudes):
+        """
+        Returns the index of the magnitude bins containing the magnitudes.
+
+        Args:
+            magnitudes (numpy.array): magnitudes of the events
+
+        Returns:
+            (numpy.array): index of the magnitude bins, -1 for magnitudes below the first bin
+        """
+        if self.magnitudes is None:
+            raise ValueError('Error: region does not define magnitude bins.')
+        magnitudes = numpy.asarray(magnitudes, dtype=numpy.float64)
+        # small tolerance, so magnitudes stored as float32 fall into the bin starting at their nominal value
+        return numpy.searchsorted(self.magnitudes, magnitudes + 1e-6, side='right') - 1
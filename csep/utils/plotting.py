@@ -1,11 +1,12 @@
 import time
 import numpy
-import pandas
 import matplotlib.pyplot as pyplot
 import matplotlib.dates as mdates
+from matplotlib.colors import LogNorm
 
 from csep.utils.constants import SECONDS_PER_DAY
-from csep.utils.time import epoch_time_to_utc_datetime
+from csep.utils.time import epoch_time_to_datetime64, get_time_bin_edges
+from csep.utils.stats import cumulative_percentiles
 
 """
 This module contains plotting routines that generate figures for the stochastic event sets produced from
@@ -20,10 +21,55 @@ IDEA: Same concept mentioned in evaluations might apply here. The plots could be
       more control to the end user.
 """
 
+def get_cumulative_events_versus_time(stochastic_event_set, observation, bin_duration=7*SECONDS_PER_DAY*1000,
+                                      start_epoch=None, end_epoch=None, percentiles=(5, 25, 50, 75, 95)):
+    """
+    Computes the cumulative number of events in time bins for the observation and percentiles of the cumulative
+    number of events over the stochastic event set.
+
+    Catalogs are binned one at a time into a (catalogs x bins) matrix of counts, so only the counts are kept in
+    memory. Stochastic event sets stored as :class:`~csep.core.catalogs.StochasticEventSet` are binned at once.
+
+    Unless start_epoch is given, the first bin starts at the first observed event, so bins are not aligned with
+    calendar weeks or with the start of the forecast period.
+
+    Args:
+        stochastic_event_set (iterable): iterable of :class:`~csep.core.catalogs.BaseCatalog` objects
+        observation (:class:`~csep.core.catalogs.BaseCatalog`): single catalog, typically observation catalog
+        bin_duration (int): duration of time bins in milliseconds, defaults to one week
+        start_epoch (int): start of the first bin in milliseconds, defaults to the first observed event
+        end_epoch (int): end of the last bin in milliseconds, defaults to the last observed event
+        percentiles (tuple): percentiles of the stochastic event set between 0 and 100
+
+    Returns:
+        bin_edges (numpy.array): edges of the time bins in milliseconds
+        obs_cumulative (numpy.array): cumulative number of observed events at the end of each bin
+        sim_percentiles (numpy.ndarray): (percentiles, bins) cumulative number of simulated events
+    """
+    obs_epoch_times = observation.get_epoch_times()
+    if start_epoch is None or end_epoch is None:
+        if len(obs_epoch_times) == 0:
+            raise ValueError('Error: start_epoch and end_epoch are required if observation does not contain events.')
+        start_epoch = obs_epoch_times.min() if start_epoch is None else start_epoch
+        end_epoch = obs_epoch_times.max() if end_epoch is None else end_epoch
+    bin_edges = get_time_bin_edges(start_epoch, end_epoch, bin_duration)
+
+    from csep.core.catalogs import StochasticEventSet
+
+    if isinstance(stochastic_event_set, StochasticEventSet):
+        sim_counts = stochastic_event_set.get_time_bin_counts(bin_edges)
+    else:
+        sim_counts = numpy.array([catalog.get_time_bin_counts(bin_edges) for catalog in stochastic_event_set])
+    sim_counts = sim_counts.reshape(-1, len(bin_edges) - 1)
+
+    obs_cumulative = numpy.cumsum(observation.get_time_bin_counts(bin_edges))
+    return bin_edges, obs_cumulative, cumulative_percentiles(sim_counts, percentiles)
+
 def plot_cumulative_events_versus_time(stochastic_event_set, observation, filename=None, show=False, plot_args={}):
     """
     Plots cumulative number of events against time for both the observed catalog and a stochastic event set.
-    Initially bins events by week and computes.
+    Initially bins events by week and computes percentiles of the cumulative counts, see
+    :func:`get_cumulative_events_versus_time`.
 
     Args:
         stochastic_event_set (iterable): iterable of :class:`~csep.core.catalogs.BaseCatalog` objects
@@ -41,52 +87,32 @@ def plot_cumulative_events_versus_time(stochastic_event_set, observation, filena
     locator = mdates.MonthLocator()  # every month
     fmt = mdates.DateFormatter('%b')
 
-    # get dataframe representation for all catalogs
-    f = lambda x: x.get_dataframe()
-    t0 = time.time()
-    cats = list(map(f, stochastic_event_set))
-    df = pandas.concat(cats)
-    t1 = time.time()
-    print('Converted {} ruptures from {} catalogs into a DataFrame in {} seconds.\n'
-          .format(len(df), len(cats), t1-t0))
-
-    # get counts, cumulative_counts, percentiles in weekly intervals
-    df_obs = observation.get_dataframe()
-
-    # get statistics from stochastic event set
-    # IDEA: make this a function, might want to re-use this binning
-    df1 = df.groupby([df['catalog_id'], pandas.Grouper(freq='W')])['counts'].agg(['sum'])
-    df1['cum_sum'] = df1.groupby(level=0).cumsum()
-    df2 = df1.groupby('datetime').describe(percentiles=(0.05,0.25,0.5,0.75,0.95))
-
-    # remove tz information so pandas can plot
-    df2.index = df2.index.tz_localize(None)
-
-    # get statistics from catalog
-    df1_comcat = df_obs.groupby(pandas.Grouper(freq='W'))['counts'].agg(['sum'])
-    df1_comcat['obs_cum_sum'] = df1_comcat['sum'].cumsum()
-    df1_comcat.index = df1_comcat.index.tz_localize(None)
-
-    df2.columns = ["_".join(x) for x in df2.columns.ravel()]
-    df3 = df2.merge(df1_comcat, left_index=True, right_on='datetime', left_on='datetime')
-
     # get values from plotting args
     sim_label = plot_args.pop('sim_label', 'Simulated')
     obs_label = plot_args.pop('obs_label', 'Observation')
-    xlabel = plot_args.pop('xlabel', 'X')
-    ylabel = plot_args.pop('ylabel', '$P(X \leq x)$')
     xycoords = plot_args.pop('xycoords', (1.00, 0.40))
     legend_loc = plot_args.pop('legend_loc', 'best')
+    bin_duration = plot_args.pop('bin_duration', 7*SECONDS_PER_DAY*1000)
+
+    t0 = time.time()
+    bin_edges, obs_cumulative, sim_percentiles = get_cumulative_events_versus_time(
+        stochastic_event_set, observation, bin_duration=bin_duration, percentiles=(5, 25, 50, 75, 95))
+    t1 = time.time()
+    print('Binned catalogs into {} time bins in {} seconds.\n'.format(len(bin_edges)-1, t1-t0))
+    p5, p25, p50, p75, p95 = sim_percentiles
+
+    # label bins by their end, as pandas does for weekly groups
+    dates = epoch_time_to_datetime64(bin_edges[1:])
 
     # plotting
-    ax.plot(df3.index, df3['obs_cum_sum'], color='black', label=obs_label)
-    ax.plot(df3.index, df3['cum_sum_50%'], color='blue', label=sim_label)
-    ax.fill_between(df3.index, df3['cum_sum_5%'], df3['cum_sum_95%'], color='blue', alpha=0.2, label='5%-95%')
-    ax.fill_between(df3.index, df3['cum_sum_25%'], df3['cum_sum_75%'], color='blue', alpha=0.5, label='25%-75%')
+    ax.plot(dates, obs_cumulative, color='black', label=obs_label)
+    ax.plot(dates, p50, color='blue', label=sim_label)
+    ax.fill_between(dates, p5, p95, color='blue', alpha=0.2, label='5%-95%')
+    ax.fill_between(dates, p25, p75, color='blue', alpha=0.5, label='25%-75%')
     ax.legend(loc=legend_loc)
     ax.xaxis.set_major_locator(locator)
     ax.xaxis.set_major_formatter(fmt)
-    ax.set_xlabel(df3.index.year.max())
+    ax.set_xlabel(dates.max().astype('datetime64[Y]').astype(int) + 1970)
     ax.set_ylabel('Cumulative Event Count')
 
     # annotate the plot with information from catalog
@@ -102,11 +128,59 @@ def plot_cumulative_events_versus_time(stochastic_event_set, observation, filena
 
     return ax
 
+def get_magnitude_versus_time_raster(epoch_times, magnitudes, num_time_bins=1000, num_mag_bins=200,
+                                     origin_epoch=None):
+    """
+    Bins events into a (magnitude bins x time bins) density raster for :func:`plot_magnitude_versus_time`.
+
+    Times are binned with integer arithmetic on epoch times in milliseconds, so no datetimes are created and the
+    size of the raster does not depend on the number of events.
+
+    Args:
+        epoch_times (numpy.array): origin times of events in milliseconds
+        magnitudes (numpy.array): magnitudes of events
+        num_time_bins (int): number of time bins
+        num_mag_bins (int): number of magnitude bins
+        origin_epoch (int): time in milliseconds corresponding to zero days elapsed, defaults to the first event
+
+    Returns:
+        density (numpy.ndarray): (num_mag_bins, num_time_bins) number of events in each bin
+        extent (tuple): (left, right, bottom, top) of the raster in days elapsed and magnitude, as used by imshow
+    """
+    epoch_times = numpy.asarray(epoch_times).astype(numpy.int64)
+    magnitudes = numpy.asarray(magnitudes, dtype=numpy.float64)
+    if len(epoch_times) == 0:
+        raise ValueError('Error: cannot create raster for catalog without events.')
+    if origin_epoch is None:
+        origin_epoch = epoch_times[0]
+
+    # last event falls into the last bin, because duration includes one extra millisecond
+    min_time = epoch_times.min()
+    duration = epoch_times.max() - min_time + 1
+    time_idx = (epoch_times - min_time) * num_time_bins // duration
+
+    min_mw, max_mw = magnitudes.min(), magnitudes.max()
+    dmw = max(max_mw - min_mw, 1e-6) / num_mag_bins
+    mag_idx = numpy.minimum(((magnitudes - min_mw) / dmw).astype(numpy.int64), num_mag_bins - 1)
+
+    density = numpy.bincount(mag_idx * num_time_bins + time_idx, minlength=num_mag_bins * num_time_bins)
+    density = density.reshape(num_mag_bins, num_time_bins)
+
+    ms_per_day = 1000 * SECONDS_PER_DAY
+    extent = ((min_time - origin_epoch) / ms_per_day, (min_time + duration - origin_epoch) / ms_per_day,
+              min_mw, min_mw + num_mag_bins * dmw)
+    return density, extent
+
 def plot_magnitude_versus_time(catalog, filename=None, show=False, plot_args={}, **kwargs):
     """
     Plots magnitude versus linear time for an earthquake catalog.
 
-    Catalog class must implement get_magnitudes() and get_datetimes() in order for this function to work correctly.
+    Catalog class must implement get_magnitudes() and get_epoch_times() in order for this function to work correctly.
+
+    Catalogs with many events are drawn as a density raster with imshow, see :func:`get_magnitude_versus_time_raster`,
+    and only the largest events are drawn as markers on top of the raster. This keeps render time and file size
+    roughly constant regardless of the size of the catalog. The mode is selected with plot_args['raster'], which is
+    either True, False or 'auto' (default) to rasterize catalogs with more than plot_args['raster_threshold'] events.
 
     Args:
         catalog (:class:`~csep.core.catalogs.BaseCatalog`): catalog to visualize
@@ -124,6 +198,11 @@ def plot_magnitude_versus_time(catalog, filename=None, show=False, plot_args={},
     title = plot_args.pop('title', '')
     marker_size = plot_args.pop('marker_size', 10)
     color = plot_args.pop('color', 'blue')
+    raster = plot_args.pop('raster', 'auto')
+    raster_threshold = plot_args.pop('raster_threshold', 100000)
+    raster_bins = plot_args.pop('raster_bins', (1000, 200))
+    max_markers = plot_args.pop('max_markers', 1000)
+    cmap = plot_args.pop('cmap', 'viridis')
 
     print('Plotting magnitude versus time.')
     fig = pyplot.figure(figsize=(8,3))
@@ -131,16 +210,31 @@ def plot_magnitude_versus_time(catalog, filename=None, show=False, plot_args={},
 
     # get time in days
     # plotting timestamps for now, until I can format dates on axis properly
-    f = lambda x: numpy.array(x.timestamp()) / SECONDS_PER_DAY
+    epoch_times = numpy.asarray(catalog.get_epoch_times()).astype(numpy.int64)
+    days_elapsed = (epoch_times - epoch_times[0]) / (1000 * SECONDS_PER_DAY)
 
-    # map returns a generator function which we collapse with list
-    days_elapsed = numpy.array(list(map(f, catalog.get_datetimes())))
-    days_elapsed = days_elapsed - days_elapsed[0]
+    magnitudes = numpy.asarray(catalog.get_magnitudes())
 
-    magnitudes = catalog.get_magnitudes()
+    if raster == 'auto':
+        raster = len(magnitudes) > raster_threshold
 
     # make plot
-    ax.scatter(days_elapsed, magnitudes, marker='.', s=marker_size, color=color)
+    if raster and len(magnitudes) > 0:
+        num_time_bins, num_mag_bins = raster_bins
+        density, extent = get_magnitude_versus_time_raster(epoch_times, magnitudes, num_time_bins=num_time_bins,
+                                                           num_mag_bins=num_mag_bins)
+        im = ax.imshow(numpy.ma.masked_equal(density, 0), origin='lower', extent=extent, aspect='auto',
+                       interpolation='nearest', cmap=cmap, norm=LogNorm())
+        fig.colorbar(im, ax=ax, label='Number of Events')
+        # overplot the largest events individually
+        if len(magnitudes) > max_markers:
+            kth = len(magnitudes) - max_markers
+            largest = numpy.argpartition(magnitudes, kth)[kth:]
+        else:
+            largest = numpy.arange(len(magnitudes))
+        ax.scatter(days_elapsed[largest], magnitudes[largest], marker='.', s=marker_size, color=color)
+    else:
+        ax.scatter(days_elapsed, magnitudes, marker='.', s=marker_size, color=color)
 
     # do some labeling of the figure
     ax.set_title(title, fontsize=16, color='black')
@@ -237,7 +331,7 @@ def plot_histogram(simulated, observation, bins='fd', filename=None, show=False,
     ax.legend(loc=legend_loc)
 
     if filename is not None:
-        pyplot.savefig(filename)
+        ax.figure.savefig(filename)
 
     if show:
         pyplot.show()
@@ -267,9 +361,9 @@ def plot_mfd(catalog, filename=None, show=False, **kwargs):
         mfd = catalog.get_mfd()
 
     # get other vals for plotting
-    a = mfd.loc[0,'a']
-    b = mfd.loc[0,'b']
-    ci_b = mfd.loc[0,'ci_b']
+    a = mfd['a'].iloc[0]
+    b = mfd['b'].iloc[0]
+    ci_b = mfd['ci_b'].iloc[0]
 
     # take mid point of magnitude bins for plotting
     x = numpy.array(mfd.index.categories.mid)
@@ -288,7 +382,7 @@ def plot_mfd(catalog, filename=None, show=False, **kwargs):
     ax.set_xlabel('Magnitude')
     ax.set_ylabel('Frequency')
     ax.set_title('Magnitude Frequency Distribution')
-    ax.annotate(s='Start Date: {}\nEnd Date: {}\n\nLatitude: ({:.2f}, {:.2f})\nLongitude: ({:.2f}, {:.2f})'
+    ax.annotate('Start Date: {}\nEnd Date: {}\n\nLatitude: ({:.2f}, {:.2f})\nLongitude: ({:.2f}, {:.2f})'
                 .format(catalog.start_time.date(), catalog.end_time.date(),
                        catalog.min_latitude,catalog.max_latitude,
                        catalog.min_longitude,catalog.max_longitude),
@@ -297,10 +391,12 @@ def plot_mfd(catalog, filename=None, show=False, **kwargs):
 
     # handle saving
     if filename:
-        pyplot.savefig(filename)
+        fig.savefig(filename)
     if show:
         pyplot.show()
 
+    return ax
+
 def plot_ecdf(x, ecdf, xv=None, catalog=None, filename=None, show=False, plot_args = {}):
     """
     Plots empirical cumulative distribution function.
@@ -326,7 +422,7 @@ def plot_ecdf(x, ecdf, xv=None, catalog=None, filename=None, show=False, plot_ar
         ax.annotate(str(catalog), xycoords='axes fraction', xy=xycoords, fontsize=10, annotation_clip=False)
 
     if filename is not None:
-        pyplot.savefig(filename)
+        fig.savefig(filename)
 
     if show:
         pyplot.show()
@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+"""
+This module renders the figures of evaluation reports in parallel.
+
+Plot inputs are computed beforehand, e.g., with :func:`~csep.utils.plotting.get_cumulative_events_versus_time` or the
+evaluations, and every figure is rendered by a separate worker process with the Agg backend. Workers do not share
+pyplot state, so figures are written concurrently and a report takes roughly as long as its slowest figure.
+"""
+
+
+def _init_worker():
+    """
+    Selects the non-interactive Agg backend in worker processes.
+    """
+    matplotlib.use('Agg', force=True)
+
+
+def _render_figure(plot_func, args, kwargs, filename):
+    """
+    Calls a plotting function from :mod:`csep.utils.plotting`, which saves the figure to filename, and releases the
+    figure afterwards.
+
+    Returns:
+        (str): filename
+    """
+    import matplotlib.pyplot as pyplot
+
+    ax = plot_func(*args, filename=filename, show=False, **kwargs)
+    if ax is not None:
+        pyplot.close(ax.figure)
+    else:
+        pyplot.close('all')
+    return filename
+
+
+class ReportBuilder:
+    """
+    Collects figures of a report and renders them in a process pool.
+
+    Figures are described by a plotting function and its precomputed inputs. The function must accept the keyword
+    arguments filename and show, save the figure to filename and return its axes handle, as the functions in
+    :mod:`csep.utils.plotting` do. Functions and inputs must be picklable, so functions need to be defined at the top
+    level of a module.
+
+    Example usage would be:
+    >>> report = ReportBuilder('figures', max_workers=4)
+    >>> report.add_figure('n-test.png', plot_ecdf, *ecdf(sim_counts), observed_count)
+    >>> report.add_figure('mfd.png', plot_mfd, observation)
+    >>> filenames = report.render()
+
+    Args:
+        output_dir (str): directory of the figures, created if it does not exist
+        max_workers (int): number of worker processes, defaults to the number of processors. With max_workers=1
+                           figures are rendered serially in the current process.
+    """
+    def __init__(self, output_dir, max_workers=None):
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.figures = []
+
+    def __len__(self):
+        return len(self.figures)
+
+    def add_figure(self, filename, plot_func, *args, **kwargs):
+        """
+        Adds a figure to the report.
+
+        Args:
+            filename (str): filename of the figure relative to output_dir
+            plot_func (callable): plotting function, e.g., :func:`~csep.utils.plotting.plot_histogram`
+            *args: positional arguments of plot_func
+            **kwargs: keyword arguments of plot_func
+        """
+        path = os.path.join(self.output_dir, filename)
+        if any(path == figure[3] for figure in self.figures):
+            raise ValueError('Error: figure {} was already added to the report.'.format(filename))
+        self.figures.append((plot_func, args, kwargs, path))
+
+    def render(self):
+        """
+        Renders all figures. Errors raised while rendering a figure are raised after all figures have finished.
+
+        Returns:
+            (list): filenames of the figures in the order they were added
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.max_workers == 1:
+            return [_render_figure(*figure) for figure in self.figures]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(_render_figure, *figure) for figure in self.figures]
+        # leaving the context waits for all figures
+        return [future.result() for future in futures]
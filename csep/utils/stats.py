@@ -17,50 +17,132 @@ def ecdf(x):
 
 def greater_equal_ecdf(x, val, cdf=()):
     """
-    Given val return P(x ≥ val).
+    Given val return P(x ≥ val). To evaluate many values on the same sample, use :class:`ECDF`.
 
     Args:
         x (numpy.array): set of values
-        val (float): value
-        ecdf (tuple): ecdf of x, should be tuple (sorted(x), ecdf(x))
+        val (float or numpy.array): value
+        cdf (tuple): ecdf of x, should be tuple (sorted(x), ecdf(x)), avoids sorting x again
 
     Returns:
         (float): probability that x ≤ val
     """
-    x = numpy.asarray(x)
     if not cdf:
-        ex, ey = ecdf(x)
+        dist = ECDF(x)
     else:
-        ex, ey = cdf
-
-    eyc = ey[::-1]
-    # some short-circuit cases for discrete distributions
-    if val > numpy.max(x):
-        return 0.0
-    if val < numpy.min(x):
-        return 1.0
-    return eyc[numpy.searchsorted(ex, val)]
+        dist = ECDF.from_sorted(cdf[0])
+    return dist.greater_equal(val)
 
 def less_equal_ecdf(x, val, cdf=()):
     """
-    Given val return P(x ≤ val).
+    Given val return P(x ≤ val). To evaluate many values on the same sample, use :class:`ECDF`.
 
     Args:
         x (numpy.array): set of values
-        val (float): value
+        val (float or numpy.array): value
+        cdf (tuple): ecdf of x, should be tuple (sorted(x), ecdf(x)), avoids sorting x again
 
     Returns:
         (float): probability that x ≤ val
     """
-    x = numpy.asarray(x)
     if not cdf:
-        ex, ey = ecdf(x)
+        dist = ECDF(x)
     else:
-        ex, ey = cdf
-
-    # some short-circuit cases for discrete distributions
-    if val > numpy.max(x):
-        return 1.0
-    if val < numpy.min(x):
-        return 0.0
-    return ey[numpy.searchsorted(ex,val,side='right')-1]
+        dist = ECDF.from_sorted(cdf[0])
+    return dist.less_equal(val)
+
+def cumulative_percentiles(counts, percentiles):
+    """
+    Computes percentiles of cumulative counts over many catalogs.
+
+    Args:
+        counts (numpy.ndarray): (catalogs, bins) number of events in each bin, e.g., time bins
+        percentiles (tuple): percentiles between 0 and 100
+
+    Returns:
+        (numpy.ndarray): (percentiles, bins) cumulative number of events
+    """
+    cumulative = numpy.cumsum(counts, axis=1)
+    return numpy.percentile(cumulative, percentiles, axis=0)
+
+class ECDF:
+    """
+    Empirical cumulative distribution function of a sample. The sample is sorted once and probabilities are computed
+    for any number of values with binary searches, so ties of discrete samples are handled exactly.
+
+    Example usage would be:
+    >>> dist = ECDF(sim_counts)
+    >>> delta_1, delta_2 = dist.greater_equal(observed_counts), dist.less_equal(observed_counts)
+
+    Args:
+        x (numpy.array): sample
+    """
+    def __init__(self, x):
+        self.x = numpy.sort(numpy.asarray(x).ravel())
+        if len(self.x) == 0:
+            raise ValueError('Error: ECDF requires at least one value.')
+
+    @classmethod
+    def from_sorted(cls, x):
+        """
+        Creates ECDF from an already sorted sample without sorting it again.
+        """
+        dist = cls.__new__(cls)
+        dist.x = numpy.asarray(x).ravel()
+        if len(dist.x) == 0:
+            raise ValueError('Error: ECDF requires at least one value.')
+        return dist
+
+    @classmethod
+    def merge(cls, ecdfs):
+        """
+        Merges ECDFs of separate chunks of a sample into the ECDF of the whole sample.
+
+        Args:
+            ecdfs (list of :class:`ECDF`): partial ECDFs
+
+        Returns:
+            (:class:`ECDF`)
+        """
+        # the concatenation consists of sorted runs, which mergesort combines efficiently
+        x = numpy.concatenate([dist.x for dist in ecdfs])
+        return cls.from_sorted(numpy.sort(x, kind='mergesort'))
+
+    def __len__(self):
+        return len(self.x)
+
+    def __call__(self, val):
+        return self.less_equal(val)
+
+    def values(self):
+        """
+        Returns:
+            xs (numpy.array), ys (numpy.array): sorted sample and P(X ≤ x) at each value, see :func:`ecdf`
+        """
+        return self.x, numpy.arange(1, len(self.x)+1)/float(len(self.x))
+
+    def less_equal(self, val):
+        """
+        Args:
+            val (float or numpy.array): values
+
+        Returns:
+            (float or numpy.array): P(X ≤ val) for each value
+        """
+        return self._result(numpy.searchsorted(self.x, val, side='right') / len(self.x))
+
+    def greater_equal(self, val):
+        """
+        Args:
+            val (float or numpy.array): values
+
+        Returns:
+            (float or numpy.array): P(X ≥ val) for each value
+        """
+        return self._result(1.0 - numpy.searchsorted(self.x, val, side='left') / len(self.x))
+
+    @staticmethod
+    def _result(p):
+        if numpy.ndim(p) == 0:
+            return float(p)
+        return p
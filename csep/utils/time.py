@@ -1,4 +1,5 @@
 import datetime
+import numpy
 from csep.utils.constants import SECONDS_PER_ASTRONOMICAL_YEAR
 
 def epoch_time_to_utc_datetime(epoch_time_milli):
@@ -15,15 +16,160 @@ def epoch_time_to_utc_datetime(epoch_time_milli):
     dt = datetime.datetime.fromtimestamp(epoch_time, datetime.timezone.utc)
     return dt
 
+def epoch_time_to_datetime64(epoch_time_milli):
+    """
+    Converts array of epoch times in milliseconds into numpy.datetime64[ms] array.
+
+    Args:
+        epoch_time_milli (numpy.array): epoch times in UTC timezone in milliseconds, any byte order
+
+    Returns:
+        (numpy.array): numpy.datetime64[ms] array
+    """
+    # casting to native int64 handles big-endian inputs in one pass
+    return numpy.asarray(epoch_time_milli).astype(numpy.int64).astype('datetime64[ms]')
+
+def datetime64_to_epoch_time(dt64):
+    """
+    Converts array of numpy.datetime64 into epoch times in milliseconds.
+
+    Args:
+        dt64 (numpy.array): numpy.datetime64 array of any unit
+
+    Returns:
+        (numpy.array): epoch times in milliseconds as int64
+    """
+    return numpy.asarray(dt64).astype('datetime64[ms]').astype(numpy.int64)
+
+def datetime64_to_utc_datetime(dt64):
+    """
+    Converts array of numpy.datetime64 into time-zone aware python datetime objects in the UTC timezone.
+
+    Note:
+        This creates one python object per event and should only be used when python datetime objects are
+        explicitly needed. Prefer working with epoch times or numpy.datetime64 arrays.
+
+    Args:
+        dt64 (numpy.array): numpy.datetime64 array of any unit
+
+    Returns:
+        (list): datetime.datetime objects
+    """
+    naive = numpy.asarray(dt64).astype('datetime64[us]').astype(datetime.datetime)
+    return [dt.replace(tzinfo=datetime.timezone.utc) for dt in naive.tolist()]
+
+def epoch_time_to_zmap_time(epoch_time_milli):
+    """
+    Converts array of epoch times in milliseconds into the time columns of the ZMAP format. The conversion uses
+    numpy.datetime64 arithmetic, so no python datetime objects are created.
+
+    Note:
+        Fractional seconds are truncated to be consistent with the integer second column of the CSEP format.
+
+    Args:
+        epoch_time_milli (numpy.array): epoch times in UTC timezone in milliseconds, any byte order
+
+    Returns:
+        (tuple): year, month, day, hour, minute, second as numpy.array of integers
+    """
+    dt = epoch_time_to_datetime64(epoch_time_milli)
+    years = dt.astype('datetime64[Y]')
+    months = dt.astype('datetime64[M]')
+    days = dt.astype('datetime64[D]')
+
+    year = years.astype(numpy.int64) + 1970
+    month = (months - years).astype(numpy.int64) + 1
+    day = (days - months).astype(numpy.int64) + 1
+    milliseconds_of_day = (dt - days).astype(numpy.int64)
+    hour = milliseconds_of_day // 3600000
+    minute = milliseconds_of_day // 60000 % 60
+    second = milliseconds_of_day // 1000 % 60
+    return year, month, day, hour, minute, second
+
+def zmap_time_to_epoch_time(year, month, day, hour, minute, second):
+    """
+    Converts arrays of time columns in ZMAP format into epoch times in milliseconds. The conversion uses
+    numpy.datetime64 arithmetic, so no python datetime objects are created.
+
+    Args:
+        year, month, day, hour, minute (numpy.array): integer time columns
+        second (numpy.array): seconds, can contain fractional seconds
+
+    Returns:
+        (numpy.array): epoch times in milliseconds as int64
+    """
+    year = numpy.asarray(year).astype(numpy.int64)
+    months = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') \
+             + (numpy.asarray(month).astype(numpy.int64) - 1)
+    days = months.astype('datetime64[D]') + (numpy.asarray(day).astype(numpy.int64) - 1)
+    milliseconds_of_day = numpy.asarray(hour).astype(numpy.int64) * 3600000 \
+                          + numpy.asarray(minute).astype(numpy.int64) * 60000 \
+                          + numpy.round(numpy.asarray(second, dtype=numpy.float64) * 1000).astype(numpy.int64)
+    return days.astype('datetime64[ms]').astype(numpy.int64) + milliseconds_of_day
+
+def epoch_time_to_decimal_year(epoch_time_milli):
+    """
+    Converts array of epoch times in milliseconds into decimal years. The fraction of the year accounts for leap
+    years, e.g., 2000-07-02T00:00:00 is 2000.5.
+
+    Args:
+        epoch_time_milli (numpy.array): epoch times in UTC timezone in milliseconds, any byte order
+
+    Returns:
+        (numpy.array): decimal years
+    """
+    dt = epoch_time_to_datetime64(epoch_time_milli)
+    years = dt.astype('datetime64[Y]')
+    start_of_year = years.astype('datetime64[ms]').astype(numpy.int64)
+    end_of_year = (years + 1).astype('datetime64[ms]').astype(numpy.int64)
+    fraction = (dt.astype(numpy.int64) - start_of_year) / (end_of_year - start_of_year)
+    return years.astype(numpy.int64) + 1970 + fraction
+
+def decimal_year_to_epoch_time(decimal_year):
+    """
+    Converts array of decimal years into epoch times in milliseconds. Inverse of epoch_time_to_decimal_year.
+
+    Args:
+        decimal_year (numpy.array): decimal years
+
+    Returns:
+        (numpy.array): epoch times in milliseconds as int64
+    """
+    decimal_year = numpy.asarray(decimal_year, dtype=numpy.float64)
+    year = numpy.floor(decimal_year).astype(numpy.int64)
+    start_of_year = (year - 1970).astype('datetime64[Y]').astype('datetime64[ms]').astype(numpy.int64)
+    end_of_year = (year - 1969).astype('datetime64[Y]').astype('datetime64[ms]').astype(numpy.int64)
+    offset = numpy.round((decimal_year - year) * (end_of_year - start_of_year)).astype(numpy.int64)
+    return start_of_year + offset
+
+def get_time_bin_edges(start_epoch, end_epoch, bin_duration):
+    """
+    Returns edges of time bins of equal duration covering [start_epoch, end_epoch]. Bins include their start and
+    exclude their end.
+
+    Args:
+        start_epoch (int): start of the first bin in milliseconds
+        end_epoch (int): time that must be covered by the last bin in milliseconds
+        bin_duration (int): duration of the bins in milliseconds, e.g., 7*SECONDS_PER_DAY*1000 for weekly bins
+
+    Returns:
+        (numpy.array): bin edges as epoch times in milliseconds
+    """
+    start_epoch = int(start_epoch)
+    bin_duration = int(bin_duration)
+    num_bins = max(int(numpy.ceil((int(end_epoch) - start_epoch + 1) / bin_duration)), 1)
+    return start_epoch + bin_duration * numpy.arange(num_bins + 1, dtype=numpy.int64)
+
 def datetime_to_utc_epoch(dt):
     """
     Converts python datetime.datetime into epoch_time in milliseconds.
 
 
     Args:
-        dt (datetime.datetime): python datetime object, should be naive.
+        dt (datetime.datetime): python datetime object, naive datetimes are assumed to be in UTC.
     """
-    now = datetime.datetime.utcnow()
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
     epoch = datetime.datetime(1970,1,1)
     epoch_time_seconds = (dt - epoch).total_seconds()
     return 1000.0 * epoch_time_seconds
@@ -46,12 +192,18 @@ def timedelta_from_years(time_in_years):
 def zmap_time_to_datetime(year=None, month=None, day=None,
                           hour=None, minute=None, second=None):
     """
-    Converts time in ZMAP format into python datetime object
+    Converts time in ZMAP format into time-zone aware python datetime object in the UTC timezone. For arrays of
+    events use zmap_time_to_epoch_time instead.
+
+    Args:
+        year, month, day, hour, minute (int): time components
+        second (float): seconds, can contain fractional seconds
 
     Returns:
         datetime object
     """
-    pass
+    dt = datetime.datetime(int(year), int(month), int(day), int(hour), int(minute), tzinfo=datetime.timezone.utc)
+    return dt + datetime.timedelta(seconds=float(second))
 
 def strptime_to_utc_datetime(time_string, format):
     """
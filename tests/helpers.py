@@ -0,0 +1,61 @@
+import numpy
+
+from csep.core.catalogs import CSEPCatalog
+from csep.utils.time import epoch_time_to_zmap_time
+
+"""
+Factories of synthetic catalogs shared by the tests.
+"""
+
+
+def make_catalogs(catalog_sizes, seed=0, b_value=None):
+    """
+    Creates catalogs with random events around a region of 3 by 2 cells with spacing 1.
+
+    Args:
+        catalog_sizes (list): number of events in each catalog
+        seed (int): seed of the random number generator
+        b_value (float): if given, magnitudes follow a Gutenberg-Richter distribution above 3.0 and are rounded to 0.1,
+                         otherwise magnitudes are uniform between 3.5 and 6.5
+
+    Returns:
+        (list): CSEPCatalog with catalog_id set to the position in catalog_sizes
+    """
+    rng = numpy.random.RandomState(seed)
+    catalogs = []
+    for i, size in enumerate(catalog_sizes):
+        events = numpy.zeros(size, dtype=CSEPCatalog.csep_dtype)
+        events['longitude'] = rng.uniform(-0.5, 3.5, size)
+        events['latitude'] = rng.uniform(-0.5, 2.5, size)
+        if b_value is None:
+            events['magnitude'] = rng.uniform(3.5, 6.5, size)
+        else:
+            events['magnitude'] = numpy.round(3.0 + rng.exponential(1 / (b_value * numpy.log(10)), size), 1)
+        events['year'] = 2019
+        events['month'] = 7
+        events['day'] = 4
+        catalogs.append(CSEPCatalog(catalog=events, catalog_id=i))
+    return catalogs
+
+
+def make_catalog(epoch_times, catalog_id=0):
+    """
+    Creates catalog with events at epoch_times in milliseconds, truncated to seconds.
+    """
+    events = numpy.zeros(len(epoch_times), dtype=CSEPCatalog.csep_dtype)
+    year, month, day, hour, minute, second = epoch_time_to_zmap_time(numpy.asarray(epoch_times, dtype=numpy.int64))
+    events['year'], events['month'], events['day'] = year, month, day
+    events['hour'], events['minute'], events['second'] = hour, minute, second
+    return CSEPCatalog(catalog=events, catalog_id=catalog_id)
+
+
+def dense_counts(catalog, region):
+    """
+    Brute force counts of a catalog in the cells and magnitude bins of a region.
+    """
+    counts = numpy.zeros((region.num_nodes, len(region.magnitudes)), dtype=numpy.int64)
+    for lon, lat, mw in zip(catalog.get_longitudes(), catalog.get_latitudes(), catalog.get_magnitudes()):
+        for cell, (x, y) in enumerate(region.origins):
+            if x <= lon < x + region.dh and y <= lat < y + region.dh and mw >= region.magnitudes[0]:
+                counts[cell, numpy.searchsorted(region.magnitudes, mw, side='right') - 1] += 1
+    return counts
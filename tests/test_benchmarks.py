@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from benchmarks.run_benchmarks import main
+from benchmarks.synthetic import write_ucerf3_binary
+from csep.core.catalogs import UCERF3Catalog
+
+
+class TestSyntheticUCERF3Binary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'results_complete.bin')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_layout(self):
+        # small chunks, so catalogs are generated over several chunks
+        catalog_sizes = write_ucerf3_binary(self.filename, 50, 2000, chunk_size=300)
+        self.assertEqual(catalog_sizes.sum(), 2000)
+        header_size, event_size = UCERF3Catalog.header_dtype.itemsize, UCERF3Catalog.event_dtype.itemsize
+        self.assertEqual(os.path.getsize(self.filename), 4 + 50 * header_size + 2000 * event_size)
+
+        catalogs = list(UCERF3Catalog.load_catalogs(filename=self.filename))
+        numpy.testing.assert_array_equal([len(catalog.catalog) for catalog in catalogs], catalog_sizes)
+        for catalog in catalogs:
+            numpy.testing.assert_array_equal(catalog.catalog['rupture_id'], numpy.arange(len(catalog.catalog)))
+            self.assertTrue(numpy.all(numpy.diff(catalog.catalog['origin_time']) >= 0))
+            self.assertTrue(numpy.all(catalog.get_magnitudes() >= 2.5))
+
+    def test_run_benchmarks(self):
+        output = os.path.join(self.tmp_dir.name, 'results.json')
+        main(['--preset', 'tiny', '--repeat', '1', '--work-dir', self.tmp_dir.name, '--output', output,
+              '--benchmarks', 'load_catalogs', 'filter_event_set', 'number_test'])
+        with open(output) as f:
+            results = json.load(f)
+        self.assertEqual(results['config']['num_catalogs'], 10)
+        self.assertListEqual(sorted(results['results']), ['filter_event_set', 'load_catalogs', 'number_test'])
+        self.assertGreater(results['results']['load_catalogs']['seconds'], 0)
@@ -0,0 +1,170 @@
+import os
+import time
+import datetime
+import tempfile
+import unittest
+from collections import namedtuple
+
+import numpy
+
+from csep.core.catalogs import ComcatCatalog
+from csep.core.comcat import ComcatCache, search_tiled, eventlist_to_ndarray
+from csep.utils.time import datetime_to_utc_epoch
+
+Event = namedtuple('Event', ['id', 'time', 'latitude', 'longitude', 'depth', 'magnitude'])
+
+
+class MockFetcher:
+    """
+    Returns one event per day from a fixed list of events and records the time windows it was called with. Like
+    ComCat, at most limit events are returned.
+    """
+    def __init__(self, start_time, num_days):
+        self.events = [Event('ev{}'.format(i), start_time + datetime.timedelta(days=i), 34.0, -118.0, 10.0, 3.0 + i / 10)
+                       for i in range(num_days)]
+        self.calls = []
+
+    def __call__(self, start_time=None, end_time=None, limit=20000, **kwargs):
+        self.calls.append((start_time, end_time))
+        return [event for event in self.events if start_time <= event.time <= end_time][:limit]
+
+
+class TestComcatCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.start_time = datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)
+        self.fetcher = MockFetcher(self.start_time, 30)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self, cache, start_day, end_day, min_magnitude=2.5):
+        return ComcatCatalog(start_time=self.start_time + datetime.timedelta(days=start_day),
+                             end_time=self.start_time + datetime.timedelta(days=end_day),
+                             min_magnitude=min_magnitude, fetcher=self.fetcher, cache=cache, max_workers=1)
+
+    def test_without_cache(self):
+        catalog = self.load(None, 0, 10)
+        self.assertEqual(catalog.get_number_of_events(), 11)
+        self.assertEqual(catalog.get_epoch_times()[0], datetime_to_utc_epoch(self.start_time))
+
+    def test_repeated_query_is_not_fetched(self):
+        cache = ComcatCache(self.tmp_dir.name)
+        first = self.load(cache, 0, 10)
+        second = self.load(cache, 2, 5)
+        self.assertEqual(len(self.fetcher.calls), 1)
+        numpy.testing.assert_array_equal(second.catalog, first.catalog[2:6])
+
+    def test_concurrent_writers_use_separate_files(self):
+        cache = ComcatCache(self.tmp_dir.name)
+        self.load(cache, 0, 10)
+        filename = cache._list_entries()[0]
+        # temporary file of another process writing the same entry
+        with open(filename + '.tmp', 'wb') as f:
+            f.write(b'partial')
+        os.remove(filename)
+        self.load(cache, 0, 10)
+        with open(filename + '.tmp', 'rb') as f:
+            self.assertEqual(f.read(), b'partial')
+        self.assertListEqual(sorted(os.listdir(self.tmp_dir.name)),
+                             sorted([os.path.basename(filename), os.path.basename(filename) + '.tmp']))
+        self.assertIsNotNone(cache._read(filename))
+
+    def test_corrupt_entry_is_fetched_again(self):
+        cache = ComcatCache(self.tmp_dir.name)
+        first = self.load(cache, 0, 10)
+        filename = cache._list_entries()[0]
+        with open(filename, 'r+b') as f:
+            f.truncate(30)
+        second = self.load(cache, 0, 10)
+        self.assertEqual(len(self.fetcher.calls), 2)
+        numpy.testing.assert_array_equal(second.catalog, first.catalog)
+        # the entry was replaced and is read from the cache again
+        self.load(cache, 0, 10)
+        self.assertEqual(len(self.fetcher.calls), 2)
+
+    def test_extended_window_fetches_missing_range(self):
+        cache = ComcatCache(self.tmp_dir.name)
+        self.load(cache, 5, 10)
+        catalog = self.load(cache, 0, 15)
+        self.assertEqual(len(self.fetcher.calls), 3)
+        self.assertEqual(self.fetcher.calls[1], (self.start_time, self.start_time + datetime.timedelta(days=5)))
+        self.assertEqual(self.fetcher.calls[2][0], self.start_time + datetime.timedelta(days=10))
+        # events at the boundaries of the windows are only stored once
+        self.assertListEqual(catalog.catalog['id'].tolist(), [event.id.encode() for event in self.fetcher.events[:16]])
+
+    def test_different_query_is_fetched(self):
+        cache = ComcatCache(self.tmp_dir.name)
+        self.load(cache, 0, 10)
+        self.load(cache, 0, 10, min_magnitude=3.5)
+        self.assertEqual(len(self.fetcher.calls), 2)
+
+    def test_ttl(self):
+        cache = ComcatCache(self.tmp_dir.name, ttl=60)
+        self.load(cache, 0, 10)
+        self.load(cache, 0, 10)
+        self.assertEqual(len(self.fetcher.calls), 1)
+        cache.ttl = 0
+        time.sleep(0.01)
+        self.load(cache, 0, 10)
+        self.assertEqual(len(self.fetcher.calls), 2)
+
+    def test_eviction(self):
+        cache = ComcatCache(self.tmp_dir.name)
+        self.load(cache, 0, 10, min_magnitude=2.5)
+        entry_size = os.path.getsize(cache._list_entries()[0])
+        cache.max_bytes = 2 * entry_size
+        self.load(cache, 0, 10, min_magnitude=3.0)
+        self.load(cache, 0, 10, min_magnitude=3.5)
+        self.assertLessEqual(len(cache._list_entries()), 2)
+        # the most recently written entry is kept
+        self.load(cache, 0, 10, min_magnitude=3.5)
+        self.assertEqual(len(self.fetcher.calls), 3)
+
+
+class TestSearchTiled(unittest.TestCase):
+
+    def setUp(self):
+        self.start_time = datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)
+        self.end_time = self.start_time + datetime.timedelta(days=29)
+        self.fetcher = MockFetcher(self.start_time, 30)
+
+    def test_tiles_are_merged(self):
+        events = search_tiled(self.fetcher, self.start_time, self.end_time, ComcatCatalog.comcat_dtype,
+                              num_tiles=7, max_workers=4)
+        self.assertEqual(len(self.fetcher.calls), 7)
+        self.assertListEqual(events['id'].tolist(), [event.id.encode() for event in self.fetcher.events])
+
+    def test_full_tiles_are_split(self):
+        events = search_tiled(self.fetcher, self.start_time, self.end_time, ComcatCatalog.comcat_dtype,
+                              limit=4, num_tiles=2, max_workers=4)
+        self.assertGreater(len(self.fetcher.calls), 2)
+        self.assertListEqual(events['id'].tolist(), [event.id.encode() for event in self.fetcher.events])
+        self.assertTrue(numpy.all(numpy.diff(events['origin_time']) > 0))
+
+    def test_small_window_is_fetched_once(self):
+        events = search_tiled(self.fetcher, self.start_time, self.end_time, ComcatCatalog.comcat_dtype, limit=100)
+        self.assertEqual(len(self.fetcher.calls), 1)
+        self.assertEqual(len(events), 30)
+
+    def test_catalog_is_not_truncated(self):
+        catalog = ComcatCatalog(start_time=self.start_time, end_time=self.end_time, fetcher=self.fetcher, limit=5)
+        self.assertEqual(catalog.get_number_of_events(), 30)
+
+    def test_empty_window(self):
+        events = search_tiled(self.fetcher, self.end_time + datetime.timedelta(days=1),
+                              self.end_time + datetime.timedelta(days=2), ComcatCatalog.comcat_dtype)
+        self.assertEqual(len(events), 0)
+        self.assertEqual(events.dtype, ComcatCatalog.comcat_dtype)
+
+    def test_eventlist_to_ndarray(self):
+        naive = Event('a', datetime.datetime(2019, 7, 4, 17, 33, 49, 120000), 35.7, -117.5, 10.5, 6.4)
+        aware = Event('b', datetime.datetime(2019, 7, 4, 10, 33, 49, 120000,
+                                             tzinfo=datetime.timezone(datetime.timedelta(hours=-7))),
+                      35.7, -117.5, 10.5, 6.4)
+        events = eventlist_to_ndarray([naive, aware], ComcatCatalog.comcat_dtype)
+        self.assertListEqual(events['id'].tolist(), [b'a', b'b'])
+        self.assertEqual(events['origin_time'][0], datetime_to_utc_epoch(naive.time))
+        self.assertEqual(events['origin_time'][1], events['origin_time'][0])
+        self.assertAlmostEqual(events['magnitude'][0], 6.4, places=5)
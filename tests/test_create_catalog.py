@@ -1,7 +1,8 @@
 import unittest
+from unittest import mock
 import numpy
 import pandas
-from csep.core.catalogs import BaseCatalog
+from csep.core.catalogs import BaseCatalog, CSEPCatalog
 
 
 class TestCreateCatalog(unittest.TestCase):
@@ -15,3 +16,53 @@ class TestCreateCatalog(unittest.TestCase):
         catalog = 'failure condition!'
         with self.assertRaises(ValueError):
             BaseCatalog(catalog=catalog)
+
+
+class TestCatalogStats(unittest.TestCase):
+
+    def setUp(self):
+        self.events = numpy.zeros(5, dtype=CSEPCatalog.csep_dtype)
+        self.events['magnitude'] = [2.5, 5.5, 3.0, 4.0, 2.0]
+        self.events['latitude'] = [33.0, 34.0, 35.0, 36.0, 37.0]
+        self.events['longitude'] = [-118.0, -117.0, -116.0, -115.0, -119.0]
+        self.events['year'] = 2019
+        self.events['month'] = 7
+        self.events['day'] = [4, 5, 6, 7, 8]
+
+    def test_stats_are_lazy(self):
+        with mock.patch.object(CSEPCatalog, '_update_catalog_stats', autospec=True,
+                               side_effect=CSEPCatalog._update_catalog_stats) as update:
+            catalog = CSEPCatalog(catalog=self.events)
+            self.assertEqual(update.call_count, 0)
+            self.assertEqual(catalog.max_magnitude, 5.5)
+            self.assertEqual(catalog.min_longitude, -119.0)
+            self.assertEqual(update.call_count, 1)
+
+    def test_stats_are_invalidated(self):
+        catalog = CSEPCatalog(catalog=self.events)
+        self.assertEqual(catalog.max_magnitude, 5.5)
+        catalog.filter('magnitude < 5')
+        self.assertEqual(catalog.max_magnitude, 4.0)
+        self.assertEqual(catalog.start_time.day, 4)
+        self.assertEqual(catalog.end_time.day, 8)
+
+    def test_stats_are_cleared_for_empty_catalog(self):
+        catalog = CSEPCatalog(catalog=self.events)
+        self.assertEqual(catalog.max_magnitude, 5.5)
+        catalog.filter('magnitude > 6')
+        self.assertEqual(catalog.get_number_of_events(), 0)
+        self.assertIsNone(catalog.max_magnitude)
+        self.assertIsNone(catalog.min_latitude)
+        self.assertIsNone(catalog.start_time)
+        self.assertIsNone(catalog.end_time)
+
+    def test_stats_in_chunks(self):
+        catalog = CSEPCatalog(catalog=self.events)
+        catalog._update_catalog_stats(chunk_size=2)
+        self.assertEqual((catalog.min_magnitude, catalog.max_magnitude), (2.0, 5.5))
+        self.assertEqual((catalog.min_latitude, catalog.max_latitude), (33.0, 37.0))
+
+    def test_stats_without_catalog(self):
+        catalog = CSEPCatalog(min_magnitude=2.5)
+        self.assertEqual(catalog.min_magnitude, 2.5)
+        self.assertIsNone(catalog.max_magnitude)
@@ -1,4 +1,6 @@
 import numpy
+import pytest
+
 from csep.core.evaluations import *
 
 class MockCatalog:
@@ -79,3 +81,138 @@ class TestNTest:
         # result = (delta_1, delta_2)... at least, at most
         assert numpy.isclose(result[0], 1.0)
         assert numpy.isclose(result[1], 0.0)
+
+class TestNTestCounts:
+
+    def test_matches_number_test(self):
+        rng = numpy.random.RandomState(0)
+        sim_counts = rng.poisson([5, 20, 50], size=(200, 3))
+        observed_counts = numpy.array([3, 20, 80])
+        delta_1, delta_2 = number_test_counts(sim_counts, observed_counts)
+        for j in range(3):
+            sets = [MockCatalog(val) for val in sim_counts[:, j]]
+            (expected_1, expected_2), _ = number_test(sets, MockCatalog(observed_counts[j]))
+            assert numpy.isclose(delta_1[j], expected_1)
+            assert numpy.isclose(delta_2[j], expected_2)
+            assert numpy.isclose(delta_1[j], numpy.mean(sim_counts[:, j] >= observed_counts[j]))
+            assert numpy.isclose(delta_2[j], numpy.mean(sim_counts[:, j] <= observed_counts[j]))
+
+    def test_single_condition(self):
+        delta_1, delta_2 = number_test_counts([0, 1, 1, 2], 1)
+        assert numpy.isclose(delta_1, 0.75)
+        assert numpy.isclose(delta_2, 0.75)
+
+    def test_empty_event_set(self):
+        for sim_counts, observed_counts in (([], 1), (numpy.zeros((0, 3)), [1, 2, 3])):
+            with pytest.raises(ValueError, match='at least one catalog'):
+                number_test_counts(sim_counts, observed_counts)
+
+
+class TestMagnitudeTest:
+
+    @staticmethod
+    def reference_ks(data1, data2, mws):
+        """
+        Discretized KS test from notes/m_test_notes.ipynb evaluated at shared magnitude bins.
+        """
+        from csep.utils.stats import less_equal_ecdf
+        from scipy.stats import kstwobign
+        cdf1 = numpy.array([less_equal_ecdf(data1, mw) for mw in mws])
+        cdf2 = numpy.array([less_equal_ecdf(data2, mw) for mw in mws])
+        d = numpy.max(numpy.absolute(cdf1 - cdf2))
+        en = numpy.sqrt(len(data1) * len(data2) / (len(data1) + len(data2)))
+        return d, kstwobign.sf((en + 0.12 + 0.11 / en) * d)
+
+    def test_matches_reference(self):
+        # magnitudes are not discretized, so no magnitude is on the edge of a bin
+        from csep.core.catalogs import CSEPCatalog, StochasticEventSet
+        from scipy.stats import chi2
+        rng = numpy.random.RandomState(1)
+        catalogs = []
+        for i, size in enumerate([40, 0, 25, 60]):
+            events = numpy.zeros(size, dtype=CSEPCatalog.csep_dtype)
+            events['magnitude'] = 4.0 + rng.exponential(0.5, size)
+            catalogs.append(CSEPCatalog(catalog=events, catalog_id=i))
+        obs_events = numpy.zeros(30, dtype=CSEPCatalog.csep_dtype)
+        obs_events['magnitude'] = 4.0 + rng.exponential(0.4, 30)
+        observation = CSEPCatalog(catalog=obs_events)
+
+        d, p_values, combined = magnitude_test(catalogs, observation, dmw=0.1)
+        all_mws = numpy.concatenate([obs_events['magnitude']] + [c.get_magnitudes() for c in catalogs]).astype(float)
+        mws = numpy.arange(all_mws.min(), all_mws.max() + 0.2, 0.1)
+        for i, catalog in enumerate(catalogs):
+            if catalog.get_number_of_events() == 0:
+                assert numpy.isnan(d[i]) and numpy.isnan(p_values[i])
+                continue
+            expected_d, expected_p = self.reference_ks(catalog.get_magnitudes(), observation.get_magnitudes(), mws)
+            assert numpy.isclose(d[i], expected_d)
+            assert numpy.isclose(p_values[i], expected_p)
+        valid = p_values[~numpy.isnan(p_values)]
+        assert numpy.isclose(combined, chi2.sf(-2 * numpy.sum(numpy.log(valid)), 2 * len(valid)))
+
+        # stochastic event sets are binned without iterating over catalogs
+        result = magnitude_test(StochasticEventSet.from_catalogs(catalogs), observation, dmw=0.1)
+        numpy.testing.assert_allclose(result[1], p_values)
+
+    def test_identical_discretized_magnitudes(self):
+        from csep.core.catalogs import CSEPCatalog
+        events = numpy.zeros(5, dtype=CSEPCatalog.csep_dtype)
+        events['magnitude'] = [4.0, 4.1, 4.1, 4.3, 5.7]
+        catalog = CSEPCatalog(catalog=events)
+        d, p_values, combined = magnitude_test([catalog, catalog], CSEPCatalog(catalog=events.copy()))
+        numpy.testing.assert_array_equal(d, [0.0, 0.0])
+        numpy.testing.assert_allclose(p_values, [1.0, 1.0])
+
+
+class TestSpatialTests:
+
+    def setup_method(self):
+        from csep.core.forecasts import SpaceMagnitudeCounts
+        from csep.core.regions import Region
+        from tests.helpers import make_catalogs
+        origins = [(0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (2, 1)]
+        self.region = Region(origins, 1.0, magnitudes=[4.0, 5.0, 6.0])
+        self.catalogs = make_catalogs([50, 0, 120, 7, 33, 80])
+        self.observation = make_catalogs([40], seed=1)[0]
+        self.counts = SpaceMagnitudeCounts.from_catalogs(self.catalogs, self.region)
+
+    def cells(self, catalog):
+        cells = catalog.get_spatial_idx(self.region)
+        return cells[(cells >= 0) & (catalog.get_magnitudes() >= 4.0)]
+
+    def test_spatial_test(self):
+        rates = numpy.zeros(self.region.num_nodes)
+        for catalog in self.catalogs:
+            numpy.add.at(rates, self.cells(catalog), 1)
+        pdf = rates / rates.sum()
+        expected = [numpy.mean(numpy.log(pdf[self.cells(c)])) if len(self.cells(c)) else numpy.nan
+                    for c in self.catalogs]
+        observed = numpy.mean(numpy.log(pdf[self.cells(self.observation)]))
+
+        quantile, observed_score, sim_scores = spatial_test(self.counts, self.observation)
+        numpy.testing.assert_allclose(sim_scores, expected)
+        assert numpy.isclose(observed_score, observed)
+        assert numpy.isclose(quantile, numpy.mean(numpy.array(expected)[[0, 2, 3, 4, 5]] <= observed))
+
+    def test_pseudo_likelihood_test(self):
+        rates = numpy.zeros(self.region.num_nodes)
+        for catalog in self.catalogs:
+            numpy.add.at(rates, self.cells(catalog), 1)
+        rates /= len(self.catalogs)
+        expected = [numpy.sum(numpy.log(rates[self.cells(c)])) - rates.sum() for c in self.catalogs]
+
+        quantile, observed_score, sim_scores = pseudo_likelihood_test(self.counts, self.observation)
+        numpy.testing.assert_allclose(sim_scores, expected)
+        assert numpy.isclose(observed_score, numpy.sum(numpy.log(rates[self.cells(self.observation)])) - rates.sum())
+        assert numpy.isclose(quantile, numpy.mean(numpy.array(expected) <= observed_score))
+
+    def test_zero_rate_cells(self):
+        from csep.core.forecasts import SpaceMagnitudeCounts
+        # simulated events only in the first row of cells
+        for catalog in self.catalogs:
+            catalog.catalog['latitude'] = numpy.minimum(catalog.catalog['latitude'], 0.5)
+        counts = SpaceMagnitudeCounts.from_catalogs(self.catalogs, self.region)
+        quantile, observed_score, sim_scores = spatial_test(counts, self.observation)
+        assert observed_score == -numpy.inf
+        assert quantile == 0.0
+        assert numpy.all(numpy.isfinite(sim_scores[[0, 2, 3, 4, 5]]))
@@ -0,0 +1,109 @@
+import unittest
+
+import numpy
+
+from csep.core.catalogs import CSEPCatalog, ComcatCatalog
+from csep.core.filters import FilterExpression, compile_filter
+from csep.utils.time import epoch_time_to_zmap_time
+
+
+class TestFilterExpression(unittest.TestCase):
+
+    def setUp(self):
+        self.events = numpy.zeros(6, dtype=ComcatCatalog.comcat_dtype)
+        self.events['id'] = [b'a', b'b', b'c', b'd', b'e', b'f']
+        self.events['magnitude'] = [2.5, 3.0, 3.5, 4.0, 4.5, 5.0]
+        self.events['depth'] = [1.0, 25.0, 10.0, 40.0, 5.0, 15.0]
+        # 2019-07-04 00:00:00 plus one day for each event
+        self.events['origin_time'] = 1562198400000 + 86400000 * numpy.arange(6)
+
+    def assertMask(self, statement, expected):
+        mask = FilterExpression(statement).mask(self.events)
+        self.assertListEqual(mask.tolist(), expected)
+
+    def test_single_comparison(self):
+        self.assertMask('magnitude > 3.5', [False, False, False, True, True, True])
+        self.assertMask('magnitude <= 3.5', [True, True, True, False, False, False])
+        self.assertMask('magnitude == 4', [False, False, False, True, False, False])
+
+    def test_and_or(self):
+        self.assertMask('magnitude >= 3.0 and depth < 20', [False, False, True, False, True, True])
+        self.assertMask('magnitude < 3.0 or depth > 30', [True, False, False, True, False, False])
+        self.assertMask('(magnitude < 3.0 or depth > 30) and not magnitude < 3',
+                        [False, False, False, True, False, False])
+
+    def test_between(self):
+        self.assertMask('depth between 5 and 15', [False, False, True, False, True, True])
+
+    def test_in(self):
+        self.assertMask("id in ('a', 'c')", [True, False, True, False, False, False])
+        self.assertMask("id not in ('a', 'c')", [False, True, False, True, True, True])
+
+    def test_time(self):
+        self.assertMask("time >= '2019-07-05' and time < '2019-07-07'", [False, True, True, False, False, False])
+
+    def test_time_on_csep_catalog(self):
+        events = numpy.zeros(6, dtype=CSEPCatalog.csep_dtype)
+        events['magnitude'] = self.events['magnitude']
+        year, month, day, hour, minute, second = epoch_time_to_zmap_time(self.events['origin_time'])
+        events['year'], events['month'], events['day'] = year, month, day
+        catalog = CSEPCatalog(catalog=events)
+        catalog.filter("time between '2019-07-05' and '2019-07-06'")
+        self.assertListEqual(catalog.get_magnitudes().tolist(), [3.0, 3.5])
+
+    def test_invalid_statement(self):
+        for statement in ('magnitude >', 'magnitude 4.0', '(magnitude > 4.0', 'magnitude > 4.0 depth'):
+            with self.assertRaises(ValueError):
+                FilterExpression(statement)
+
+    def test_compiled_once(self):
+        self.assertIs(compile_filter('magnitude > 4.0'), compile_filter('magnitude > 4.0'))
+
+
+class TestCatalogFilter(unittest.TestCase):
+
+    def test_compound_filter(self):
+        events = numpy.zeros(4, dtype=CSEPCatalog.csep_dtype)
+        events['magnitude'] = [3.0, 4.0, 5.0, 6.0]
+        events['depth'] = [5.0, 30.0, 10.0, 15.0]
+        events['year'] = 2019
+        events['month'] = 7
+        events['day'] = 4
+        catalog = CSEPCatalog(catalog=events).filter('magnitude > 3.5 and depth < 20')
+        self.assertListEqual(catalog.get_magnitudes().tolist(), [5.0, 6.0])
+        self.assertEqual(catalog.min_magnitude, 5.0)
+
+    def test_filter_view(self):
+        events = numpy.zeros(4, dtype=CSEPCatalog.csep_dtype)
+        events['magnitude'] = [3.0, 4.0, 5.0, 6.0]
+        events['depth'] = [5.0, 30.0, 10.0, 15.0]
+        events['year'] = 2019
+        events['month'] = 7
+        events['day'] = 4
+        catalog = CSEPCatalog(catalog=events)
+        self.assertEqual(catalog.max_magnitude, 6.0)
+
+        views = [catalog.filter('magnitude >= {}'.format(mw), in_place=False) for mw in (4.0, 5.0, 7.0)]
+        self.assertListEqual([view.get_number_of_events() for view in views], [3, 2, 0])
+        self.assertListEqual(views[1].get_magnitudes().tolist(), [5.0, 6.0])
+        self.assertEqual(views[0].min_magnitude, 4.0)
+
+        # statistics of an empty view are not inherited from the parent
+        self.assertIsNone(views[2].max_magnitude)
+        self.assertIsNone(views[2].start_time)
+
+        # parent is not modified and views share its events
+        self.assertEqual(catalog.get_number_of_events(), 4)
+        self.assertEqual(catalog.min_magnitude, 3.0)
+        self.assertIs(views[0]._catalog, catalog.catalog)
+
+        # filtering a view combines the masks
+        view = views[0].filter('depth < 20', in_place=False)
+        self.assertListEqual(view.get_magnitudes().tolist(), [5.0, 6.0])
+        view.filter('magnitude > 5')
+        self.assertListEqual(view.get_magnitudes().tolist(), [6.0])
+
+        view.compact()
+        self.assertIsNone(view._mask)
+        self.assertEqual(len(view.catalog), 1)
+        self.assertListEqual(views[0].get_magnitudes().tolist(), [4.0, 5.0, 6.0])
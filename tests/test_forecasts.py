@@ -0,0 +1,74 @@
+import pickle
+import unittest
+
+import numpy
+
+from csep.core.catalogs import StochasticEventSet
+from csep.core.forecasts import SpaceMagnitudeCounts, ExpectedRatesAccumulator
+from csep.core.regions import Region
+from tests.helpers import make_catalogs, dense_counts
+
+
+class TestSpaceMagnitudeCounts(unittest.TestCase):
+
+    def setUp(self):
+        # cell (2, 1) is missing from the grid
+        origins = [(0, 0), (1, 0), (2, 0), (0, 1), (1, 1)]
+        self.region = Region(origins, 1.0, magnitudes=[4.0, 5.0, 6.0])
+        self.catalogs = make_catalogs([50, 0, 120, 7])
+        self.expected = numpy.array([dense_counts(catalog, self.region) for catalog in self.catalogs])
+
+    def test_streaming(self):
+        counts = SpaceMagnitudeCounts.from_catalogs(iter(self.catalogs), self.region)
+        self.assertEqual(counts.shape, (4, 5, 3))
+        for i in range(len(self.catalogs)):
+            numpy.testing.assert_array_equal(counts.get_catalog_counts(i), self.expected[i])
+        self.assertEqual(counts.bins.dtype, numpy.int32)
+        self.assertEqual(len(counts.bins), numpy.count_nonzero(self.expected))
+
+    def test_event_set(self):
+        streamed = SpaceMagnitudeCounts.from_catalogs(self.catalogs, self.region)
+        counts = SpaceMagnitudeCounts.from_catalogs(StochasticEventSet.from_catalogs(self.catalogs), self.region)
+        numpy.testing.assert_array_equal(counts.offsets, streamed.offsets)
+        numpy.testing.assert_array_equal(counts.bins, streamed.bins)
+        numpy.testing.assert_array_equal(counts.counts, streamed.counts)
+
+    def test_marginals(self):
+        counts = SpaceMagnitudeCounts.from_catalogs(self.catalogs, self.region)
+        numpy.testing.assert_array_equal(counts.get_number_of_events(), self.expected.sum(axis=(1, 2)))
+        numpy.testing.assert_array_equal(counts.get_spatial_counts(), self.expected.sum(axis=2))
+        numpy.testing.assert_array_equal(counts.get_magnitude_counts(), self.expected.sum(axis=1))
+        numpy.testing.assert_allclose(counts.get_rates(), self.expected.mean(axis=0))
+        numpy.testing.assert_allclose(counts.get_spatial_rates(), self.expected.sum(axis=2).mean(axis=0))
+
+
+class TestExpectedRatesAccumulator(unittest.TestCase):
+
+    def setUp(self):
+        origins = [(0, 0), (1, 0), (2, 0), (0, 1), (1, 1)]
+        self.region = Region(origins, 1.0, magnitudes=[4.0, 5.0, 6.0])
+        self.catalogs = make_catalogs([50, 0, 120, 7, 33])
+        self.expected = numpy.array([dense_counts(catalog, self.region) for catalog in self.catalogs]).mean(axis=0)
+
+    def test_streaming(self):
+        forecast = ExpectedRatesAccumulator(self.region).add_catalogs(iter(self.catalogs)).get_forecast(name='test')
+        numpy.testing.assert_allclose(forecast.data, self.expected)
+        self.assertAlmostEqual(forecast.sum(), self.expected.sum())
+        numpy.testing.assert_allclose(forecast.spatial_counts(), self.expected.sum(axis=1))
+
+    def test_event_set(self):
+        accumulator = ExpectedRatesAccumulator(self.region)
+        accumulator.add_catalogs(StochasticEventSet.from_catalogs(self.catalogs))
+        self.assertEqual(accumulator.num_catalogs, 5)
+        numpy.testing.assert_allclose(accumulator.get_forecast().data, self.expected)
+
+    def test_merge(self):
+        first = ExpectedRatesAccumulator(self.region).add_catalogs(self.catalogs[:2])
+        second = ExpectedRatesAccumulator(self.region).add_catalogs(self.catalogs[2:])
+        # accumulators are sent between processes by pickling
+        second = pickle.loads(pickle.dumps(second))
+        numpy.testing.assert_allclose(first.merge(second).get_forecast().data, self.expected)
+
+        other_region = Region([(0, 0)], 1.0, magnitudes=[4.0, 5.0, 6.0])
+        with self.assertRaises(ValueError):
+            first.merge(ExpectedRatesAccumulator(other_region))
@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# generous budget, importing pandas, scipy.stats and matplotlib alone takes more than a second
+IMPORT_BUDGET_SECONDS = 1.0
+
+SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+print(json.dumps({{'seconds': t1 - t0, 'modules': sorted(m for m in ('matplotlib', 'pandas', 'scipy') if m in sys.modules)}}))
+"""
+
+
+def import_in_subprocess(module):
+    # fresh interpreter, so modules imported by other tests do not hide regressions
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT.format(module=module)])
+    return json.loads(output.decode('utf-8').splitlines()[-1])
+
+
+@pytest.mark.parametrize('module', ['csep', 'csep.core.catalogs', 'csep.core.evaluations'])
+def test_import_is_lazy(module):
+    result = import_in_subprocess(module)
+    assert result['modules'] == []
+    assert result['seconds'] < IMPORT_BUDGET_SECONDS
+
+
+def test_lazy_attributes():
+    import csep
+    from csep.core.catalogs import CSEPCatalog
+    assert csep.CSEPCatalog is CSEPCatalog
+    with pytest.raises(AttributeError):
+        csep.does_not_exist
+
+
+def test_star_import_and_dir():
+    import csep
+    namespace = {}
+    exec('from csep import *', namespace)
+    for name in ('BaseCatalog', 'CSEPCatalog', 'UCERF3Catalog', 'ComcatCatalog', 'StochasticEventSet',
+                 'load_stochastic_event_set', 'load_catalog'):
+        assert name in namespace
+        assert name in dir(csep)
+    assert namespace['CSEPCatalog'] is csep.CSEPCatalog
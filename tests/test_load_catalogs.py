@@ -0,0 +1,171 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import csep
+
+from csep.core.catalogs import UCERF3Catalog, CSEPCatalog
+from csep.utils.time import epoch_time_to_utc_datetime
+
+from benchmarks.synthetic import generate_catalogs, write_catalogs
+
+
+class TestLoadUCERF3Catalogs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'results_complete.bin')
+        self.catalog_sizes = [5, 0, 12, 3]
+        # flat magnitude distribution, so the magnitude filters of the tests keep some events
+        magnitudes = {'min_mw': 3.5, 'b_value': 0.5}
+        self.expected = list(generate_catalogs(self.catalog_sizes, **magnitudes))
+        write_catalogs(self.filename, self.catalog_sizes, **magnitudes)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_catalogs(self):
+        catalogs = list(UCERF3Catalog.load_catalogs(filename=self.filename))
+        self.assertEqual(len(catalogs), len(self.catalog_sizes))
+        for catalog, expected in zip(catalogs, self.expected):
+            numpy.testing.assert_array_equal(catalog.catalog, expected)
+
+    def test_load_catalogs_memmap(self):
+        catalogs = list(UCERF3Catalog.load_catalogs(filename=self.filename, use_memmap=True))
+        self.assertEqual(len(catalogs), len(self.catalog_sizes))
+        for catalog_id, (catalog, expected) in enumerate(zip(catalogs, self.expected)):
+            self.assertEqual(catalog.catalog_id, catalog_id)
+            self.assertFalse(catalog.catalog.flags.owndata)
+            numpy.testing.assert_array_equal(catalog.catalog, expected)
+
+    def test_memmap_catalogs_are_read_only(self):
+        catalog = next(UCERF3Catalog.load_catalogs(filename=self.filename, use_memmap=True))
+        with self.assertRaises(ValueError):
+            catalog.catalog['magnitude'][0] = 0.0
+
+    def test_load_catalogs_by_id(self):
+        for use_memmap in (False, True):
+            catalogs = list(UCERF3Catalog.load_catalogs(filename=self.filename, catalog_ids=[3, 0, 1],
+                                                        use_memmap=use_memmap))
+            self.assertEqual([catalog.catalog_id for catalog in catalogs], [3, 0, 1])
+            for catalog in catalogs:
+                numpy.testing.assert_array_equal(catalog.catalog, self.expected[catalog.catalog_id])
+
+    def test_load_catalogs_with_invalid_id(self):
+        for catalog_ids in ([-1], [0, 4]):
+            with self.assertRaises(ValueError):
+                list(UCERF3Catalog.load_catalogs(filename=self.filename, catalog_ids=catalog_ids))
+            with self.assertRaises(ValueError):
+                UCERF3Catalog.load_event_set(self.filename, catalog_ids=catalog_ids)
+
+    def test_load_catalogs_by_slice(self):
+        catalogs = list(csep.load_stochastic_event_set(type='ucerf3', filename=self.filename,
+                                                       catalog_ids=slice(1, None)))
+        self.assertEqual([catalog.catalog_id for catalog in catalogs], [1, 2, 3])
+        numpy.testing.assert_array_equal(catalogs[1].catalog, self.expected[2])
+
+    def test_load_catalogs_with_predicates(self):
+        time_window = (709732655000 + 3000000000, 709732655000 + 20000000000)
+        bounding_box = (-122.0, -116.0, 33.0, 41.0)
+        for use_memmap in (False, True):
+            catalogs = list(UCERF3Catalog.load_catalogs(filename=self.filename, use_memmap=use_memmap,
+                                                        magnitude_range=(3.95, None), time_window=time_window,
+                                                        bounding_box=bounding_box, depth_range=(None, 20.0)))
+            self.assertEqual(len(catalogs), len(self.catalog_sizes))
+            for catalog, expected in zip(catalogs, self.expected):
+                mask = (expected['magnitude'] >= 3.95) \
+                       & (expected['origin_time'] >= time_window[0]) & (expected['origin_time'] < time_window[1]) \
+                       & (expected['longitude'] >= -122.0) & (expected['longitude'] <= -116.0) \
+                       & (expected['latitude'] >= 33.0) & (expected['latitude'] <= 41.0) \
+                       & (expected['depth'] <= 20.0)
+                numpy.testing.assert_array_equal(catalog.catalog, expected[mask])
+
+    def test_load_stochastic_event_set_with_predicates(self):
+        catalogs = list(csep.load_stochastic_event_set(type='ucerf3', filename=self.filename, catalog_ids=[2],
+                                                       magnitude_range=(5.0, 6.0)))
+        magnitudes = catalogs[0].get_magnitudes()
+        self.assertTrue(numpy.all((magnitudes >= 5.0) & (magnitudes <= 6.0)))
+        self.assertEqual(len(magnitudes), numpy.sum((self.expected[2]['magnitude'] >= 5.0)
+                                                    & (self.expected[2]['magnitude'] <= 6.0)))
+
+
+class TestCatalogIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'results_complete.bin')
+        self.index_filename = self.filename + '.index.npz'
+        write_catalogs(self.filename, [5, 0, 12])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_index_offsets(self):
+        index = UCERF3Catalog.load_catalog_index(self.filename)
+        header_size = UCERF3Catalog.header_dtype.itemsize
+        event_size = UCERF3Catalog.event_dtype.itemsize
+        self.assertListEqual(index['catalog_size'].tolist(), [5, 0, 12])
+        self.assertListEqual(index['offset'].tolist(), [4 + header_size,
+                                                        4 + 2*header_size + 5*event_size,
+                                                        4 + 3*header_size + 5*event_size])
+        self.assertTrue(os.path.isfile(self.index_filename))
+
+    def test_index_is_reused(self):
+        UCERF3Catalog.load_catalog_index(self.filename)
+        mtime = os.stat(self.index_filename).st_mtime_ns
+        UCERF3Catalog.load_catalog_index(self.filename)
+        self.assertEqual(os.stat(self.index_filename).st_mtime_ns, mtime)
+
+    def test_index_is_rebuilt_when_file_changes(self):
+        UCERF3Catalog.load_catalog_index(self.filename)
+        write_catalogs(self.filename, [1, 2])
+        index = UCERF3Catalog.load_catalog_index(self.filename)
+        self.assertListEqual(index['catalog_size'].tolist(), [1, 2])
+
+    def test_corrupt_index_is_rebuilt(self):
+        UCERF3Catalog.load_catalog_index(self.filename)
+        with open(self.index_filename, 'r+b') as f:
+            f.truncate(20)
+        index = UCERF3Catalog.load_catalog_index(self.filename)
+        self.assertListEqual(index['catalog_size'].tolist(), [5, 0, 12])
+        # the rebuilt index replaces the corrupt file and no temporary files are left behind
+        index = UCERF3Catalog.load_catalog_index(self.filename)
+        self.assertListEqual(index['catalog_size'].tolist(), [5, 0, 12])
+        self.assertListEqual(sorted(os.listdir(self.tmp_dir.name)),
+                             ['results_complete.bin', 'results_complete.bin.index.npz'])
+
+
+class TestCSEPFormat(unittest.TestCase):
+
+    def test_ucerf3_to_csep_format(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'results_complete.bin')
+            expected = next(generate_catalogs([20]))
+            write_catalogs(filename, [20])
+            catalog = next(csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filename))
+
+        self.assertIsInstance(catalog, CSEPCatalog)
+        csep_catalog = catalog.catalog
+        numpy.testing.assert_allclose(csep_catalog['magnitude'], expected['magnitude'], rtol=1e-6)
+        numpy.testing.assert_allclose(csep_catalog['longitude'], expected['longitude'], rtol=1e-6)
+        numpy.testing.assert_allclose(csep_catalog['depth'], expected['depth'], rtol=1e-6)
+        for event, origin_time in zip(csep_catalog, expected['origin_time']):
+            dt = epoch_time_to_utc_datetime(origin_time)
+            self.assertEqual((event['year'], event['month'], event['day'],
+                              event['hour'], event['minute'], event['second']),
+                             (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second))
+
+    def test_csep_epoch_times(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'results_complete.bin')
+            expected = next(generate_catalogs([20]))
+            write_catalogs(filename, [20])
+            catalog = next(csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filename))
+
+        # csep format stores integer seconds
+        numpy.testing.assert_array_equal(catalog.get_epoch_times(), expected['origin_time'] // 1000 * 1000)
+        df = catalog.get_dataframe()
+        self.assertEqual(df['datetime'].iloc[0], catalog.get_datetimes()[0])
+        self.assertEqual(catalog.start_time, epoch_time_to_utc_datetime(expected['origin_time'].min() // 1000 * 1000))
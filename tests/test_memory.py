@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+import pytest
+
+import csep
+from benchmarks.memory import PIPELINES, measure_peak_memory
+from benchmarks.synthetic import write_ucerf3_binary
+
+# event sets with the same number of events per catalog, the large one has 16 times more catalogs and events
+NUM_CATALOGS = (50, 800)
+EVENTS_PER_CATALOG = 500
+
+# peak memory may grow at most with the square root of the number of catalogs
+MAX_GROWTH = (NUM_CATALOGS[1] / NUM_CATALOGS[0]) ** 0.5
+
+# absolute budget for the small event set, about 6 MB of events are streamed through every pipeline of the large one
+BUDGET_BYTES = 4 * 1024 * 1024
+
+
+@pytest.fixture(scope='module')
+def event_sets():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filenames = []
+        for num_catalogs in NUM_CATALOGS:
+            filename = os.path.join(tmp_dir, 'results_complete_{}.bin'.format(num_catalogs))
+            write_ucerf3_binary(filename, num_catalogs, num_catalogs * EVENTS_PER_CATALOG)
+            filenames.append(filename)
+        observation = next(csep.load_stochastic_event_set(type='ucerf3', format='csep', filename=filenames[0]))
+        yield filenames, observation
+
+
+@pytest.mark.parametrize('name', sorted(PIPELINES))
+def test_peak_memory_is_sublinear(event_sets, name):
+    filenames, observation = event_sets
+    pipeline = PIPELINES[name]
+    # warm up, so lazy imports and caches are not counted
+    pipeline(filenames[0], observation)
+
+    peaks = [measure_peak_memory(pipeline, filename, observation)[1] for filename in filenames]
+    assert peaks[0] < BUDGET_BYTES, '{} used {} bytes'.format(name, peaks[0])
+    assert peaks[1] < MAX_GROWTH * peaks[0], '{} used {} and {} bytes'.format(name, *peaks)
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy
+import scipy.stats
+
+from csep.core.catalogs import StochasticEventSet
+from csep.core.mfd import MagnitudeFrequencyDistribution
+from tests.helpers import make_catalogs
+
+
+class TestMagnitudeFrequencyDistribution(unittest.TestCase):
+
+    def setUp(self):
+        self.catalogs = make_catalogs([200, 0, 2, 500, 80], b_value=1.0)
+
+    def test_histogram(self):
+        mfd = MagnitudeFrequencyDistribution.from_catalogs(self.catalogs, delta_mw=0.1)
+        self.assertEqual(mfd.counts.shape[0], len(self.catalogs))
+        for i, catalog in enumerate(self.catalogs):
+            magnitudes = catalog.get_magnitudes()
+            for j, (lower, upper) in enumerate(zip(mfd.bin_edges[:-1], mfd.bin_edges[1:])):
+                self.assertEqual(mfd.counts[i, j], numpy.sum((magnitudes > lower) & (magnitudes <= upper)))
+        numpy.testing.assert_array_equal(mfd.get_cumulative_counts()[:, 0], [200, 0, 2, 500, 80])
+
+    def test_streaming_and_event_set(self):
+        expected = MagnitudeFrequencyDistribution.from_catalogs(self.catalogs, delta_mw=0.1)
+        min_mw, max_mw = expected.magnitudes[0], expected.bin_edges[-1]
+        streamed = MagnitudeFrequencyDistribution.from_catalogs(iter(self.catalogs), delta_mw=0.1,
+                                                               min_mw=min_mw, max_mw=max_mw)
+        numpy.testing.assert_array_equal(streamed.counts[:, :expected.counts.shape[1]], expected.counts)
+        event_set = MagnitudeFrequencyDistribution.from_catalogs(StochasticEventSet.from_catalogs(self.catalogs),
+                                                                delta_mw=0.1)
+        numpy.testing.assert_array_equal(event_set.counts, expected.counts)
+
+    def test_fit_matches_lstsq(self):
+        mfd = MagnitudeFrequencyDistribution.from_catalogs(self.catalogs, delta_mw=0.2)
+        fit = mfd.fit_gutenberg_richter(p_value=0.05)
+        x = mfd.magnitudes
+        for i, cumulative in enumerate(mfd.get_cumulative_counts()):
+            nonzero = cumulative > 0
+            if numpy.count_nonzero(nonzero) < 3:
+                self.assertTrue(numpy.isnan(fit['b'][i]))
+                continue
+            G = numpy.vstack([numpy.ones(numpy.count_nonzero(nonzero)), x[nonzero]]).T
+            a, b = numpy.linalg.lstsq(G, numpy.log10(cumulative[nonzero]), rcond=None)[0]
+            self.assertAlmostEqual(fit['a'][i], a)
+            self.assertAlmostEqual(fit['b'][i], b)
+            n = numpy.count_nonzero(nonzero)
+            self.assertAlmostEqual(fit['t_stat'][i], scipy.stats.t.ppf(0.975, n - 2))
+            self.assertTrue(numpy.all(fit['lower_ci'][i] < fit['N_est'][i]))
+            self.assertTrue(numpy.all(fit['upper_ci'][i] > fit['N_est'][i]))
+        # magnitudes are drawn with b-value of about 1
+        self.assertAlmostEqual(fit['b'][3], -1.0, delta=0.2)
+
+    def test_envelope(self):
+        mfd = MagnitudeFrequencyDistribution.from_catalogs(self.catalogs, delta_mw=0.1)
+        lower, median, upper = mfd.get_envelope(percentiles=(5, 50, 95))
+        numpy.testing.assert_allclose(median, numpy.median(mfd.get_cumulative_counts(), axis=0))
+        self.assertTrue(numpy.all(lower <= upper))
+
+    def test_catalog_mfd(self):
+        catalog = self.catalogs[3]
+        mfd = catalog.get_mfd(delta_mw=0.3)
+        self.assertEqual(mfd['counts'].iloc[0], catalog.get_number_of_events())
+        self.assertTrue(numpy.all(numpy.diff(mfd['counts'].values) <= 0))
+        self.assertLess(mfd['b'].iloc[0], 0)
+        x = numpy.array(mfd.index.categories.mid)
+        self.assertAlmostEqual(x[0], catalog.min_magnitude, places=5)
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy
+
+from csep.core.catalogs import StochasticEventSet
+from csep.utils.plotting import get_cumulative_events_versus_time, get_magnitude_versus_time_raster
+from tests.helpers import make_catalog
+
+
+class TestCumulativeEventsVersusTime(unittest.TestCase):
+
+    def setUp(self):
+        rng = numpy.random.RandomState(0)
+        # 2019-01-01 plus up to 60 days, truncated to seconds
+        start = 1546300800000
+        self.catalogs = [make_catalog(start + 1000 * rng.randint(0, 60 * 86400, size), catalog_id=i)
+                         for i, size in enumerate([30, 0, 55, 12, 40])]
+        self.observation = make_catalog(start + 1000 * rng.randint(0, 60 * 86400, 25))
+
+    def test_percentiles(self):
+        week = 7 * 86400 * 1000
+        bin_edges, obs_cumulative, sim_percentiles = get_cumulative_events_versus_time(
+            iter(self.catalogs), self.observation, bin_duration=week, percentiles=(5, 50, 95))
+        obs_times = self.observation.get_epoch_times()
+        self.assertEqual(bin_edges[0], obs_times.min())
+        self.assertGreater(bin_edges[-1], obs_times.max())
+        self.assertTrue(numpy.all(numpy.diff(bin_edges) == week))
+        numpy.testing.assert_array_equal(obs_cumulative, [numpy.sum(obs_times < edge) for edge in bin_edges[1:]])
+
+        sim_cumulative = numpy.array([[numpy.sum((c.get_epoch_times() >= bin_edges[0]) & (c.get_epoch_times() < edge))
+                                       for edge in bin_edges[1:]] for c in self.catalogs])
+        numpy.testing.assert_allclose(sim_percentiles, numpy.percentile(sim_cumulative, (5, 50, 95), axis=0))
+
+        # stochastic event sets are binned at once
+        result = get_cumulative_events_versus_time(StochasticEventSet.from_catalogs(self.catalogs), self.observation,
+                                                   bin_duration=week, percentiles=(5, 50, 95))
+        numpy.testing.assert_allclose(result[2], sim_percentiles)
+
+
+class TestMagnitudeVersusTimeRaster(unittest.TestCase):
+
+    def test_density(self):
+        rng = numpy.random.RandomState(1)
+        epoch_times = 1546300800000 + rng.randint(0, 365 * 86400 * 1000, 5000)
+        magnitudes = 2.5 + rng.exponential(0.43, 5000)
+        density, extent = get_magnitude_versus_time_raster(epoch_times, magnitudes, num_time_bins=50,
+                                                           num_mag_bins=20, origin_epoch=epoch_times.min())
+        self.assertEqual(density.shape, (20, 50))
+        self.assertEqual(density.sum(), 5000)
+        days = (epoch_times - epoch_times.min()) / 86400000
+        expected, _, _ = numpy.histogram2d(magnitudes, days, bins=(20, 50), range=[extent[2:], extent[:2]])
+        # bins only differ for events on the edges of bins
+        self.assertLess(numpy.abs(density - expected).sum(), 10)
+        numpy.testing.assert_array_equal(density.sum(axis=0), numpy.histogram(days, bins=50, range=extent[:2])[0])
+
+    def test_plot_modes(self):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as pyplot
+        from csep.utils.plotting import plot_magnitude_versus_time
+        catalog = make_catalog(1546300800000 + 1000 * numpy.arange(500))
+        catalog.catalog['magnitude'] = numpy.linspace(2.5, 7.0, 500)
+        ax = plot_magnitude_versus_time(catalog, plot_args={'raster': True, 'max_markers': 10})
+        self.assertEqual(len(ax.images), 1)
+        self.assertEqual(len(ax.collections[0].get_offsets()), 10)
+        self.assertTrue(numpy.all(ax.collections[0].get_offsets()[:, 1] > 6.9))
+        ax = plot_magnitude_versus_time(catalog, plot_args={'raster': 'auto'})
+        self.assertEqual(len(ax.images), 0)
+        pyplot.close('all')
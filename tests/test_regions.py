@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from csep.core.catalogs import CSEPCatalog
+from csep.core.regions import Region, parse_csep_template
+
+template = """<?xml version='1.0' encoding='UTF-8'?>
+<CSEPForecast xmlns="http://www.scec.org/xml-ns/csep/forecast/0.1">
+  <forecastData publicID="smi:org.scec/csep/forecast/1">
+    <modelName>unknown</modelName>
+    <defaultCellDimension latRange="0.1" lonRange="0.1"/>
+    <defaultMagBinDimension>0.1</defaultMagBinDimension>
+    <depthLayer max="30.0" min="0.0">
+      <cell lat="34.05" lon="-118.05">
+        <bin m="5.0">0.0</bin>
+        <bin m="5.1">0.0</bin>
+        <bin m="5.2">0.0</bin>
+      </cell>
+      <cell lat="34.05" lon="-117.95">
+        <bin m="5.0">0.0</bin>
+        <bin m="5.1">0.0</bin>
+        <bin m="5.2">0.0</bin>
+      </cell>
+      <cell lat="34.15" lon="-117.95">
+        <bin m="5.0">0.0</bin>
+        <bin m="5.1">0.0</bin>
+        <bin m="5.2">0.0</bin>
+      </cell>
+    </depthLayer>
+  </forecastData>
+</CSEPForecast>
+"""
+
+
+class TestRegion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'csep-forecast-template.xml')
+        with open(self.filename, 'w') as f:
+            f.write(template)
+        self.region = Region.from_csep_xml(self.filename, name='test')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parse_template(self):
+        midpoints, dh, magnitudes = parse_csep_template(self.filename)
+        self.assertEqual(dh, 0.1)
+        numpy.testing.assert_allclose(midpoints, [[-118.05, 34.05], [-117.95, 34.05], [-117.95, 34.15]])
+        numpy.testing.assert_allclose(magnitudes, [5.0, 5.1, 5.2])
+
+    def test_grid(self):
+        self.assertEqual(self.region.num_nodes, 3)
+        self.assertEqual((self.region.nx, self.region.ny), (2, 2))
+        numpy.testing.assert_allclose(self.region.origins[0], [-118.1, 34.0])
+        numpy.testing.assert_allclose(self.region.get_bbox(), [-118.1, -117.9, 34.0, 34.2])
+
+    def test_get_index_of(self):
+        lons = [-118.05, -117.95, -117.91, -118.05, -119.0, -117.95, numpy.nan]
+        lats = [34.01, 34.09, 34.19, 34.15, 34.05, 34.25, 34.05]
+        # fourth point is inside the bounding box but not in the region
+        self.assertListEqual(self.region.get_index_of(lons, lats).tolist(), [0, 1, 2, -1, -1, -1, -1])
+
+    def test_points_on_grid_lines(self):
+        # grid of the California testing region, origins computed from rounded midpoints as in the templates
+        lons = numpy.round(numpy.arange(-125.35, -113.1, 0.1), 2)
+        lats = numpy.round(numpy.arange(31.55, 43.0, 0.1), 2)
+        midpoints = numpy.array([(lon, lat) for lat in lats for lon in lons])
+        region = Region(midpoints - 0.05, 0.1)
+        self.assertEqual((region.xmin, region.ymin), (-125.4, 31.5))
+
+        # every grid line belongs to the cell above or to the right of it
+        columns = numpy.arange(region.nx)
+        rows = numpy.arange(region.ny)
+        line_lons = numpy.round(-125.4 + 0.1 * columns, 1)
+        line_lats = numpy.round(31.5 + 0.1 * rows, 1)
+        for dtype in (numpy.float64, numpy.float32):
+            idx = region.get_index_of(line_lons.astype(dtype), numpy.full(region.nx, 31.55, dtype=dtype))
+            numpy.testing.assert_array_equal(idx, columns)
+            idx = region.get_index_of(numpy.full(region.ny, -125.35, dtype=dtype), line_lats.astype(dtype))
+            numpy.testing.assert_array_equal(idx, rows * region.nx)
+
+        # lines on the upper and right edge of the region are outside
+        self.assertListEqual(region.get_index_of([-113.0, -120.0], [35.0, 43.0]).tolist(), [-1, -1])
+
+    def test_get_magnitude_index(self):
+        magnitudes = numpy.array([4.9, 5.0, 5.1, 5.15, 7.0], dtype=numpy.float32)
+        self.assertListEqual(self.region.get_magnitude_index(magnitudes).tolist(), [-1, 0, 1, 1, 2])
+
+    def test_catalog_spatial_idx(self):
+        events = numpy.zeros(3, dtype=CSEPCatalog.csep_dtype)
+        events['longitude'] = [-117.95, -118.05, -120.0]
+        events['latitude'] = [34.15, 34.05, 34.05]
+        catalog = CSEPCatalog(catalog=events)
+        self.assertListEqual(catalog.get_spatial_idx(self.region).tolist(), [2, 0, -1])
+
+        # events on grid lines, stored as float32 in CSEP catalogs
+        events['longitude'] = [-118.0, -118.0, -118.1]
+        events['latitude'] = [34.0, 34.1, 34.0]
+        catalog = CSEPCatalog(catalog=events)
+        self.assertListEqual(catalog.get_spatial_idx(self.region).tolist(), [1, 2, 0])
+
+    def test_duplicate_cells(self):
+        with self.assertRaises(ValueError):
+            Region([[0.0, 0.0], [0.0, 0.0]], 0.1)
@@ -0,0 +1,40 @@
+import os
+
+import numpy
+import pytest
+
+from csep.utils.plotting import plot_ecdf, plot_histogram, plot_magnitude_versus_time
+from csep.utils.reports import ReportBuilder
+from csep.utils.stats import ecdf
+from tests.helpers import make_catalog
+
+
+class TestReportBuilder:
+
+    def make_report(self, output_dir, max_workers):
+        rng = numpy.random.RandomState(0)
+        sim_counts = rng.poisson(20, 100)
+        catalog = make_catalog(1546300800000 + 1000 * numpy.arange(200))
+        catalog.catalog['magnitude'] = numpy.linspace(2.5, 6.0, 200)
+        report = ReportBuilder(output_dir, max_workers=max_workers)
+        report.add_figure('histogram.png', plot_histogram, sim_counts, 25, plot_args={'xlabel': 'Event Count'})
+        report.add_figure('ecdf.png', plot_ecdf, *ecdf(sim_counts), 25)
+        report.add_figure('magnitude_versus_time.png', plot_magnitude_versus_time, catalog,
+                          plot_args={'raster': True})
+        return report
+
+    @pytest.mark.parametrize('max_workers', [1, 2])
+    def test_render(self, tmp_path, max_workers):
+        output_dir = str(tmp_path / 'figures')
+        report = self.make_report(output_dir, max_workers)
+        filenames = report.render()
+        assert filenames == [os.path.join(output_dir, name)
+                             for name in ('histogram.png', 'ecdf.png', 'magnitude_versus_time.png')]
+        for filename in filenames:
+            with open(filename, 'rb') as f:
+                assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+
+    def test_duplicate_filename(self, tmp_path):
+        report = self.make_report(str(tmp_path), 1)
+        with pytest.raises(ValueError):
+            report.add_figure('ecdf.png', plot_ecdf, [0, 1], [0.5, 1.0])
@@ -1,4 +1,5 @@
 import numpy
+import pytest
 import unittest
 from csep.utils.stats import *
 
@@ -109,3 +110,37 @@ class TestLessEqualEcdf:
         test_val = 0.2
         test_result = less_equal_ecdf(test_data, test_val)
         assert test_result == 0.50
+
+class TestECDF:
+    def test_vectorized_queries(self):
+        data = numpy.array([3, 1, 2, 2, 5, 2])
+        dist = ECDF(data)
+        vals = numpy.array([0, 1, 2, 2.5, 5, 6])
+        numpy.testing.assert_allclose(dist.less_equal(vals), [numpy.mean(data <= v) for v in vals])
+        numpy.testing.assert_allclose(dist.greater_equal(vals), [numpy.mean(data >= v) for v in vals])
+        assert dist(2) == 4 / 6
+        assert isinstance(dist.greater_equal(2), float)
+
+    def test_matches_functions(self):
+        data = numpy.array([0, 0, 1, 1, 1, 4])
+        dist = ECDF(data)
+        for val in (-1, 0, 0.5, 1, 4, 5):
+            assert dist.less_equal(val) == less_equal_ecdf(data, val)
+            assert dist.greater_equal(val) == greater_equal_ecdf(data, val)
+
+    def test_values(self):
+        xs, ys = ECDF([2, 1, 4, 5]).values()
+        assert xs.tolist() == [1, 2, 4, 5]
+        assert ys.tolist() == [0.25, 0.5, 0.75, 1.0]
+
+    def test_merge(self):
+        rng = numpy.random.RandomState(0)
+        data = rng.poisson(10, size=1000)
+        merged = ECDF.merge([ECDF(chunk) for chunk in numpy.array_split(data, 7)])
+        numpy.testing.assert_array_equal(merged.x, numpy.sort(data))
+        vals = numpy.arange(0, 25)
+        numpy.testing.assert_allclose(merged.less_equal(vals), ECDF(data).less_equal(vals))
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            ECDF([])
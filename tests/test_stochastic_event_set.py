@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from csep.core.catalogs import UCERF3Catalog, StochasticEventSet
+from benchmarks.synthetic import generate_catalogs, write_catalogs
+
+
+class TestStochasticEventSet(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'results_complete.bin')
+        self.catalog_sizes = [5, 0, 12, 3, 0]
+        # flat magnitude distribution, so the magnitude filters of the tests keep some events
+        magnitudes = {'min_mw': 3.5, 'b_value': 0.5}
+        self.expected = list(generate_catalogs(self.catalog_sizes, **magnitudes))
+        write_catalogs(self.filename, self.catalog_sizes, **magnitudes)
+        self.event_set = UCERF3Catalog.load_event_set(self.filename, name='UCERF3-ETAS')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_offsets(self):
+        self.assertListEqual(self.event_set.offsets.tolist(), [0, 5, 5, 17, 20, 20])
+        self.assertListEqual(self.event_set.get_number_of_events().tolist(), self.catalog_sizes)
+        self.assertEqual(len(self.event_set), len(self.catalog_sizes))
+
+    def test_from_catalogs(self):
+        event_set = StochasticEventSet.from_catalogs(UCERF3Catalog.load_catalogs(filename=self.filename))
+        numpy.testing.assert_array_equal(event_set.events, self.event_set.events)
+        numpy.testing.assert_array_equal(event_set.offsets, self.event_set.offsets)
+        self.assertIs(event_set.catalog_type, UCERF3Catalog)
+
+    def test_catalog_views(self):
+        catalogs = list(self.event_set)
+        for catalog_id, (catalog, expected) in enumerate(zip(catalogs, self.expected)):
+            self.assertIsInstance(catalog, UCERF3Catalog)
+            self.assertEqual(catalog.catalog_id, catalog_id)
+            self.assertEqual(catalog.name, 'UCERF3-ETAS')
+            numpy.testing.assert_array_equal(catalog.catalog, expected)
+        self.assertTrue(numpy.shares_memory(catalogs[2].catalog, self.event_set.events))
+        numpy.testing.assert_array_equal(self.event_set[-2].catalog, self.expected[3])
+
+    def test_reductions(self):
+        max_magnitudes = self.event_set.get_max_magnitudes()
+        min_times = self.event_set.get_min_epoch_times()
+        for i, expected in enumerate(self.expected):
+            if len(expected) == 0:
+                self.assertTrue(numpy.isnan(max_magnitudes[i]))
+                self.assertTrue(numpy.isnan(min_times[i]))
+            else:
+                self.assertEqual(max_magnitudes[i], expected['magnitude'].max())
+                self.assertEqual(min_times[i], expected['origin_time'].min())
+
+    def test_load_subset(self):
+        event_set = UCERF3Catalog.load_event_set(self.filename, catalog_ids=[3, 0])
+        self.assertListEqual(event_set.catalog_ids.tolist(), [3, 0])
+        numpy.testing.assert_array_equal(event_set[0].catalog, self.expected[3])
+        numpy.testing.assert_array_equal(event_set[1].catalog, self.expected[0])
+
+    def test_filter(self):
+        filtered = self.event_set.filter('magnitude > 4.5 and depth < 20')
+        self.assertEqual(len(filtered), len(self.catalog_sizes))
+        for catalog, expected in zip(filtered, self.expected):
+            mask = (expected['magnitude'] > 4.5) & (expected['depth'] < 20)
+            numpy.testing.assert_array_equal(catalog.catalog, expected[mask])
+
+    def test_filter_while_loading(self):
+        catalogs = UCERF3Catalog.load_catalogs(filename=self.filename, filters='magnitude > 4.5 and depth < 20')
+        filtered = self.event_set.filter('magnitude > 4.5 and depth < 20')
+        for catalog, expected in zip(catalogs, filtered):
+            numpy.testing.assert_array_equal(catalog.catalog, expected.catalog)
+
+    def test_number_of_events_above(self):
+        thresholds = [5.0, 4.0, 6.0]
+        counts = self.event_set.get_number_of_events_above(thresholds)
+        self.assertEqual(counts.shape, (len(self.catalog_sizes), 3))
+        for i, expected in enumerate(self.expected):
+            for j, threshold in enumerate(thresholds):
+                self.assertEqual(counts[i, j], numpy.sum(expected['magnitude'] >= threshold))
+
+    def test_number_of_events_above_threshold_on_event(self):
+        from csep.core.catalogs import CSEPCatalog
+        events = numpy.zeros(3, dtype=CSEPCatalog.csep_dtype)
+        events['magnitude'] = [4.1, 4.2, 3.0]
+        event_set = StochasticEventSet.from_catalogs([CSEPCatalog(catalog=events)])
+        numpy.testing.assert_array_equal(event_set.get_number_of_events_above([4.1, 4.2]), [[2, 1]])
+        self.assertEqual(CSEPCatalog(catalog=events).filter('magnitude >= 4.1').get_number_of_events(), 2)
+        self.assertEqual(event_set.filter('magnitude >= 4.1').get_number_of_events()[0], 2)
+
+    def test_number_of_events_in(self):
+        times = self.event_set.get_epoch_times()
+        windows = [(times.min(), numpy.median(times)), (numpy.median(times), times.max() + 1)]
+        counts = self.event_set.get_number_of_events_in(windows)
+        numpy.testing.assert_array_equal(counts.sum(axis=1), self.catalog_sizes)
+        for i, expected in enumerate(self.expected):
+            start, end = windows[0]
+            self.assertEqual(counts[i, 0], numpy.sum((expected['origin_time'] >= start) & (expected['origin_time'] < end)))
+
+    def test_time_bin_counts(self):
+        times = self.event_set.get_epoch_times()
+        bin_edges = numpy.linspace(times.min(), times.max() + 1, 5).astype(numpy.int64)
+        counts = self.event_set.get_time_bin_counts(bin_edges)
+        self.assertEqual(counts.shape, (len(self.catalog_sizes), 4))
+        for i, expected in enumerate(self.expected):
+            expected_counts, _ = numpy.histogram(expected['origin_time'].astype(numpy.int64), bins=bin_edges)
+            numpy.testing.assert_array_equal(counts[i], expected_counts)
+            numpy.testing.assert_array_equal(self.event_set[i].get_time_bin_counts(bin_edges), expected_counts)
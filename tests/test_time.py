@@ -0,0 +1,75 @@
+import datetime
+import unittest
+
+import numpy
+
+from csep.utils.time import *
+
+
+class TestEpochTimeToZmapTime(unittest.TestCase):
+
+    def test_matches_datetime(self):
+        epoch_times = numpy.array([0, 709732655123, 1546300799999, 951782400000, -86400001], dtype='>i8')
+        year, month, day, hour, minute, second = epoch_time_to_zmap_time(epoch_times)
+        for i, epoch_time in enumerate(epoch_times):
+            dt = epoch_time_to_utc_datetime(epoch_time)
+            self.assertEqual((year[i], month[i], day[i], hour[i], minute[i], second[i]),
+                             (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second))
+
+    def test_leap_day(self):
+        epoch_time = datetime_to_utc_epoch(datetime.datetime(2000, 2, 29, 23, 59, 59))
+        components = epoch_time_to_zmap_time([epoch_time])
+        self.assertListEqual([c[0] for c in components], [2000, 2, 29, 23, 59, 59])
+
+
+class TestZmapTimeToEpochTime(unittest.TestCase):
+
+    def test_round_trip(self):
+        epoch_times = numpy.array([0, 709732655000, 1546300799000, 951868799000, -86401000])
+        components = epoch_time_to_zmap_time(epoch_times)
+        numpy.testing.assert_array_equal(zmap_time_to_epoch_time(*components), epoch_times)
+
+    def test_fractional_seconds(self):
+        epoch_time = zmap_time_to_epoch_time([1992], [6], [28], [11], [57], [35.25])
+        self.assertEqual(epoch_time[0], 709732655250)
+
+    def test_zmap_time_to_datetime(self):
+        dt = zmap_time_to_datetime(1992, 6, 28, 11, 57, 35.5)
+        self.assertEqual(dt, datetime.datetime(1992, 6, 28, 11, 57, 35, 500000, tzinfo=datetime.timezone.utc))
+
+
+class TestDecimalYear(unittest.TestCase):
+
+    def test_start_of_year(self):
+        epoch_time = datetime_to_utc_epoch(datetime.datetime(2019, 1, 1))
+        self.assertEqual(epoch_time_to_decimal_year([epoch_time])[0], 2019.0)
+
+    def test_leap_year(self):
+        # 2000 has 366 days, so half of the year ends at noon on July 1st
+        epoch_time = datetime_to_utc_epoch(datetime.datetime(2000, 7, 2))
+        self.assertEqual(epoch_time_to_decimal_year([epoch_time])[0], 2000.5)
+
+    def test_round_trip(self):
+        epoch_times = numpy.array([0, 709732655000, 1546300799000, -86401000])
+        decimal_years = epoch_time_to_decimal_year(epoch_times)
+        numpy.testing.assert_array_equal(decimal_year_to_epoch_time(decimal_years), epoch_times)
+
+
+class TestDatetime64(unittest.TestCase):
+
+    def test_utc_datetimes(self):
+        epoch_times = numpy.array([709732655000, 1546300799000], dtype='>i8')
+        datetimes = datetime64_to_utc_datetime(epoch_time_to_datetime64(epoch_times))
+        self.assertListEqual(datetimes, [epoch_time_to_utc_datetime(t) for t in epoch_times])
+        numpy.testing.assert_array_equal(datetime64_to_epoch_time(epoch_time_to_datetime64(epoch_times)),
+                                         epoch_times)
+
+
+class TestGetTimeBinEdges(unittest.TestCase):
+
+    def test_covers_end(self):
+        week = 7 * 86400 * 1000
+        edges = get_time_bin_edges(0, 2 * week, week)
+        self.assertListEqual(edges.tolist(), [0, week, 2 * week, 3 * week])
+        self.assertListEqual(get_time_bin_edges(0, week - 1, week).tolist(), [0, week])
+        self.assertListEqual(get_time_bin_edges(5, 5, week).tolist(), [5, 5 + week])